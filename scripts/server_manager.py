@@ -4,17 +4,58 @@ Excel MCP Server 管理スクリプト (Python版)
 """
 
 import argparse
+import json
 import os
 import sys
 import subprocess
+import time
+import urllib.error
+import urllib.request
 from pathlib import Path
 
 # プロジェクトルートディレクトリ
 PROJECT_ROOT = Path(__file__).parent.parent
 SRC_DIR = PROJECT_ROOT / "src"
-SERVER_SCRIPT = SRC_DIR / "index.py"
+SERVER_SCRIPT = SRC_DIR / "excel_mcp_server" / "main.py"
+SERVER_MODULE = "excel_mcp_server.main"
 
-def start_server():
+
+def server_command(args):
+    """サーバー起動コマンドを組み立てる"""
+    cmd = [sys.executable, "-m", SERVER_MODULE, "--transport", args.transport]
+    if args.transport != "stdio":
+        cmd += ["--host", args.host, "--port", str(args.port)]
+    cmd += ["--workers", str(args.workers)]
+    cmd += ["--max-concurrency", str(args.max_concurrency)]
+    return cmd
+
+
+def health_url(args):
+    """ヘルスチェック用URL"""
+    return f"http://{args.host}:{args.port}/health"
+
+
+def fetch_health(args, timeout=2.0):
+    """ヘルスチェックエンドポイントの応答を取得"""
+    with urllib.request.urlopen(health_url(args), timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def wait_until_healthy(args, process, timeout=30.0):
+    """HTTPサーバーがヘルスチェックに応答するまで待機"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            fetch_health(args)
+            return True
+        except (urllib.error.URLError, OSError, ValueError):
+            time.sleep(0.5)
+    return False
+
+
+def start_server(args):
     """MCPサーバーを起動"""
     print("📚 Excel MCP Server (Python版) を起動しています...")
     
@@ -24,21 +65,39 @@ def start_server():
     
     try:
         # サーバーを起動
-        cmd = [sys.executable, str(SERVER_SCRIPT)]
+        cmd = server_command(args)
         print(f"🚀 実行コマンド: {' '.join(cmd)}")
-        
-        # 標準入出力でサーバーを実行
-        process = subprocess.Popen(
-            cmd,
-            cwd=PROJECT_ROOT,
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
+
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [str(SRC_DIR), env.get("PYTHONPATH")])
         )
-        
-        print("✅ Excel MCP Server が起動しました")
-        print("📝 標準入出力でMCPプロトコルが動作しています")
+
+        if args.transport == "stdio":
+            # 標準入出力でサーバーを実行
+            process = subprocess.Popen(
+                cmd,
+                cwd=PROJECT_ROOT,
+                env=env,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+            print("✅ Excel MCP Server が起動しました")
+            print("📝 標準入出力でMCPプロトコルが動作しています")
+        else:
+            # HTTPモードはログをそのまま表示し、ヘルスチェックで起動を確認
+            process = subprocess.Popen(cmd, cwd=PROJECT_ROOT, env=env)
+            if not wait_until_healthy(args, process):
+                print(f"❌ サーバーがヘルスチェックに応答しません: {health_url(args)}")
+                process.terminate()
+                process.wait()
+                return False
+            print("✅ Excel MCP Server が起動しました")
+            print(f"🌐 MCPエンドポイント: http://{args.host}:{args.port}/mcp")
+            print(f"💓 ヘルスチェック: {health_url(args)}")
+
         print("🛑 Ctrl+C で停止できます")
         
         try:
@@ -57,6 +116,20 @@ def start_server():
         return False
 
 
+def check_health(args):
+    """HTTPモードで起動中のサーバーのヘルスチェック"""
+    print(f"💓 ヘルスチェック: {health_url(args)}")
+    try:
+        health = fetch_health(args)
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        print(f"❌ サーバーに接続できません: {e}")
+        return False
+
+    print("✅ サーバーは稼働中です")
+    print(json.dumps(health, ensure_ascii=False, indent=2))
+    return health.get("status") == "ok"
+
+
 def check_status():
     """サーバーの状態確認"""
     print("🔍 Excel MCP Server (Python版) の状態確認")
@@ -152,13 +225,22 @@ def run_tests():
 def main():
     """メイン関数"""
     parser = argparse.ArgumentParser(description="Excel MCP Server 管理ツール (Python版)")
-    parser.add_argument("command", choices=["start", "status", "install", "test"], 
+    parser.add_argument("command", choices=["start", "status", "health", "install", "test"], 
                        help="実行するコマンド")
+    parser.add_argument("--transport", choices=["stdio", "http", "sse"], default="stdio",
+                       help="MCPトランスポート（http: 複数クライアントで共有する常駐サーバー）")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTPモードのホスト")
+    parser.add_argument("--port", type=int, default=8000, help="HTTPモードのポート")
+    parser.add_argument("--workers", type=int, default=0, help="ワーカープロセス数")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                       help="同時に実行するツール呼び出しの上限（0で無制限）")
     
     args = parser.parse_args()
     
     if args.command == "start":
-        start_server()
+        start_server(args)
+    elif args.command == "health":
+        sys.exit(0 if check_health(args) else 1)
     elif args.command == "status":
         check_status()
     elif args.command == "install":
@@ -4,6 +4,13 @@ __version__ = "1.0.0"
 __author__ = "Your Name"
 __email__ = "your.email@example.com"
 
-from .main import mcp
-
 __all__ = ["mcp"]
+
+
+def __getattr__(name: str):
+    # サーバー本体はワーカープロセスなどでサブモジュールだけを使う場合に読み込まない
+    if name == "mcp":
+        from .main import mcp
+
+        return mcp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,223 @@
+"""
+A1形式のセル・範囲アドレスの解析
+
+すべてのツールで共有するコンパイル済みの解析処理です。通常の範囲（A1:C3）に加えて、
+列全体（B:B, A:D）、行全体（2:10）、終端の行を省略した範囲（A2:D）に対応し、
+シートの使用範囲に切り詰めてから走査することで、アドレスの大きさではなく
+実際のデータ量に比例したコストで処理します。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+from openpyxl.worksheet.worksheet import Worksheet
+
+# Excelのシートの最大行数・列数
+MAX_ROW = 1048576
+MAX_COLUMN = 16384
+
+COLUMN_PATTERN = re.compile(r"^[A-Z]{1,3}$")
+CELL_PATTERN = re.compile(r"^([A-Z]{1,3})([1-9]\d{0,6})$")
+RANGE_PATTERN = re.compile(
+    r"^(?:"
+    # A1:C3 / A2:D（終端の行を省略）
+    r"(?P<c1>[A-Z]{1,3})(?P<r1>[1-9]\d{0,6}):(?P<c2>[A-Z]{1,3})(?P<r2>[1-9]\d{0,6})?"
+    # B:B / A:D（列全体）
+    r"|(?P<cols1>[A-Z]{1,3}):(?P<cols2>[A-Z]{1,3})"
+    # 2:10（行全体）
+    r"|(?P<rows1>[1-9]\d{0,6}):(?P<rows2>[1-9]\d{0,6})"
+    r")$"
+)
+
+
+@dataclass(frozen=True)
+class CellRange:
+    """解析済みの範囲（1始まり、両端を含む）"""
+
+    min_col: int
+    min_row: int
+    max_col: int
+    max_row: int
+
+    @property
+    def coord(self) -> str:
+        """A1:C3形式のアドレス"""
+        return (
+            f"{get_column_letter(self.min_col)}{self.min_row}:"
+            f"{get_column_letter(self.max_col)}{self.max_row}"
+        )
+
+    @property
+    def rows(self) -> int:
+        """行数"""
+        return self.max_row - self.min_row + 1
+
+    @property
+    def columns(self) -> int:
+        """列数"""
+        return self.max_col - self.min_col + 1
+
+    def shifted(self, rows: int, columns: int) -> "CellRange":
+        """行方向・列方向に移動した範囲"""
+        return CellRange(
+            self.min_col + columns,
+            self.min_row + rows,
+            self.max_col + columns,
+            self.max_row + rows,
+        )
+
+    def contains(self, other: "CellRange") -> bool:
+        """other が範囲内に完全に含まれるか"""
+        return (
+            self.min_col <= other.min_col
+            and other.max_col <= self.max_col
+            and self.min_row <= other.min_row
+            and other.max_row <= self.max_row
+        )
+
+    def overlaps(self, other: "CellRange") -> bool:
+        """other と重なるセルがあるか"""
+        return (
+            self.min_col <= other.max_col
+            and other.min_col <= self.max_col
+            and self.min_row <= other.max_row
+            and other.min_row <= self.max_row
+        )
+
+
+def parse_column(column: str) -> int:
+    """列文字（例: B）を列番号（1始まり）に変換"""
+    if not isinstance(column, str) or COLUMN_PATTERN.match(column) is None:
+        raise ValueError(f"無効な列指定: '{column}'。正しい形式: A, B, AAなど")
+
+    index = column_index_from_string(column)
+    if index > MAX_COLUMN:
+        raise ValueError(f"列 '{column}' はシートの範囲外です")
+    return index
+
+
+def parse_cell(cell: str) -> tuple[int, int]:
+    """セルアドレスを (行, 列) に変換"""
+    match = CELL_PATTERN.match(cell) if isinstance(cell, str) else None
+    if match is None:
+        raise ValueError(f"無効なセル位置: '{cell}'。正しい形式: A1, B2, AA10など")
+
+    row = int(match.group(2))
+    column = column_index_from_string(match.group(1))
+    if row > MAX_ROW or column > MAX_COLUMN:
+        raise ValueError(f"セル位置 '{cell}' はシートの範囲外です")
+    return row, column
+
+
+def parse_range(rangeAddr: str) -> CellRange:
+    """範囲アドレスを解析（列全体・行全体は最大行・最大列まで広げる）"""
+    match = RANGE_PATTERN.match(rangeAddr) if isinstance(rangeAddr, str) else None
+    if match is None:
+        raise ValueError(
+            f"無効な範囲指定: '{rangeAddr}'。正しい形式: A1:C3, B:B, 2:10, A2:Dなど"
+        )
+
+    groups = match.groupdict()
+    if groups["c1"]:
+        min_col = column_index_from_string(groups["c1"])
+        max_col = column_index_from_string(groups["c2"])
+        min_row = int(groups["r1"])
+        max_row = int(groups["r2"]) if groups["r2"] else MAX_ROW
+    elif groups["cols1"]:
+        min_col = column_index_from_string(groups["cols1"])
+        max_col = column_index_from_string(groups["cols2"])
+        min_row, max_row = 1, MAX_ROW
+    else:
+        min_col, max_col = 1, MAX_COLUMN
+        min_row = int(groups["rows1"])
+        max_row = int(groups["rows2"])
+
+    if min_col > max_col or min_row > max_row:
+        raise ValueError(
+            f"無効な範囲指定: '{rangeAddr}'。開始位置は終了位置より左上である必要があります"
+        )
+    if max_row > MAX_ROW or max_col > MAX_COLUMN:
+        raise ValueError(f"範囲 '{rangeAddr}' はシートの範囲外です")
+
+    return CellRange(min_col, min_row, max_col, max_row)
+
+
+def clip_to_used_range(cell_range: CellRange, worksheet: Worksheet) -> CellRange | None:
+    """
+    範囲をシートの使用範囲（右下端）までに切り詰める
+
+    開始位置はそのままで、使用範囲より右・下の空白部分だけを除きます。
+    範囲全体が使用範囲の外にある場合は None を返します。
+    """
+    max_row = min(cell_range.max_row, worksheet.max_row)
+    max_col = min(cell_range.max_col, worksheet.max_column)
+    if cell_range.min_row > max_row or cell_range.min_col > max_col:
+        return None
+    return CellRange(cell_range.min_col, cell_range.min_row, max_col, max_row)
+
+
+def read_cell_value(worksheet: Worksheet, row: int, column: int) -> Any:
+    """セルを作成せずに値を取得（未使用のセルは None）"""
+    cell = worksheet._cells.get((row, column))
+    return None if cell is None else cell.value
+
+
+def read_range_values(worksheet: Worksheet, cell_range: CellRange) -> list[list[Any]]:
+    """範囲内の値を行単位で取得（空白セルを作成しない）"""
+    cells = worksheet._cells
+    columns = range(cell_range.min_col, cell_range.max_col + 1)
+    values = []
+    for row in range(cell_range.min_row, cell_range.max_row + 1):
+        row_values = []
+        for column in columns:
+            cell = cells.get((row, column))
+            row_values.append(None if cell is None else cell.value)
+        values.append(row_values)
+    return values
+
+
+def merge_row_spans(cell_ranges: list[CellRange]) -> list[tuple[int, int]]:
+    """複数の範囲が占める行を、重なりをまとめた昇順の行区間にする"""
+    spans: list[tuple[int, int]] = []
+    for cell_range in sorted(cell_ranges, key=lambda r: (r.min_row, r.max_row)):
+        if spans and cell_range.min_row <= spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], cell_range.max_row))
+        else:
+            spans.append((cell_range.min_row, cell_range.max_row))
+    return spans
+
+
+def read_windows(
+    worksheet: Worksheet, cell_ranges: list[CellRange]
+) -> list[list[list[Any]]]:
+    """
+    同じシートの複数の範囲を、行の昇順に1回走査して取得
+
+    重なる範囲や隣接する範囲の行はまとめて1度だけ走査し、
+    各行で対象となる範囲にだけ値を振り分けます。
+    """
+    cells = worksheet._cells
+    results: list[list[list[Any]]] = [[] for _ in cell_ranges]
+    order = sorted(range(len(cell_ranges)), key=lambda i: cell_ranges[i].min_row)
+
+    for first_row, last_row in merge_row_spans(cell_ranges):
+        windows = [
+            (index, cell_ranges[index])
+            for index in order
+            if first_row <= cell_ranges[index].min_row <= last_row
+        ]
+        for row in range(first_row, last_row + 1):
+            for index, window in windows:
+                if window.min_row <= row <= window.max_row:
+                    results[index].append(
+                        [
+                            None if cell is None else cell.value
+                            for cell in (
+                                cells.get((row, column))
+                                for column in range(window.min_col, window.max_col + 1)
+                            )
+                        ]
+                    )
+    return results
@@ -0,0 +1,81 @@
+"""
+サーバー設定
+
+コマンドライン引数から組み立てられ、各モジュールから参照されます。
+"""
+
+import os
+from dataclasses import dataclass, field
+
+
+def default_journal_dir() -> str:
+    """変更ジャーナルの既定の保存先ディレクトリ"""
+    return os.path.join(os.path.expanduser("~"), ".excel_mcp_server", "journal")
+
+
+def default_profile_dir() -> str:
+    """プロファイル結果の既定の保存先ディレクトリ"""
+    return os.path.join(os.path.expanduser("~"), ".excel_mcp_server", "profiles")
+
+
+@dataclass
+class ServerConfig:
+    """サーバー全体の設定"""
+
+    # 変更の永続化方式: "save"（毎回xlsxを保存）または "journal"（ジャーナルに追記）
+    durability: str = "save"
+    journal_dir: str = field(default_factory=default_journal_dir)
+    # ジャーナルをxlsxへ反映（コンパクション）する間隔（秒）
+    compact_interval: float = 30.0
+    # この件数を超えたらすぐにコンパクションを行う
+    compact_threshold: int = 1000
+    # メモリ上に保持するワークブック数（0でキャッシュ無効）
+    cache_size: int = 4
+    # 変更されたシートのXMLだけを書き直す部分保存（False で毎回xlsx全体を保存）
+    incremental_save: bool = True
+    # ワークシートを初めてアクセスされた時点で読み込む（未使用のシートは解析しない）
+    lazy_sheets: bool = False
+    # 読み取りツールの応答キャッシュの最大件数（0で無効）と最大合計バイト数
+    response_cache_size: int = 256
+    response_cache_bytes: int = 32 * 1024 * 1024
+    # 読み込んだワークブックと応答キャッシュのメモリ予算（バイト、0で無制限）と、
+    # 予算が空くのを待つ最大時間（秒）
+    memory_budget: int = 0
+    memory_wait: float = 30.0
+    # 読み取りエンジン: "openpyxl"、"calamine"（python-calamineが必要）、
+    # "auto"（reader_auto_bytes以上のファイルでcalamineを使用）
+    reader_engine: str = "openpyxl"
+    reader_auto_bytes: int = 8 * 1024 * 1024
+    # ツール呼び出しを振り分けるワーカープロセス数（0でプロセス内実行）
+    workers: int = 0
+    # 開いたワークブックのファイル監視（変更時にキャッシュを無効化）
+    watch: bool = False
+    watch_interval: float = 1.0
+    # OSの変更通知を使わずポーリングで監視する（ネットワーク共有など）
+    watch_polling: bool = False
+    # 監視中のファイルが変更されたら、キャッシュ済みだったものをバックグラウンドで再読み込み
+    prewarm: bool = False
+    # MCPトランスポート: "stdio" または "http"（streamable-http）/ "sse"
+    transport: str = "stdio"
+    host: str = "127.0.0.1"
+    port: int = 8000
+    # 同時に実行するツール呼び出しの上限（0で無制限）
+    max_concurrency: int = 0
+    # ツールの戻り値に構造化データの要約の文章を含める（False の場合は構造化データのみ）
+    result_summary: bool = True
+    # プロファイル結果の保存先（空の場合はプロファイリング無効）と、
+    # すべての呼び出しを計測する場合の種類（"cprofile" / "sample"、空の場合は要求ごと）
+    profile_dir: str = ""
+    profile_mode: str = ""
+
+
+SERVER_CONFIG = ServerConfig()
+
+
+def configure(**options) -> ServerConfig:
+    """設定値を更新して返す"""
+    for name, value in options.items():
+        if not hasattr(SERVER_CONFIG, name):
+            raise ValueError(f"不明な設定項目: {name}")
+        setattr(SERVER_CONFIG, name, value)
+    return SERVER_CONFIG
@@ -0,0 +1,94 @@
+"""
+数式の相対参照の変換
+
+openpyxl の Translator はセルごとに参照を正規表現で解析し直します。FormulaTemplate は
+アンカーの数式を1回だけ字句解析し、参照の行番号・列番号を整数に分解しておくため、
+各セルの数式は整数の加算と文字列の連結だけで作成できます（結果は Translator と同じ）。
+"""
+
+from openpyxl.formula.tokenizer import Token
+from openpyxl.formula.translate import Translator
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+
+from .addressing import MAX_COLUMN, MAX_ROW
+
+# 数式の部品: 固定の文字列、("row", 行番号)、("col", 列番号)
+Segment = str | tuple[str, int]
+
+
+def reference_segments(reference: str) -> list[Segment]:
+    """セル・範囲の参照を部品に分解（$付きの絶対参照と名前は固定の文字列）"""
+    sheet_part, reference = Translator.strip_ws_name(reference)
+    segments: list[Segment] = [sheet_part] if sheet_part else []
+
+    def row(value: str) -> Segment:
+        return value if value.startswith("$") else ("row", int(value))
+
+    def col(value: str) -> Segment:
+        return (
+            value if value.startswith("$") else ("col", column_index_from_string(value))
+        )
+
+    match = Translator.ROW_RANGE_RE.match(reference)
+    if match is not None:
+        return segments + [row(match.group(1)), ":", row(match.group(2))]
+    match = Translator.COL_RANGE_RE.match(reference)
+    if match is not None:
+        return segments + [col(match.group(1)), ":", col(match.group(2))]
+    if ":" in reference:
+        for index, piece in enumerate(reference.split(":")):
+            if index:
+                segments.append(":")
+            segments.extend(reference_segments(piece))
+        return segments
+    match = Translator.CELL_REF_RE.match(reference)
+    if match is None:
+        # 名前付き範囲
+        return segments + [reference]
+    return segments + [col(match.group(1)), row(match.group(2))]
+
+
+class FormulaTemplate:
+    """アンカーのセルの数式から、他のセルに移した場合の数式を作成する"""
+
+    def __init__(self, formula: str):
+        if not isinstance(formula, str) or not formula.startswith("="):
+            raise ValueError(f"数式は = で始まる必要があります: '{formula}'")
+
+        tokens = Translator(formula, origin="A1").get_tokens()
+        segments: list[Segment] = ["="]
+        for token in tokens:
+            if token.type == Token.OPERAND and token.subtype == Token.RANGE:
+                segments.extend(reference_segments(token.value))
+            else:
+                segments.append(token.value)
+
+        # 隣り合う固定の文字列を1つにまとめる
+        self.segments: list[Segment] = []
+        for segment in segments:
+            if (
+                isinstance(segment, str)
+                and self.segments
+                and isinstance(self.segments[-1], str)
+            ):
+                self.segments[-1] += segment
+            else:
+                self.segments.append(segment)
+
+    def translate(self, row_delta: int, col_delta: int) -> str:
+        """アンカーから row_delta 行・col_delta 列移したセルの数式"""
+        parts = []
+        for segment in self.segments:
+            if isinstance(segment, str):
+                parts.append(segment)
+            elif segment[0] == "row":
+                value = segment[1] + row_delta
+                if not 1 <= value <= MAX_ROW:
+                    raise ValueError("数式の参照がシートの範囲外になります")
+                parts.append(str(value))
+            else:
+                value = segment[1] + col_delta
+                if not 1 <= value <= MAX_COLUMN:
+                    raise ValueError("数式の参照がシートの範囲外になります")
+                parts.append(get_column_letter(value))
+        return "".join(parts)
@@ -0,0 +1,215 @@
+"""
+見出し名 → 列番号の対応表のキャッシュ
+
+(ファイル, シート, 見出し行) ごとに見出し行の値から作成した対応表を、ファイルの
+フィンガープリントとともに保持します。ファイルが外部で変更された場合は次の参照時に
+作り直し、このサーバーによる変更では保存（またはジャーナルへの追記）の時点で
+見出し行に書き込まれたセルだけを読み直して更新します。対応表の数には上限があり、
+超えた場合は最も長く使われていないものから削除します（メモリ予算による解放も同じ順）。
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+from .addressing import CellRange, parse_cell, parse_range
+from .workbook_cache import Fingerprint, file_fingerprint, normalize_path
+
+HeaderKey = tuple[str, str, int]
+
+
+@dataclass
+class HeaderEntry:
+    """見出し行の対応表（columns の値が None の見出し名は複数の列にある）"""
+
+    fingerprint: Fingerprint | None
+    columns: dict[str, int | None]
+    width: int
+
+    def size(self) -> int:
+        """対応表のおおよそのバイト数"""
+        return 200 + sum(100 + len(name.encode("utf-8")) for name in self.columns)
+
+    def resolve(self, name: str) -> int:
+        """見出し名の列番号"""
+        column = self.columns.get(name.strip(), 0)
+        if column == 0:
+            available = ", ".join(self.columns) or "なし"
+            raise ValueError(
+                f"見出し '{name}' が見つかりません。利用可能な見出し: {available}"
+            )
+        if column is None:
+            raise ValueError(f"見出し '{name}' が複数の列にあります")
+        return column
+
+
+def header_columns(values: list[Any]) -> dict[str, int | None]:
+    """見出し行の値から 見出し名 → 列番号 の対応表を作成（空白のセルは除く）"""
+    columns: dict[str, int | None] = {}
+    for column, value in enumerate(values, start=1):
+        if value is None:
+            continue
+        name = str(value).strip()
+        if name:
+            columns[name] = None if name in columns else column
+    return columns
+
+
+def worksheet_header(worksheet: Worksheet, headerRow: int) -> list[Any]:
+    """openpyxl のシートの見出し行の値（最後の空でない見出しの列まで）"""
+    found = {
+        column: cell.value
+        for (row, column), cell in worksheet._cells.items()
+        if row == headerRow and cell.value is not None and str(cell.value).strip()
+    }
+    return [found.get(column) for column in range(1, max(found, default=0) + 1)]
+
+
+def record_span(record: dict) -> CellRange | None:
+    """ジャーナルの変更レコードが値を書き込む範囲（書式だけの変更は None）"""
+    op = record["op"]
+    if op == "set_cell":
+        row, column = parse_cell(record["cell"])
+        return CellRange(column, row, column, row)
+    if op == "set_range":
+        row, column = parse_cell(record["startCell"])
+        width = max((len(values) for values in record["values"]), default=0)
+        if not record["values"] or not width:
+            return None
+        return CellRange(
+            column, row, column + width - 1, row + len(record["values"]) - 1
+        )
+    if op == "fill_formula":
+        return parse_range(record["range"])
+    return None
+
+
+class HeaderIndex:
+    """LRU方式・件数上限付きの見出し行の対応表のキャッシュ"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[HeaderKey, HeaderEntry] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, filePath: str, sheetName: str, headerRow: int) -> HeaderEntry | None:
+        """フィンガープリントが一致する場合のみ対応表を返す"""
+        key = (normalize_path(filePath), sheetName, headerRow)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.fingerprint != file_fingerprint(key[0]):
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(
+        self,
+        filePath: str,
+        sheetName: str,
+        headerRow: int,
+        values: list[Any],
+        fingerprint: Fingerprint | None,
+    ) -> HeaderEntry:
+        """見出し行の値から対応表を作成して登録"""
+        entry = HeaderEntry(fingerprint, header_columns(values), len(values))
+        if self.max_entries <= 0:
+            return entry
+        key = (normalize_path(filePath), sheetName, headerRow)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._total_bytes += entry.size()
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def update(
+        self,
+        filePath: str,
+        workbook: Workbook,
+        before: Fingerprint | None,
+        records: list[dict] | None = None,
+        sheets: list[str] | None = None,
+    ) -> None:
+        """
+        このサーバーによる変更を対応表に反映（commit_workbook から呼ばれる）
+
+        変更レコードが見出し行に書き込んでいる場合は、その列までの見出し行を読み直します。
+        変更レコードのないシートの変更（並べ替えなど）と構成の変更では対応表を削除し、
+        次の参照時に作り直します。変更前のファイル before と一致しない対応表も削除します。
+        """
+        path = normalize_path(filePath)
+        after = file_fingerprint(path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                _, sheetName, headerRow = key
+                entry = self._entries[key]
+                if (
+                    entry.fingerprint != before
+                    or sheetName not in workbook.sheetnames
+                    or (records is None and sheets is None)
+                    or sheetName in (sheets or ())
+                ):
+                    self._remove(key)
+                    continue
+
+                touched = [
+                    span
+                    for span in (
+                        record_span(record)
+                        for record in records or []
+                        if record["sheet"] == sheetName
+                    )
+                    if span is not None and span.min_row <= headerRow <= span.max_row
+                ]
+                if touched:
+                    width = max(entry.width, *(span.max_col for span in touched))
+                    cells = workbook[sheetName]._cells
+                    values = []
+                    for column in range(1, width + 1):
+                        cell = cells.get((headerRow, column))
+                        values.append(None if cell is None else cell.value)
+                    self._total_bytes -= entry.size()
+                    entry.columns = header_columns(values)
+                    entry.width = width
+                    self._total_bytes += entry.size()
+                entry.fingerprint = after
+
+    def invalidate(self, filePath: str) -> None:
+        """ファイルに関するすべての対応表を削除"""
+        path = normalize_path(filePath)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """すべての対応表を削除"""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def evict_oldest(self) -> bool:
+        """最も長く使われていない対応表を削除し、削除したかを返す"""
+        with self._lock:
+            if not self._entries:
+                return False
+            self._remove(next(iter(self._entries)))
+            return True
+
+    def memory_usage(self) -> int:
+        """保持している対応表のおおよその合計バイト数"""
+        with self._lock:
+            return self._total_bytes
+
+    def _remove(self, key: HeaderKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size()
@@ -0,0 +1,227 @@
+"""
+変更されたシートだけを書き直す部分保存
+
+openpyxl の workbook.save() はすべてのシート・書式・共有文字列を毎回シリアライズします。
+ここでは保存元の xlsx（ZIP）を土台に、変更されたシートのXMLだけを openpyxl で書き直し、
+それ以外のパーツ（他のシート、画像、ピボットキャッシュ、VBAなど）は圧縮済みのバイト列を
+そのままコピーします。
+
+- 書き直したシートの文字列はインライン文字列で出力されるため、共有文字列テーブルは
+  そのままコピーできます
+- 書式テーブル（styles.xml）は、読み込み後に新しい書式が追加された場合だけ書き直します
+- 計算チェーン（calcChain.xml）は削除し、次に開いたときに再計算させます
+
+シートの追加・削除や関連パーツ（図・コメント・テーブルなど）を持つシートの変更など、
+部分保存で正しく扱えない場合は False を返し、呼び出し側で通常の保存を行います。
+"""
+
+import re
+import struct
+import weakref
+import zipfile
+from collections.abc import Iterable
+from copy import copy
+
+from openpyxl.packaging.manifest import Manifest
+from openpyxl.packaging.relationship import get_dependents, get_rels_path
+from openpyxl.reader.excel import _find_workbook_part
+from openpyxl.reader.workbook import WorkbookParser
+from openpyxl.styles.stylesheet import write_stylesheet
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet._writer import WorksheetWriter
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.constants import ARC_CONTENT_TYPES
+from openpyxl.xml.functions import fromstring, tostring
+
+# ZIPのローカルファイルヘッダーの固定長部分と、データディスクリプタ使用フラグ
+LOCAL_HEADER_SIZE = 30
+DATA_DESCRIPTOR_FLAG = 0x08
+
+# calcPr を挿入する位置（CT_Workbook の要素順で calcPr より前に来る要素）
+CALC_PR_PRECEDING = (b"</definedNames>", b"</externalReferences>", b"</sheets>")
+
+# 前回の読み込み・保存の時点での書式テーブルの大きさ
+_style_baselines: "weakref.WeakKeyDictionary[Workbook, tuple]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def style_sizes(workbook: Workbook) -> tuple:
+    """書式テーブルの大きさ（新しい書式が追加されたかの判定に使う）"""
+    return (
+        len(workbook._cell_styles),
+        len(workbook._fonts),
+        len(workbook._fills),
+        len(workbook._borders),
+        len(workbook._number_formats),
+        len(workbook._alignments),
+        len(workbook._protections),
+        len(workbook._differential_styles.styles),
+        len(workbook._named_styles),
+    )
+
+
+def remember_styles(workbook: Workbook) -> None:
+    """ディスク上の styles.xml と一致している時点の書式テーブルの大きさを記録"""
+    _style_baselines[workbook] = style_sizes(workbook)
+
+
+def save_incremental(
+    workbook: Workbook, sourcePath: str, targetPath: str, dirtySheets: Iterable[str]
+) -> bool:
+    """
+    sourcePath を土台に、dirtySheets のシートだけを書き直して targetPath に保存
+
+    部分保存できない場合は何も書き出さずに False を返します。
+    """
+    dirty = set(dirtySheets)
+    with zipfile.ZipFile(sourcePath) as source:
+        replacements = plan_replacements(workbook, source, dirty)
+        if replacements is None:
+            return False
+        replaced, dropped = replacements
+        copy_archive(source, targetPath, replaced, dropped)
+
+    remember_styles(workbook)
+    return True
+
+
+def plan_replacements(
+    workbook: Workbook, source: zipfile.ZipFile, dirty: set[str]
+) -> tuple[dict[str, bytes], set[str]] | None:
+    """書き直すパーツと削除するパーツを決める（部分保存できない場合は None）"""
+    names = set(source.namelist())
+    manifest = Manifest.from_tree(fromstring(source.read(ARC_CONTENT_TYPES)))
+    workbook_part = _find_workbook_part(manifest).PartName[1:]
+
+    parser = WorkbookParser(source, workbook_part)
+    parser.parse()
+    sheet_parts = {sheet.name: rel.target for sheet, rel in parser.find_sheets()}
+
+    # シートの追加・削除・名前変更・並べ替えがあれば全体を保存する
+    if list(sheet_parts) != workbook.sheetnames or not dirty <= set(sheet_parts):
+        return None
+
+    rels_path = get_rels_path(workbook_part)
+    relationships = get_dependents(source, rels_path)
+    parts_by_type = {rel.Type.rsplit("/", 1)[-1]: rel for rel in relationships}
+
+    replaced: dict[str, bytes] = {}
+    dropped: set[str] = set()
+
+    for sheetName in dirty:
+        worksheet = workbook[sheetName]
+        part = sheet_parts[sheetName]
+        if not isinstance(worksheet, Worksheet) or get_rels_path(part) in names:
+            return None
+        data = serialize_worksheet(worksheet)
+        if data is None:
+            return None
+        replaced[part] = data
+
+    # 新しい書式が追加された場合だけ styles.xml を書き直す
+    styles = parts_by_type.get("styles")
+    if styles is None:
+        return None
+    if _style_baselines.get(workbook) != style_sizes(workbook):
+        replaced[styles.target] = tostring(write_stylesheet(workbook))
+
+    workbook_xml = source.read(workbook_part)
+    calc_chain = parts_by_type.get("calcChain")
+    if calc_chain is not None:
+        dropped.add(calc_chain.target)
+        replaced[ARC_CONTENT_TYPES] = re.sub(
+            rb"<Override\b[^>]*PartName=\"/"
+            + re.escape(calc_chain.target.encode())
+            + rb"\"[^>]*/>",
+            b"",
+            source.read(ARC_CONTENT_TYPES),
+        )
+        replaced[rels_path] = re.sub(
+            rb"<Relationship\b[^>]*\bId=\"" + calc_chain.Id.encode() + rb"\"[^>]*/>",
+            b"",
+            source.read(rels_path),
+        )
+
+    workbook_xml = request_full_calculation(workbook_xml)
+    if workbook_xml is None:
+        return None
+    replaced[workbook_part] = workbook_xml
+
+    return replaced, dropped
+
+
+def serialize_worksheet(worksheet: Worksheet) -> bytes | None:
+    """シートのXMLを作成（関連パーツが必要なシートは None）"""
+    writer = WorksheetWriter(worksheet)
+    try:
+        writer.write()
+        if len(writer._rels) or worksheet._comments:
+            return None
+        return writer.read()
+    finally:
+        writer.cleanup()
+
+
+def request_full_calculation(workbook_xml: bytes) -> bytes | None:
+    """次に開いたときに全体を再計算するよう calcPr に fullCalcOnLoad を設定"""
+    match = re.search(rb"<calcPr\b[^>]*?(/?)>", workbook_xml)
+    if match:
+        tag = match.group(0)
+        if b"fullCalcOnLoad=" in tag:
+            new_tag = re.sub(rb'fullCalcOnLoad="[^"]*"', b'fullCalcOnLoad="1"', tag)
+        else:
+            end = len(tag) - len(match.group(1)) - 1
+            new_tag = tag[:end] + b' fullCalcOnLoad="1"' + tag[end:]
+        return workbook_xml[: match.start()] + new_tag + workbook_xml[match.end() :]
+
+    for closing in CALC_PR_PRECEDING:
+        position = workbook_xml.rfind(closing)
+        if position >= 0:
+            position += len(closing)
+            return (
+                workbook_xml[:position]
+                + b'<calcPr calcId="124519" fullCalcOnLoad="1"/>'
+                + workbook_xml[position:]
+            )
+    return None
+
+
+def copy_archive(
+    source: zipfile.ZipFile,
+    targetPath: str,
+    replaced: dict[str, bytes],
+    dropped: set[str],
+) -> None:
+    """ZIPのメンバーを元の順序で書き出す（変更のないメンバーは圧縮済みのままコピー）"""
+    with zipfile.ZipFile(targetPath, "w", zipfile.ZIP_DEFLATED) as target:
+        for info in source.infolist():
+            if info.filename in dropped:
+                continue
+            if info.filename in replaced:
+                target.writestr(info.filename, replaced[info.filename])
+            else:
+                copy_raw_member(source, info, target)
+
+
+def copy_raw_member(
+    source: zipfile.ZipFile, info: zipfile.ZipInfo, target: zipfile.ZipFile
+) -> None:
+    """ZIPメンバーを展開・再圧縮せずにコピー"""
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(LOCAL_HEADER_SIZE)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length)
+    data = source.fp.read(info.compress_size)
+
+    member = copy(info)
+    # サイズとCRCをローカルヘッダーに書くため、データディスクリプタは使わない
+    member.flag_bits &= ~DATA_DESCRIPTOR_FLAG
+    target.fp.seek(target.start_dir)
+    member.header_offset = target.fp.tell()
+    target.fp.write(member.FileHeader())
+    target.fp.write(data)
+    target.start_dir = target.fp.tell()
+    target.filelist.append(member)
+    target.NameToInfo[member.filename] = member
+    target._didModify = True
@@ -0,0 +1,211 @@
+"""
+追記型の変更ジャーナル
+
+ジャーナルモードでは、セル値・数式・書式の変更をワークブックごとのジャーナルファイル
+（JSON Lines）に追記して fsync するだけで応答します。xlsx 全体の再保存は
+バックグラウンドのコンパクション、save_workbook ツール、または起動時の復旧処理で
+まとめて行われます。
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+
+from .workbook_cache import normalize_path
+
+JOURNAL_SUFFIX = ".journal.jsonl"
+
+
+def fsync_directory(directory: str) -> None:
+    """ディレクトリエントリの作成を永続化（対応していない環境では何もしない）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class MutationJournal:
+    """ワークブックごとの追記専用ジャーナル"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._handles: dict[str, object] = {}
+        self._pending: dict[str, int] = {}
+        self._since: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, directory: str) -> None:
+        """ジャーナルの保存先を変更"""
+        self.close()
+        self.directory = directory
+
+    def journal_path(self, filePath: str) -> str:
+        """ワークブックに対応するジャーナルファイルのパス"""
+        digest = hashlib.sha1(normalize_path(filePath).encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:20] + JOURNAL_SUFFIX)
+
+    def append(self, filePath: str, records: list[dict]) -> None:
+        """変更レコードを追記して fsync する"""
+        if not records:
+            return
+
+        key = normalize_path(filePath)
+        data = "".join(
+            json.dumps(record, ensure_ascii=False) + "\n" for record in records
+        ).encode("utf-8")
+
+        with self._lock:
+            handle = self._handles.get(key)
+            if handle is None:
+                handle = self._open(filePath)
+                self._handles[key] = handle
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+            if key not in self._pending:
+                self._since[key] = time.monotonic()
+            self._pending[key] = self._pending.get(key, 0) + len(records)
+
+    def records(self, filePath: str) -> list[dict]:
+        """ジャーナルに記録された変更レコードを順に返す"""
+        path = self.journal_path(filePath)
+        if not os.path.exists(path):
+            return []
+        records, _ = self._read(path)
+        return records
+
+    def pending_count(self, filePath: str) -> int:
+        """このプロセスで追記され、まだコンパクションされていないレコード数"""
+        with self._lock:
+            return self._pending.get(normalize_path(filePath), 0)
+
+    def due(self, interval: float, threshold: int) -> list[str]:
+        """コンパクションが必要なワークブックのパス一覧"""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                key
+                for key, count in self._pending.items()
+                if count >= threshold or now - self._since[key] >= interval
+            ]
+
+    def pending_files(self) -> list[str]:
+        """このプロセスで追記され、まだコンパクションされていないワークブックのパス一覧"""
+        with self._lock:
+            return list(self._pending)
+
+    def discard(self, filePath: str) -> None:
+        """コンパクション済みのジャーナルを削除"""
+        key = normalize_path(filePath)
+        with self._lock:
+            handle = self._handles.pop(key, None)
+            if handle is not None:
+                handle.close()
+            self._pending.pop(key, None)
+            self._since.pop(key, None)
+            try:
+                os.remove(self.journal_path(filePath))
+            except FileNotFoundError:
+                pass
+
+    def pending_paths(self) -> list[str]:
+        """ジャーナルが残っているワークブックのパス一覧（起動時の復旧用）"""
+        if not os.path.isdir(self.directory):
+            return []
+
+        paths = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(JOURNAL_SUFFIX):
+                continue
+            _, header = self._read(os.path.join(self.directory, name))
+            if header and header.get("path"):
+                paths.append(header["path"])
+        return paths
+
+    def close(self) -> None:
+        """開いているジャーナルファイルを閉じる"""
+        with self._lock:
+            for handle in self._handles.values():
+                handle.close()
+            self._handles.clear()
+
+    def _open(self, filePath: str):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.journal_path(filePath)
+        is_new = not os.path.exists(path)
+        handle = open(path, "ab")
+        if is_new:
+            header = {"path": os.path.abspath(filePath), "created": time.time()}
+            handle.write((json.dumps(header, ensure_ascii=False) + "\n").encode())
+            handle.flush()
+            os.fsync(handle.fileno())
+            fsync_directory(self.directory)
+        return handle
+
+    def _read(self, path: str) -> tuple[list[dict], dict | None]:
+        header = None
+        records = []
+        with open(path, "rb") as handle:
+            for index, line in enumerate(handle):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # クラッシュで途中まで書かれた最終行は無視する
+                    break
+                if index == 0:
+                    header = entry
+                else:
+                    records.append(entry)
+        return records, header
+
+
+class JournalCompactor(threading.Thread):
+    """保留中のジャーナルを定期的に xlsx へ反映するバックグラウンドスレッド"""
+
+    def __init__(
+        self,
+        journal: MutationJournal,
+        compact: Callable[[str], None],
+        interval: float,
+        threshold: int,
+    ):
+        super().__init__(name="journal-compactor", daemon=True)
+        self.journal = journal
+        self.compact = compact
+        self.interval = interval
+        self.threshold = threshold
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def notify(self) -> None:
+        """しきい値を超えた可能性があるので即座に確認させる"""
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        """スレッドを停止"""
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(timeout=max(self.interval / 2, 0.1))
+            self._wakeup.clear()
+            for filePath in self.journal.due(self.interval, self.threshold):
+                try:
+                    self.compact(filePath)
+                except Exception as e:
+                    print(
+                        f"ジャーナルのコンパクションに失敗しました: {filePath}: {e}",
+                        file=sys.stderr,
+                    )
@@ -0,0 +1,169 @@
+"""
+シートを必要になった時点で読み込むワークブック
+
+openpyxl.load_workbook() はすべてのシートのXMLを解析してセルオブジェクトを作成するため、
+大きな参照用シートを多数含むブックでは1つのシートを変更するだけでも時間とメモリが
+かかります。ここではブック全体の構成（シート名・書式・共有文字列・定義名）だけを読み込み、
+各ワークシートは中身のない仮のシートとして作成しておき、初めてアクセスされた時点で
+そのシートのXMLだけを解析します。
+
+読み込まれなかったシートは、部分保存（incremental_save）で元のファイルのXMLがそのまま
+コピーされます。xlsx全体を保存する場合は、保存前に残りのシートもすべて読み込まれます。
+"""
+
+from collections.abc import Iterable
+
+from openpyxl.reader.excel import ExcelReader
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+
+class LazyWorkbook(Workbook):
+    """未読み込みのシートにアクセスした時点でそのシートを読み込むワークブック"""
+
+    # 読み込み元のファイルと、未読み込みのシート名 → シートのXMLパーツのパス
+    _source_path: str
+    _unloaded: dict[str, str]
+
+    def unloaded_sheets(self) -> list[str]:
+        """まだ読み込まれていないシート名"""
+        return list(self._unloaded)
+
+    def load_sheets(self, sheetNames: Iterable[str]) -> None:
+        """指定したシートのうち未読み込みのものを元のファイルから読み込む"""
+        pending = [name for name in sheetNames if name in self._unloaded]
+        if not pending:
+            return
+        reader = SheetReader(self._source_path, self, pending)
+        reader.read_sheets()
+        for name in pending:
+            del self._unloaded[name]
+
+    def __getitem__(self, key):
+        # Workbook.__getitem__ は worksheets を経由するため、シート一覧から直接探す
+        self.load_sheets([key])
+        for sheet in self._sheets:
+            if sheet.title == key:
+                return sheet
+        raise KeyError(f"Worksheet {key} does not exist.")
+
+    @property
+    def worksheets(self):
+        # シート一覧を扱う処理（xlsx全体の保存など）では、すべてのシートを読み込む
+        self.load_sheets(self.unloaded_sheets())
+        return super().worksheets
+
+    @property
+    def active(self):
+        sheet = Workbook.active.fget(self)
+        if sheet is not None and sheet.title in self._unloaded:
+            self.load_sheets([sheet.title])
+            sheet = Workbook.active.fget(self)
+        return sheet
+
+    @active.setter
+    def active(self, value):
+        Workbook.active.fset(self, value)
+
+
+class LazyExcelReader(ExcelReader):
+    """ワークシートを仮のシートとして作成し、LazyWorkbook を返すリーダー"""
+
+    def __init__(self, filePath: str):
+        super().__init__(filePath)
+        self.filePath = filePath
+
+    def read_workbook(self):
+        super().read_workbook()
+        # WorkbookParser が作成したワークブックを、シートの遅延読み込みに対応させる
+        self.wb.__class__ = LazyWorkbook
+        self.wb._source_path = self.filePath
+        self.wb._unloaded = {}
+
+    def read_worksheets(self):
+        # チャートシートは通常どおり読み込み、ワークシートは中身のない仮のシートにする
+        entries = [
+            (sheet, rel)
+            for sheet, rel in self.parser.find_sheets()
+            if rel.target in self.valid_files
+        ]
+        charts = [(sheet, rel) for sheet, rel in entries if "chartsheet" in rel.Type]
+        self.parser.find_sheets = lambda: iter(charts)
+        super().read_worksheets()
+
+        loaded = {sheet.title: sheet for sheet in self.wb._sheets}
+        ordered = []
+        for sheet, rel in entries:
+            if sheet.name in loaded:
+                ordered.append(loaded[sheet.name])
+                continue
+            placeholder = Worksheet(self.wb, title=sheet.name)
+            placeholder.sheet_state = sheet.state
+            ordered.append(placeholder)
+            self.wb._unloaded[sheet.name] = rel.target
+        self.wb._sheets = ordered
+
+
+class SheetReader(ExcelReader):
+    """LazyWorkbook の仮のシートを、元のファイルから読み込んだシートに置き換えるリーダー"""
+
+    def __init__(self, filePath: str, workbook: LazyWorkbook, sheetNames: list[str]):
+        super().__init__(filePath)
+        self.target = workbook
+        self.sheet_names = set(sheetNames)
+
+    def read_sheets(self) -> None:
+        """
+        指定したシートだけを読み込む
+
+        書式はワークブックの読み込み時に取り込んだものを使うため、書式テーブルは
+        読み直しません（部分保存後のファイルでも書式の番号は変わりません）。
+        """
+        try:
+            self.read_manifest()
+            self.read_strings()
+            self.read_workbook()
+            self.read_worksheets()
+        finally:
+            self.archive.close()
+
+    def read_workbook(self):
+        super().read_workbook()
+        self.wb = self.target
+
+    def read_worksheets(self):
+        selected = [
+            (sheet, rel)
+            for sheet, rel in self.parser.find_sheets()
+            if sheet.name in self.sheet_names
+        ]
+        self.parser.find_sheets = lambda: iter(selected)
+
+        placeholders = {
+            sheet.title: (index, sheet)
+            for index, sheet in enumerate(self.wb._sheets)
+            if sheet.title in self.sheet_names
+        }
+        for _, placeholder in placeholders.values():
+            self.wb._sheets.remove(placeholder)
+        super().read_worksheets()
+
+        # 読み込んだシートを元の位置に戻し、定義名・印刷設定を引き継ぐ
+        loaded = {sheet.title: sheet for sheet in self.wb._sheets}
+        for name, (index, placeholder) in sorted(
+            placeholders.items(), key=lambda item: item[1][0]
+        ):
+            worksheet = loaded[name]
+            self.wb._sheets.remove(worksheet)
+            self.wb._sheets.insert(index, worksheet)
+            worksheet.defined_names = placeholder.defined_names
+            worksheet._print_rows = placeholder._print_rows
+            worksheet._print_cols = placeholder._print_cols
+            worksheet._print_area = placeholder._print_area
+
+
+def load_workbook_lazily(filePath: str) -> LazyWorkbook:
+    """シートを遅延読み込みするワークブックとして開く"""
+    reader = LazyExcelReader(filePath)
+    reader.read()
+    return reader.wb
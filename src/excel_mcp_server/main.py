@@ -4,21 +4,236 @@ Excel MCP Server - Python版 (FastMCP使用)
 AIエージェントがExcelを自由に操作できるModel Context Protocol (MCP) サーバーです。
 """
 
-import json
+import argparse
+import asyncio
+import atexit
+import functools
+import inspect
 import os
-import re
-from typing import Annotated
-
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from copy import copy
+from datetime import date, datetime, time
+from time import perf_counter
+from typing import Annotated, Any
+
+import numpy as np
 import openpyxl
 import pandas as pd
 from fastmcp import FastMCP
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from openpyxl.formula.translate import Translator
 from openpyxl.styles import Border, Font, PatternFill, Side
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.utils.cell import get_column_letter
+from openpyxl.utils.datetime import to_excel
 from openpyxl.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
 from pydantic import Field
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from . import sheet_diff, sheet_profile, template_render, workbook_export
+from .addressing import (
+    MAX_COLUMN,
+    MAX_ROW,
+    CellRange,
+    clip_to_used_range,
+    parse_cell,
+    parse_column,
+    parse_range,
+    read_cell_value,
+)
+from .config import SERVER_CONFIG, configure, default_profile_dir
+from .formulas import FormulaTemplate
+from .header_index import HeaderEntry, HeaderIndex, worksheet_header
+from .incremental_save import remember_styles, save_incremental
+from .journal import JournalCompactor, MutationJournal
+from .lazy_workbook import load_workbook_lazily
+from .memory_governor import MemoryGovernor, estimate_workbook_bytes
+from .profiling import PROFILE_MODES, profile_call, requested_profile_mode
+from .progress import PROGRESS_CHUNK_ROWS, ProgressReporter
+from .readers import (
+    READER_ENGINES,
+    CalamineReader,
+    OpenpyxlReader,
+    WorkbookReader,
+    calamine_available,
+    has_formulas,
+)
+from .response_cache import ResponseCache
+from .results import (
+    CellFormatResult,
+    CellResult,
+    CellsWriteResult,
+    ColumnValuesResult,
+    ExportResult,
+    ExportWorkbookResult,
+    FilterResult,
+    FindResult,
+    FormulaFillResult,
+    JoinResult,
+    RangesResult,
+    RangeTransferResult,
+    RangeValuesResult,
+    RangeWriteResult,
+    RenderTemplateResult,
+    SavedWorkbookResult,
+    ServerStatsResult,
+    SheetDiffResult,
+    SheetProfileResult,
+    SheetResult,
+    SortResult,
+    ToolResult,
+    WorkbookDiffResult,
+    WorkbookInfoResult,
+    WorkbookResult,
+    output_schema,
+    tool_result,
+)
+from .watcher import WorkbookWatcher
+from .workbook_cache import WorkbookCache, file_fingerprint, normalize_path
+from .worker_pool import StickyWorkerPool
 
 # FastMCPサーバーインスタンスを作成
 mcp = FastMCP("Excel MCP Server")
 
+# 読み込み済みワークブックのキャッシュと変更ジャーナル
+workbook_cache = WorkbookCache(SERVER_CONFIG.cache_size)
+mutation_journal = MutationJournal(SERVER_CONFIG.journal_dir)
+response_cache = ResponseCache(
+    SERVER_CONFIG.response_cache_size, SERVER_CONFIG.response_cache_bytes
+)
+# 見出し名 → 列番号の対応表（シートの見出し行ごと）
+header_index = HeaderIndex()
+journal_compactor: JournalCompactor | None = None
+# メモリ予算（予算を超える場合は応答キャッシュ、見出しの対応表、ワークブックキャッシュの順に解放）
+memory_governor = MemoryGovernor(SERVER_CONFIG.memory_budget, SERVER_CONFIG.memory_wait)
+memory_governor.register(
+    "responseCache", response_cache.memory_usage, response_cache.evict_oldest
+)
+memory_governor.register(
+    "headerIndex", header_index.memory_usage, header_index.evict_oldest
+)
+memory_governor.register(
+    "workbookCache", workbook_cache.memory_usage, workbook_cache.evict_oldest
+)
+# 開いたワークブックのファイル監視（無効時はNone）
+workbook_watcher: WorkbookWatcher | None = None
+
+# ワーカープロセスで実行できる関数の一覧と、ワーカープール（無効時はNone）
+TOOL_FUNCTIONS: dict[str, Callable] = {}
+worker_pool: StickyWorkerPool | None = None
+
+
+def dispatched(
+    func: Callable | None = None,
+    *,
+    routeBy: str = "filePath",
+    flushPaths: tuple[str, ...] = (),
+):
+    """
+    ツールをワーカープロセスへ振り分け可能にするデコレーター
+
+    ワーカープール有効時は routeBy 引数（既定: filePath）のファイルパスのハッシュで
+    選んだワーカーで実行します。
+    プロファイリングが要求された呼び出しは、実行するプロセス内でプロファイラーの下で実行します。
+    flushPaths に指定した引数のファイルは、実行前に担当ワーカーで未反映の
+    ジャーナルを反映させます（別ワーカーが担当するファイルをディスクから読むため）。
+    """
+
+    def decorator(func: Callable) -> Callable:
+        TOOL_FUNCTIONS[func.__name__] = func
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # プロファイル用のディレクトリが設定されている場合のみ、計測の要否を確認する
+            mode = None
+            if SERVER_CONFIG.profile_dir:
+                mode = requested_profile_mode(SERVER_CONFIG.profile_mode)
+
+            if worker_pool is None:
+                if mode is None:
+                    return func(*args, **kwargs)
+                return profile_call(
+                    func.__name__,
+                    mode,
+                    SERVER_CONFIG.profile_dir,
+                    functools.partial(func, *args, **kwargs),
+                )
+
+            arguments = dict(signature.bind(*args, **kwargs).arguments)
+            for name in flushPaths:
+                path = arguments.get(name)
+                if path:
+                    worker_pool.call(path, "flush_journal", {"filePath": path})
+            if mode is not None:
+                # ワーカープロセス内で計測する
+                return worker_pool.call(
+                    arguments.get(routeBy),
+                    "profile_tool",
+                    {"name": func.__name__, "mode": mode, "arguments": arguments},
+                )
+            return worker_pool.call(arguments.get(routeBy), func.__name__, arguments)
+
+        return wrapper
+
+    return decorator(func) if func is not None else decorator
+
+
+def profile_tool(name: str, mode: str, arguments: dict) -> Any:
+    """ワーカープロセス内で登録済みのツールをプロファイラーの下で実行"""
+    return profile_call(
+        name,
+        mode,
+        SERVER_CONFIG.profile_dir,
+        functools.partial(TOOL_FUNCTIONS[name], **arguments),
+    )
+
+
+TOOL_FUNCTIONS["profile_tool"] = profile_tool
+
+
+# 応答のキャッシュキーに含めない引数（結果ではなく実行のしかただけを変える）
+UNCACHED_ARGUMENTS = frozenset({"timeoutSeconds"})
+
+
+def memoized(func: Callable) -> Callable:
+    """
+    読み取りツールの応答をキャッシュするデコレーター
+
+    同じ引数での呼び出しは、ファイルが変更されていなければ openpyxl に触れずに
+    前回の応答を返します。キャッシュはワークブックを担当するプロセス内に保持されます。
+    結果に影響しない実行時の引数（UNCACHED_ARGUMENTS）はキャッシュキーに含めません。
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        filePath = bound.arguments["filePath"]
+        arguments = {
+            name: value
+            for name, value in bound.arguments.items()
+            if name not in UNCACHED_ARGUMENTS
+        }
+        key = response_cache.make_key(func.__name__, filePath, arguments)
+
+        # 計算中に同じファイルへの変更が割り込まないよう、ファイルのロックを保持する
+        with workbook_cache.path_lock(filePath):
+            response = response_cache.get(key)
+            if response is None:
+                fingerprint = file_fingerprint(filePath)
+                response = func(*args, **kwargs)
+                response_cache.put(key, response, fingerprint)
+            return response
+
+    return wrapper
+
 
 def validate_file_path(filePath: str) -> None:
     """ファイルパスの妥当性を検証"""
@@ -36,18 +251,12 @@ def validate_file_path(filePath: str) -> None:
 
 def validate_cell_address(cell: str) -> None:
     """セルアドレスの妥当性を検証"""
-    pattern = r"^[A-Z]+[1-9]\d*$"
-    if not re.match(pattern, cell):
-        raise ValueError(f"無効なセル位置: '{cell}'。正しい形式: A1, B2, AA10など")
+    parse_cell(cell)
 
 
 def validate_range_address(rangeAddr: str) -> None:
-    """範囲アドレスの妥当性を検証"""
-    pattern = r"^[A-Z]+[1-9]\d*:[A-Z]+[1-9]\d*$"
-    if not re.match(pattern, rangeAddr):
-        raise ValueError(
-            f"無効な範囲指定: '{rangeAddr}'。正しい形式: A1:C3, B2:D10など"
-        )
+    """範囲アドレスの妥当性を検証（A1:C3, B:B, 2:10, A2:D形式）"""
+    parse_range(rangeAddr)
 
 
 def get_sheet_names(workbook: Workbook) -> str:
@@ -56,12 +265,851 @@ def get_sheet_names(workbook: Workbook) -> str:
 
 
 def load_workbook(filePath: str) -> Workbook:
-    """ワークブックを読み込む"""
+    """
+    ワークブックを読み込む
+
+    ファイルが変更されていなければキャッシュ済みのワークブックを返します。
+    未反映のジャーナルがある場合は読み込み後に再適用します。
+    メモリ予算が設定されている場合は、読み込む前に使用量を見積もって予約します。
+    lazy_sheets が有効な場合、各ワークシートは初めてアクセスされた時点で読み込まれます。
+    """
+    validate_file_path(filePath)
+
+    workbook = workbook_cache.get(filePath)
+    if workbook is None:
+        fingerprint = file_fingerprint(filePath)
+        estimate = 0
+        if memory_governor.enabled:
+            estimate = estimate_workbook_bytes(
+                filePath, include_sheets=not SERVER_CONFIG.lazy_sheets
+            )
+        with memory_governor.reserve(filePath, estimate):
+            if SERVER_CONFIG.lazy_sheets:
+                workbook = load_workbook_lazily(filePath)
+            else:
+                workbook = openpyxl.load_workbook(filePath)
+            remember_styles(workbook)
+            for record in mutation_journal.records(filePath):
+                apply_journal_record(workbook, record)
+            workbook_cache.put(filePath, workbook, fingerprint)
+        watch_file(filePath)
+
+    return workbook
+
+
+def watch_file(filePath: str) -> None:
+    """ファイル監視が有効ならファイルを監視対象に追加"""
+    if workbook_watcher is not None:
+        workbook_watcher.watch(filePath)
+
+
+def handle_file_change(filePath: str) -> None:
+    """
+    監視中のファイルの変更を反映
+
+    自身の保存による通知はフィンガープリントが一致するため無視されます。
+    prewarm が有効な場合、キャッシュ済みだったファイルはその場で再読み込みします。
+    """
+    with workbook_cache.path_lock(filePath):
+        was_cached = workbook_cache.discard_stale(filePath)
+        response_cache.discard_stale(filePath)
+        if was_cached and SERVER_CONFIG.prewarm and os.path.exists(filePath):
+            load_workbook(filePath)
+
+
+@contextmanager
+def open_workbook(filePath: str) -> Iterator[Workbook]:
+    """読み取り用にワークブックを開く（同じファイルへの変更とは排他）"""
+    validate_file_path(filePath)
+    with workbook_cache.path_lock(filePath):
+        yield load_workbook(filePath)
+
+
+def use_fast_reader(filePath: str) -> bool:
+    """ファイルを openpyxl を使わずに直接読み取れるか（読み取りエンジンの選択）"""
+    engine = SERVER_CONFIG.reader_engine
+    if engine == "openpyxl" or not calamine_available():
+        return False
+    # キャッシュ済みのワークブックや未反映のジャーナルがある場合はメモリ上の状態が正
+    if workbook_cache.get(filePath) is not None:
+        return False
+    if os.path.exists(mutation_journal.journal_path(filePath)):
+        return False
+    if engine == "auto" and os.path.getsize(filePath) < SERVER_CONFIG.reader_auto_bytes:
+        return False
+    # calamine は数式を読み取れないため、数式を含むファイルは openpyxl と結果が異なる
+    return not has_formulas(filePath)
+
+
+@contextmanager
+def open_reader(filePath: str) -> Iterator[WorkbookReader]:
+    """読み取り用のリーダーを開く（設定とファイルサイズに応じてエンジンを選択）"""
+    validate_file_path(filePath)
+    with workbook_cache.path_lock(filePath):
+        if use_fast_reader(filePath):
+            watch_file(filePath)
+            with CalamineReader(filePath) as reader:
+                yield reader
+        else:
+            yield OpenpyxlReader(load_workbook(filePath))
+
+
+def require_sheet(reader: WorkbookReader, sheetName: str) -> None:
+    """シートが存在しない場合は利用可能なシート名を含むエラーを送出"""
+    if sheetName not in reader.sheet_names:
+        available_sheets = ", ".join(reader.sheet_names)
+        raise ValueError(
+            f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+        )
+
+
+def header_entry(
+    filePath: str,
+    sheetName: str,
+    headerRow: int,
+    read_header: Callable[[], list[Any]],
+) -> HeaderEntry:
+    """見出し行の対応表（キャッシュにない場合は read_header() で見出し行を読み取って作成）"""
+    entry = header_index.get(filePath, sheetName, headerRow)
+    if entry is None:
+        fingerprint = file_fingerprint(filePath)
+        entry = header_index.put(
+            filePath, sheetName, headerRow, read_header(), fingerprint
+        )
+    return entry
+
+
+def parse_row_range(rowRange: str) -> tuple[int, int]:
+    """行の範囲（例: 2:10）を (開始行, 終了行) に変換"""
+    cell_range = parse_range(rowRange)
+    if cell_range.min_col != 1 or cell_range.max_col != MAX_COLUMN:
+        raise ValueError(
+            f"無効な行の範囲: '{rowRange}'。正しい形式: 2:10（1行だけの場合は 5:5）"
+        )
+    return cell_range.min_row, cell_range.max_row
+
+
+@contextmanager
+def edit_workbook(filePath: str) -> Iterator[Workbook]:
+    """
+    変更用にワークブックを開く
+
+    処理中に例外が発生した場合は、途中まで変更されたキャッシュを破棄します。
+    """
     validate_file_path(filePath)
-    return openpyxl.load_workbook(filePath)
+    with workbook_cache.path_lock(filePath):
+        try:
+            yield load_workbook(filePath)
+        except BaseException:
+            workbook_cache.invalidate(filePath)
+            raise
+        finally:
+            response_cache.invalidate(filePath)
+
+
+def save_workbook_file(
+    workbook: Workbook, filePath: str, sheets: set[str] | None = None
+) -> None:
+    """
+    一時ファイルに保存してから置き換えることで、保存途中のファイルを残さない
+
+    変更されたシート sheets が分かっていて、ディスク上のファイルが読み込み時から
+    変わっていない場合は、それらのシートのXMLだけを書き直す部分保存を行います。
+    """
+    temp_path = f"{filePath}.{os.getpid()}.tmp"
+    try:
+        if not (
+            sheets is not None
+            and SERVER_CONFIG.incremental_save
+            and workbook_cache.loaded_fingerprint(filePath, workbook)
+            == file_fingerprint(filePath)
+            and save_incremental(workbook, filePath, temp_path, sheets)
+        ):
+            workbook.save(temp_path)
+            remember_styles(workbook)
+        os.replace(temp_path, filePath)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def commit_workbook(
+    filePath: str,
+    workbook: Workbook,
+    records: list[dict] | None = None,
+    sheets: list[str] | None = None,
+) -> None:
+    """
+    ワークブックへの変更を永続化
+
+    ジャーナルモードで変更レコードが渡された場合はジャーナルへの追記だけを行い、
+    それ以外はxlsxを保存して未反映のジャーナルを破棄します。変更レコードか
+    変更したシート sheets が渡された場合は、それらのシートだけを書き直す部分保存を試み、
+    どちらもない場合（シートの追加など構成の変更）はxlsx全体を保存します。
+    """
+    response_cache.invalidate(filePath)
+    before = file_fingerprint(filePath)
+
+    if records is not None and SERVER_CONFIG.durability == "journal":
+        mutation_journal.append(filePath, records)
+        header_index.update(filePath, workbook, before, records, sheets)
+        if (
+            journal_compactor is not None
+            and mutation_journal.pending_count(filePath)
+            >= SERVER_CONFIG.compact_threshold
+        ):
+            journal_compactor.notify()
+        return
+
+    dirty_sheets = None
+    if records is not None or sheets is not None:
+        dirty_sheets = {record["sheet"] for record in records or []}
+        dirty_sheets.update(sheets or [])
+        dirty_sheets.update(
+            record["sheet"] for record in mutation_journal.records(filePath)
+        )
+
+    save_workbook_file(workbook, filePath, dirty_sheets)
+    mutation_journal.discard(filePath)
+    workbook_cache.put(filePath, workbook, file_fingerprint(filePath))
+    header_index.update(filePath, workbook, before, records, sheets)
+
+
+def compact_workbook(filePath: str) -> int:
+    """未反映のジャーナルをxlsxに反映し、反映したレコード数を返す"""
+    with edit_workbook(filePath) as workbook:
+        pending = len(mutation_journal.records(filePath))
+        if pending:
+            commit_workbook(filePath, workbook, sheets=[])
+        return pending
+
+
+def flush_journal(filePath: str) -> None:
+    """ディスク上のxlsxを直接読む処理の前に、未反映のジャーナルを反映"""
+    if os.path.exists(mutation_journal.journal_path(filePath)):
+        compact_workbook(filePath)
+
+
+def compact_pending_journals() -> None:
+    """このプロセスで保留中のジャーナルをすべてxlsxへ反映"""
+    for filePath in mutation_journal.pending_files():
+        try:
+            compact_workbook(filePath)
+        except Exception as e:
+            print(f"ジャーナルの保存に失敗しました: {filePath}: {e}", file=sys.stderr)
+
+
+TOOL_FUNCTIONS["flush_journal"] = flush_journal
+TOOL_FUNCTIONS["compact_pending_journals"] = compact_pending_journals
+
+
+def apply_journal_record(workbook: Workbook, record: dict) -> None:
+    """ジャーナルの変更レコードをワークブックに適用"""
+    worksheet = workbook[record["sheet"]]
+    op = record["op"]
+
+    if op == "set_cell":
+        worksheet[record["cell"]] = record["value"]
+    elif op == "set_range":
+        write_range_values(worksheet, record["startCell"], record["values"])
+    elif op == "format_cell":
+        apply_cell_format(worksheet[record["cell"]], record["formatSpec"])
+    elif op == "fill_formula":
+        anchor_row, anchor_col = parse_cell(record["anchorCell"])
+        cell_range = parse_range(record["range"])
+        fill_formula_rows(
+            worksheet,
+            FormulaTemplate(record["formula"]),
+            cell_range,
+            anchor_row,
+            anchor_col,
+            range(cell_range.min_row, cell_range.max_row + 1),
+        )
+    else:
+        raise ValueError(f"不明なジャーナルレコード: {op}")
+
+
+def recover_journals() -> None:
+    """前回の実行で残ったジャーナルをxlsxへ反映（起動時の復旧処理）"""
+    for filePath in mutation_journal.pending_paths():
+        try:
+            applied = compact_workbook(filePath)
+            print(
+                f"ジャーナルを復旧しました: {filePath}（{applied}件）", file=sys.stderr
+            )
+        except Exception as e:
+            print(f"ジャーナルの復旧に失敗しました: {filePath}: {e}", file=sys.stderr)
+
+
+def write_range_values(
+    worksheet: Worksheet, startCell: str, values: Iterable[list[Any]]
+) -> None:
+    """開始セルから右下方向に2次元配列のデータを書き込む"""
+    start_row, start_col = parse_cell(startCell)
+
+    for i, row_data in enumerate(values):
+        for j, cell_value in enumerate(row_data):
+            worksheet.cell(row=start_row + i, column=start_col + j, value=cell_value)
+
+
+def fill_formula_rows(
+    worksheet: Worksheet,
+    template: FormulaTemplate,
+    cell_range: CellRange,
+    anchor_row: int,
+    anchor_col: int,
+    rows: Iterable[int],
+) -> None:
+    """範囲内の指定された行の各セルに、アンカーからの位置に合わせて変換した数式を書き込む"""
+    columns = range(cell_range.min_col, cell_range.max_col + 1)
+    for row in rows:
+        for column in columns:
+            worksheet.cell(
+                row=row,
+                column=column,
+                value=template.translate(row - anchor_row, column - anchor_col),
+            )
+
+
+def apply_cell_format(target_cell, formatSpec: dict) -> None:
+    """セルに書式（フォント、塗りつぶし、罫線）を適用"""
+    # フォント設定
+    if "font" in formatSpec:
+        font_spec = formatSpec["font"]
+        font_kwargs = {}
+        if "bold" in font_spec:
+            font_kwargs["bold"] = font_spec["bold"]
+        if "italic" in font_spec:
+            font_kwargs["italic"] = font_spec["italic"]
+        if "size" in font_spec:
+            font_kwargs["size"] = font_spec["size"]
+        if "color" in font_spec:
+            font_kwargs["color"] = font_spec["color"]
+
+        if font_kwargs:
+            target_cell.font = Font(**font_kwargs)
+
+    # 塗りつぶし設定
+    if "fill" in formatSpec:
+        fill_spec = formatSpec["fill"]
+        if fill_spec.get("type") == "pattern":
+            target_cell.fill = PatternFill(
+                fill_type=fill_spec.get("pattern", "solid"),
+                fgColor=fill_spec.get("fgColor", "FFFFFF"),
+            )
+
+    # 罫線設定
+    if "border" in formatSpec:
+        border_spec = formatSpec["border"]
+        border_kwargs = {}
+        for side_name in ["top", "left", "bottom", "right"]:
+            if side_name in border_spec:
+                side_config = border_spec[side_name]
+                border_kwargs[side_name] = Side(
+                    style=side_config.get("style", "thin"),
+                    color=side_config.get("color", "000000"),
+                )
+
+        if border_kwargs:
+            target_cell.border = Border(**border_kwargs)
+
+
+def resolve_range_column(column: str, min_col: int, max_col: int) -> int:
+    """列文字（例: B）を範囲内の相対列インデックス（0始まり）に変換"""
+    col_idx = parse_column(column)
+    if not min_col <= col_idx <= max_col:
+        raise ValueError(f"列 '{column}' は指定された範囲の外にあります")
+
+    return col_idx - min_col
+
+
+def range_column_values(
+    block: list[list[tuple[Any, StyleArray]]], col_offset: int
+) -> list[Any]:
+    """取得済みの行データから1列分の値を取り出す（使用範囲外の列は空白）"""
+    return [row[col_offset][0] if col_offset < len(row) else None for row in block]
+
+
+def excel_sort_ranks(values: list[Any], descending: bool = False) -> np.ndarray:
+    """
+    Excelの並べ替え順序に従ったランク配列を作成
+
+    昇順では 数値（日付を含む） < 文字列（大文字小文字を区別しない） < 真偽値 の順になり、
+    空白セルは昇順・降順のどちらでも常に末尾に配置されます。
+    """
+    n = len(values)
+    kinds = np.full(n, 3, dtype=np.int8)
+    numbers = np.zeros(n, dtype=np.float64)
+    texts = np.empty(n, dtype=object)
+
+    for i, value in enumerate(values):
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            kinds[i] = 2
+            numbers[i] = float(value)
+        elif isinstance(value, (int, float)):
+            kinds[i] = 0
+            numbers[i] = float(value)
+        elif isinstance(value, (datetime, date, time)):
+            kinds[i] = 0
+            numbers[i] = float(to_excel(value))
+        else:
+            kinds[i] = 1
+            texts[i] = str(value).casefold()
+
+    ranks = np.zeros(n, dtype=np.int64)
+    offset = 0
+    for kind in (0, 1, 2):
+        mask = kinds == kind
+        if not mask.any():
+            continue
+        keys = texts[mask].astype(str) if kind == 1 else numbers[mask]
+        uniques, inverse = np.unique(keys, return_inverse=True)
+        ranks[mask] = inverse + offset
+        offset += len(uniques)
+
+    if descending:
+        ranks = offset - 1 - ranks
+
+    # 空白セルは常に末尾
+    ranks[kinds == 3] = offset
+    return ranks
+
+
+def read_range_block(
+    worksheet: Worksheet, min_row: int, min_col: int, max_row: int, max_col: int
+) -> list[list[tuple[Any, StyleArray]]]:
+    """範囲内の各セルの値と書式を行単位で取得"""
+    return [
+        [(cell.value, copy(cell._style)) for cell in row]
+        for row in worksheet.iter_rows(
+            min_row=min_row, max_row=max_row, min_col=min_col, max_col=max_col
+        )
+    ]
+
+
+def write_range_rows(
+    worksheet: Worksheet,
+    block: list[list[tuple[Any, StyleArray]]],
+    source_rows: list[int],
+    min_row: int,
+    min_col: int,
+) -> None:
+    """
+    取得済みの行データを並び順に従って書き戻す
+
+    source_rows[i] は書き込み先の i 行目に配置する元の行インデックスです。
+    行の移動に合わせて数式の相対参照を変換し、書式も行と一緒に移動します。
+    """
+    for target_idx, source_idx in enumerate(source_rows):
+        if target_idx == source_idx:
+            continue
+
+        for col_offset, (value, style) in enumerate(block[source_idx]):
+            column = min_col + col_offset
+            cell = worksheet.cell(row=min_row + target_idx, column=column)
+
+            if isinstance(value, str) and value.startswith("="):
+                origin = worksheet.cell(row=min_row + source_idx, column=column)
+                value = Translator(value, origin=origin.coordinate).translate_formula(
+                    cell.coordinate
+                )
+
+            cell.value = value
+            cell._style = copy(style)
+
+
+def clear_range_rows(
+    worksheet: Worksheet, first_row: int, last_row: int, min_col: int, max_col: int
+) -> None:
+    """
+    指定された行範囲のセルの値と書式をクリア
+
+    セルはシートから削除し（コメント・ハイパーリンクを持つセルは値と書式だけをクリア）、
+    クリアした行が最終行だった場合は append_rows が使う最終行を求め直します。
+    これにより、メモリ上のシートと保存後に読み込み直したシートの最終行が一致します。
+    """
+    cells = worksheet._cells
+    for row in range(first_row, last_row + 1):
+        for column in range(min_col, max_col + 1):
+            cell = cells.get((row, column))
+            if cell is None:
+                continue
+            if cell.comment is not None or cell.hyperlink is not None:
+                cell.value = None
+                cell._style = StyleArray()
+            else:
+                del cells[(row, column)]
+    if last_row >= worksheet._current_row:
+        worksheet._current_row = max((row for row, _ in cells), default=0)
+
+
+def capture_styles(
+    source: Workbook, block: list[list[tuple[Any, StyleArray]]]
+) -> dict[tuple, tuple]:
+    """
+    範囲の書式が参照するフォント・罫線などを元のワークブックから複製して取得
+
+    別のワークブックへ貼り付ける場合に、元のワークブックのロックを保持している間に
+    呼び出します（書式 → (フォント, 塗りつぶし, 罫線, 配置, 保護, 表示形式, スタイル名)）。
+    """
+    styles: dict[tuple, tuple] = {}
+    for row in block:
+        for _, style in row:
+            key = tuple(style)
+            if key in styles:
+                continue
+            number_format = None
+            if style.numFmtId >= BUILTIN_FORMATS_MAX_SIZE:
+                number_format = source._number_formats[
+                    style.numFmtId - BUILTIN_FORMATS_MAX_SIZE
+                ]
+            name = None
+            if style.xfId < len(source._named_styles):
+                name = source._named_styles[style.xfId].name
+            styles[key] = (
+                copy(source._fonts[style.fontId]),
+                copy(source._fills[style.fillId]),
+                copy(source._borders[style.borderId]),
+                copy(source._alignments[style.alignmentId]),
+                copy(source._protections[style.protectionId]),
+                number_format,
+                name,
+            )
+    return styles
+
+
+def style_translator(
+    styles: dict[tuple, tuple], target: Workbook
+) -> Callable[[StyleArray], StyleArray]:
+    """
+    capture_styles() で取得した書式を書き込み先のワークブックで使える書式に変換する関数を作成
+
+    フォント・罫線などを書き込み先の書式テーブルに登録して番号を付け替えます
+    （同じ書式は1回だけ変換します）。同じワークブック内では書式テーブルを共有するため、
+    この関数を使わずにそのままコピーします。
+    """
+    translated: dict[tuple, StyleArray] = {}
+    target_style_names = target._named_styles.names
+
+    def translate(style: StyleArray) -> StyleArray:
+        key = tuple(style)
+        result = translated.get(key)
+        if result is None:
+            font, fill, border, alignment, protection, number_format, name = styles[key]
+            result = StyleArray()
+            result.fontId = target._fonts.add(font)
+            result.fillId = target._fills.add(fill)
+            result.borderId = target._borders.add(border)
+            result.alignmentId = target._alignments.add(alignment)
+            result.protectionId = target._protections.add(protection)
+            result.numFmtId = style.numFmtId
+            if number_format is not None:
+                result.numFmtId = (
+                    target._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+                )
+            # セルのスタイル名は書き込み先に同じ名前がある場合だけ引き継ぐ
+            if name in target_style_names:
+                result.xfId = target_style_names.index(name)
+            result.quotePrefix = style.quotePrefix
+            result.pivotButton = style.pivotButton
+            translated[key] = result
+        return copy(result)
+
+    return translate
+
+
+def merged_ranges_within(
+    worksheet: Worksheet, cell_range: CellRange
+) -> list[CellRange]:
+    """範囲内に完全に含まれる結合セルの範囲"""
+    merged_ranges = (
+        CellRange(merged.min_col, merged.min_row, merged.max_col, merged.max_row)
+        for merged in worksheet.merged_cells.ranges
+    )
+    return [merged for merged in merged_ranges if cell_range.contains(merged)]
+
+
+def unmerge_overlapping(worksheet: Worksheet, cell_range: CellRange) -> None:
+    """範囲と重なる結合セルを解除（範囲の外にはみ出す結合も解除する）"""
+    for merged in list(worksheet.merged_cells.ranges):
+        if cell_range.overlaps(merged):
+            worksheet.unmerge_cells(merged.coord)
+
+
+def paste_range_block(
+    worksheet: Worksheet,
+    block: list[list[tuple[Any, StyleArray]]],
+    source_range: CellRange,
+    target_row: int,
+    target_col: int,
+    translate_style: Callable[[StyleArray], StyleArray] | None,
+    merged: list[CellRange],
+) -> CellRange:
+    """
+    取得済みのセルの値と書式を貼り付け先の左上セルから書き込み、書き込んだ範囲を返す
+
+    数式の相対参照は貼り付け先の位置に合わせて変換します。translate_style が None の
+    場合は値だけを書き込み、書式と結合セルはコピーしません。
+    """
+    row_shift = target_row - source_range.min_row
+    col_shift = target_col - source_range.min_col
+    target_range = source_range.shifted(row_shift, col_shift)
+    if target_range.max_row > MAX_ROW or target_range.max_col > MAX_COLUMN:
+        raise ValueError("貼り付け先の範囲がシートの範囲外です")
+
+    unmerge_overlapping(worksheet, target_range)
+    for row_offset, row in enumerate(block):
+        for col_offset, (value, style) in enumerate(row):
+            cell = worksheet.cell(
+                row=target_range.min_row + row_offset,
+                column=target_range.min_col + col_offset,
+            )
+
+            if isinstance(value, str) and value.startswith("="):
+                origin = get_column_letter(source_range.min_col + col_offset) + str(
+                    source_range.min_row + row_offset
+                )
+                value = Translator(value, origin=origin).translate_formula(
+                    cell.coordinate
+                )
+
+            cell.value = value
+            if translate_style is not None:
+                cell._style = translate_style(style)
+
+    if translate_style is not None:
+        for merged_range in merged:
+            worksheet.merge_cells(merged_range.shifted(row_shift, col_shift).coord)
+
+    return target_range
+
+
+def transfer_range(
+    filePath: str,
+    sheetName: str,
+    rangeAddr: str,
+    targetCell: str,
+    targetSheetName: str | None,
+    targetFilePath: str | None,
+    includeFormats: bool,
+    move: bool,
+) -> dict:
+    """
+    範囲の値・書式・数式・結合セルを貼り付け先へコピー（move の場合は移動）
+
+    ワークブックはそれぞれ1回だけ読み込み、変更したワークブックごとに1回だけ保存します。
+    同じシート内で範囲が重なる場合も、元の範囲を読み取ってから書き込むため正しく動作します。
+    """
+    cell_range = parse_range(rangeAddr)
+    target_row, target_col = parse_cell(targetCell)
+    targetSheetName = targetSheetName or sheetName
+    targetFilePath = targetFilePath or filePath
+    same_file = normalize_path(targetFilePath) == normalize_path(filePath)
+
+    def read_source(workbook: Workbook) -> tuple[CellRange | None, list, list]:
+        if sheetName not in workbook.sheetnames:
+            raise ValueError(
+                f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: "
+                f"{get_sheet_names(workbook)}"
+            )
+        worksheet = workbook[sheetName]
+        used_range = clip_to_used_range(cell_range, worksheet)
+        if used_range is None:
+            return None, [], []
+        block = read_range_block(
+            worksheet,
+            used_range.min_row,
+            used_range.min_col,
+            used_range.max_row,
+            used_range.max_col,
+        )
+        return used_range, block, merged_ranges_within(worksheet, used_range)
+
+    def clear_source(workbook: Workbook, used_range: CellRange, merged: list) -> None:
+        worksheet = workbook[sheetName]
+        for merged_range in merged:
+            worksheet.unmerge_cells(merged_range.coord)
+        clear_range_rows(
+            worksheet,
+            used_range.min_row,
+            used_range.max_row,
+            used_range.min_col,
+            used_range.max_col,
+        )
+
+    def target_sheet(workbook: Workbook) -> Worksheet:
+        if targetSheetName not in workbook.sheetnames:
+            raise ValueError(
+                f"貼り付け先のワークシート '{targetSheetName}' が見つかりません。"
+                f"利用可能なシート: {get_sheet_names(workbook)}"
+            )
+        return workbook[targetSheetName]
+
+    target_range = None
+    if same_file:
+        with edit_workbook(filePath) as workbook:
+            worksheet = target_sheet(workbook)
+            used_range, block, merged = read_source(workbook)
+            if used_range is not None:
+                if move:
+                    clear_source(workbook, used_range, merged)
+                target_range = paste_range_block(
+                    worksheet,
+                    block,
+                    used_range,
+                    target_row,
+                    target_col,
+                    copy if includeFormats else None,
+                    merged,
+                )
+                changed = [targetSheetName, sheetName] if move else [targetSheetName]
+                commit_workbook(filePath, workbook, sheets=changed)
+    else:
+        # 元のファイルの値と書式を複製し終えてから貼り付け先を開く
+        # （ファイルのロックを同時に保持せず、解放後は元のワークブックに触れない）
+        with open_workbook(filePath) as source_workbook:
+            used_range, block, merged = read_source(source_workbook)
+            styles = capture_styles(source_workbook, block) if includeFormats else {}
+        if used_range is not None:
+            with edit_workbook(targetFilePath) as workbook:
+                target_range = paste_range_block(
+                    target_sheet(workbook),
+                    block,
+                    used_range,
+                    target_row,
+                    target_col,
+                    style_translator(styles, workbook) if includeFormats else None,
+                    merged,
+                )
+                commit_workbook(targetFilePath, workbook, sheets=[targetSheetName])
+            if move:
+                with edit_workbook(filePath) as workbook:
+                    clear_source(workbook, used_range, merged)
+                    commit_workbook(filePath, workbook, sheets=[sheetName])
+
+    return {
+        "sheetName": sheetName,
+        "range": rangeAddr,
+        "targetFilePath": targetFilePath,
+        "targetSheetName": targetSheetName,
+        "targetRange": target_range.coord if target_range is not None else None,
+        "rows": len(block),
+        "columns": target_range.columns if target_range is not None else 0,
+    }
+
+
+def evaluate_condition(values: list[Any], condition: dict) -> np.ndarray:
+    """フィルター条件を列の値全体に対してまとめて評価し、真偽値配列を返す"""
+    operator = condition.get("operator", "==")
+    target = condition.get("value")
+    series = pd.Series(values, dtype=object)
+
+    if operator == "isBlank":
+        return series.isna().to_numpy()
+    if operator == "notBlank":
+        return series.notna().to_numpy()
+
+    if operator in ("contains", "notContains", "startsWith", "endsWith"):
+        if target is None:
+            raise ValueError(f"演算子 '{operator}' には value の指定が必要です")
+        text = series.map(lambda v: "" if v is None else str(v))
+        if operator == "startsWith":
+            return text.str.startswith(str(target)).to_numpy()
+        if operator == "endsWith":
+            return text.str.endswith(str(target)).to_numpy()
+        contains = text.str.contains(str(target), regex=False).to_numpy()
+        return ~contains if operator == "notContains" else contains
+
+    if operator in ("==", "!="):
+        equal = (series == target).to_numpy(dtype=bool)
+        return ~equal if operator == "!=" else equal
+
+    if operator in (">", ">=", "<", "<="):
+        if isinstance(target, (int, float)) and not isinstance(target, bool):
+            numeric = pd.to_numeric(
+                series.map(
+                    lambda v: (
+                        v
+                        if isinstance(v, (int, float)) and not isinstance(v, bool)
+                        else None
+                    )
+                ),
+                errors="coerce",
+            )
+            left, right = numeric, float(target)
+        elif isinstance(target, str):
+            left = series.map(lambda v: v if isinstance(v, str) else None)
+            right = target
+        else:
+            raise ValueError(
+                f"演算子 '{operator}' には数値または文字列の value が必要です"
+            )
+
+        valid = left.notna().to_numpy()
+        compared = np.zeros(len(values), dtype=bool)
+        left_valid = left[valid]
+        if operator == ">":
+            compared[valid] = (left_valid > right).to_numpy(dtype=bool)
+        elif operator == ">=":
+            compared[valid] = (left_valid >= right).to_numpy(dtype=bool)
+        elif operator == "<":
+            compared[valid] = (left_valid < right).to_numpy(dtype=bool)
+        else:
+            compared[valid] = (left_valid <= right).to_numpy(dtype=bool)
+        return compared
+
+    raise ValueError(
+        f"無効な演算子: '{operator}'。使用可能: ==, !=, >, >=, <, <=, contains, notContains, startsWith, endsWith, isBlank, notBlank"
+    )
+
+
+def normalize_lookup_key(value: Any, matchCase: bool) -> Any:
+    """
+    照合用のキー（VLOOKUPと同じく、既定では文字列の大文字小文字を区別しない）
+
+    Python では True == 1 == 1.0 となるため、真偽値は数値と一致しないよう
+    (True, 値) の組にします。
+    """
+    if isinstance(value, str) and not matchCase:
+        return value.casefold()
+    if type(value) is bool:
+        return (True, value)
+    return value
+
 
+def match_lookup_keys(
+    lookup_keys: list[Any], target_keys: list[Any], matchCase: bool = False
+) -> np.ndarray:
+    """
+    照合先のキー列にハッシュインデックスを作成し、対象のキーをまとめて照合する
 
-@mcp.tool()
+    対象の各行について一致した照合先の行インデックス（一致しない場合は -1）を返します。
+    照合先のキーが重複する場合は最初の行を使い、空白のキーは一致しません。
+    """
+    lookup = pd.Index(
+        [normalize_lookup_key(value, matchCase) for value in lookup_keys],
+        dtype=object,
+        tupleize_cols=False,
+    )
+    first = ~lookup.duplicated(keep="first") & lookup.notna()
+    unique_rows = np.flatnonzero(first)
+
+    targets = pd.Index(
+        [normalize_lookup_key(value, matchCase) for value in target_keys],
+        dtype=object,
+        tupleize_cols=False,
+    )
+    positions = lookup[first].get_indexer(targets)
+    found = (positions >= 0) & ~targets.isna()
+    matched = np.full(len(targets), -1, dtype=np.int64)
+    matched[found] = unique_rows[positions[found]]
+    return matched
+
+
+@mcp.tool(output_schema=output_schema(WorkbookResult))
+@dispatched
 def create_workbook(
     filePath: Annotated[
         str,
@@ -69,7 +1117,7 @@ def create_workbook(
             description="作成するExcelファイルの絶対パス。例: C:/Users/Username/Documents/report.xlsx。ファイル拡張子は.xlsxである必要があります"
         ),
     ],
-) -> str:
+) -> ToolResult:
     """
     新しいExcelワークブックを作成します
 
@@ -79,15 +1127,24 @@ def create_workbook(
     try:
         validate_file_path(filePath)
 
-        workbook = Workbook()
-        workbook.save(filePath)
+        with workbook_cache.path_lock(filePath):
+            workbook = Workbook()
+            workbook.save(filePath)
+            mutation_journal.discard(filePath)
+            workbook_cache.invalidate(filePath)
+            response_cache.invalidate(filePath)
+            header_index.invalidate(filePath)
 
-        return f"Excelワークブック '{filePath}' を作成しました。"
+        return tool_result(
+            f"Excelワークブック '{filePath}' を作成しました。", {"filePath": filePath}
+        )
     except Exception as e:
         raise Exception(f"ワークブック作成エラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(WorkbookInfoResult))
+@dispatched
+@memoized
 def get_workbook_info(
     filePath: Annotated[
         str,
@@ -95,7 +1152,7 @@ def get_workbook_info(
             description="情報を取得するExcelファイルの絶対パス。既存のファイルである必要があります"
         ),
     ],
-) -> str:
+) -> ToolResult:
     """
     Excelワークブックの詳細情報を取得します（シート一覧、メタデータ等）
 
@@ -108,25 +1165,30 @@ def get_workbook_info(
         if not os.path.exists(filePath):
             raise FileNotFoundError(f"ファイルが見つかりません: {filePath}")
 
-        workbook = openpyxl.load_workbook(filePath)
+        with open_reader(filePath) as reader:
+            sheetnames = reader.sheet_names
 
         # ファイル情報を取得
         file_stat = os.stat(filePath)
 
         info = {
-            "ファイルパス": filePath,
-            "ワークシート数": len(workbook.sheetnames),
-            "ワークシート名一覧": workbook.sheetnames,
-            "ファイルサイズ": f"{file_stat.st_size} bytes",
-            "最終更新日時": pd.Timestamp.fromtimestamp(file_stat.st_mtime).isoformat(),
+            "filePath": filePath,
+            "sheetCount": len(sheetnames),
+            "sheetNames": sheetnames,
+            "fileSize": file_stat.st_size,
+            "modifiedAt": pd.Timestamp.fromtimestamp(file_stat.st_mtime).isoformat(),
         }
 
-        return f"ワークブック情報:\n{json.dumps(info, ensure_ascii=False, indent=2)}"
+        return tool_result(
+            f"ワークブック '{filePath}' のワークシート（{len(sheetnames)}個）: {', '.join(sheetnames)}",
+            info,
+        )
     except Exception as e:
         raise Exception(f"ワークブック情報取得エラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(SheetResult))
+@dispatched
 def add_worksheet(
     filePath: Annotated[
         str,
@@ -140,7 +1202,7 @@ def add_worksheet(
             description="作成するワークシート名。英数字、日本語、アンダースコア、ハイフンが使用可能です"
         ),
     ],
-) -> str:
+) -> ToolResult:
     """
     既存のワークブックにワークシートを追加します
 
@@ -152,20 +1214,22 @@ def add_worksheet(
         if not sheetName or not sheetName.strip():
             raise ValueError("ワークシート名が空です")
 
-        workbook = load_workbook(filePath)
+        with edit_workbook(filePath) as workbook:
+            if sheetName in workbook.sheetnames:
+                raise ValueError(f"ワークシート '{sheetName}' は既に存在します")
 
-        if sheetName in workbook.sheetnames:
-            raise ValueError(f"ワークシート '{sheetName}' は既に存在します")
+            workbook.create_sheet(sheetName)
+            commit_workbook(filePath, workbook)
 
-        workbook.create_sheet(sheetName)
-        workbook.save(filePath)
-
-        return f"ワークシート '{sheetName}' を追加しました。"
+        return tool_result(
+            f"ワークシート '{sheetName}' を追加しました。", {"sheetName": sheetName}
+        )
     except Exception as e:
         raise Exception(f"ワークシート追加エラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(CellResult))
+@dispatched
 def set_cell_value(
     filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
     sheetName: Annotated[
@@ -184,7 +1248,7 @@ def set_cell_value(
         str | int | float | bool,
         Field(description="セルに設定する値。文字列、数値、真偽値のいずれか"),
     ],
-) -> str:
+) -> ToolResult:
     """
     指定されたセルに値を設定します
 
@@ -197,31 +1261,39 @@ def set_cell_value(
     try:
         validate_cell_address(cell)
 
-        workbook = load_workbook(filePath)
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+                )
 
-        if sheetName not in workbook.sheetnames:
-            available_sheets = get_sheet_names(workbook)
-            raise ValueError(
-                f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+            worksheet = workbook[sheetName]
+            worksheet[cell] = value
+            commit_workbook(
+                filePath,
+                workbook,
+                [{"op": "set_cell", "sheet": sheetName, "cell": cell, "value": value}],
             )
 
-        worksheet = workbook[sheetName]
-        worksheet[cell] = value
-        workbook.save(filePath)
-
-        return f"セル {cell} に値 '{value}' を設定しました。"
+        return tool_result(
+            f"セル {cell} に値 '{value}' を設定しました。",
+            {"sheetName": sheetName, "cell": cell, "value": value},
+        )
     except Exception as e:
         raise Exception(f"セル値設定エラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(CellResult))
+@dispatched
+@memoized
 def get_cell_value(
     filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
     sheetName: Annotated[str, Field(description="対象のワークシート名")],
     cell: Annotated[
         str, Field(description="セル位置。A1形式で指定（例: A1, B2, AA10）")
     ],
-) -> str:
+) -> ToolResult:
     """
     指定されたセルの値を取得します
 
@@ -233,23 +1305,27 @@ def get_cell_value(
     try:
         validate_cell_address(cell)
 
-        workbook = load_workbook(filePath)
-
-        if sheetName not in workbook.sheetnames:
-            available_sheets = get_sheet_names(workbook)
-            raise ValueError(
-                f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
-            )
+        with open_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+                )
 
-        worksheet = workbook[sheetName]
-        cell_value = worksheet[cell].value
+            worksheet = workbook[sheetName]
+            row, column = parse_cell(cell)
+            cell_value = read_cell_value(worksheet, row, column)
 
-        return f"セル {cell} の値: {cell_value}"
+        return tool_result(
+            f"セル {cell} の値: {cell_value}",
+            {"sheetName": sheetName, "cell": cell, "value": cell_value},
+        )
     except Exception as e:
         raise Exception(f"セル値取得エラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(RangeWriteResult))
+@dispatched
 def set_range_values(
     filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
     sheetName: Annotated[str, Field(description="対象のワークシート名")],
@@ -265,7 +1341,13 @@ def set_range_values(
             description="2次元配列のデータ。外側の配列が行、内側の配列が列を表します。例: [['商品名', '価格'], ['商品A', 1000]]"
         ),
     ],
-) -> str:
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
     """
     指定された範囲に2次元配列のデータを設定します
 
@@ -274,6 +1356,7 @@ def set_range_values(
         sheetName: 対象のワークシート名
         startCell: データ入力を開始するセル位置（例: A1）。ここから右下方向にデータが入力されます
         values: 2次元配列のデータ。外側の配列が行、内側の配列が列を表します。例: [["商品名", "価格"], ["商品A", 1000]]
+        timeoutSeconds: 処理の制限時間（秒）。超えた場合は変更を保存せずに中断します
     """
     try:
         validate_cell_address(startCell)
@@ -288,212 +1371,741 @@ def set_range_values(
                     f"{i+1}行目が配列ではありません。2次元配列を指定してください"
                 )
 
-        workbook = load_workbook(filePath)
-
-        if sheetName not in workbook.sheetnames:
-            available_sheets = get_sheet_names(workbook)
-            raise ValueError(
-                f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
-            )
-
-        worksheet = workbook[sheetName]
-
-        # 開始セルの行・列番号を取得
-        start_cell_obj = worksheet[startCell]
-        start_row = start_cell_obj.row
-        start_col = start_cell_obj.column
-
-        # データを設定
-        for i, row_data in enumerate(values):
-            for j, cell_value in enumerate(row_data):
-                worksheet.cell(
-                    row=start_row + i, column=start_col + j, value=cell_value
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
                 )
 
-        workbook.save(filePath)
+            worksheet = workbook[sheetName]
+            progress = ProgressReporter(len(values), timeoutSeconds)
+            write_range_values(worksheet, startCell, progress.track(values, "書き込み"))
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {
+                        "op": "set_range",
+                        "sheet": sheetName,
+                        "startCell": startCell,
+                        "values": values,
+                    }
+                ],
+            )
 
         max_cols = max(len(row) for row in values) if values else 0
-        return f"範囲 {startCell} から {len(values)}行 x {max_cols}列 のデータを設定しました。"
+        return tool_result(
+            f"範囲 {startCell} から {len(values)}行 x {max_cols}列 のデータを設定しました。",
+            {
+                "sheetName": sheetName,
+                "startCell": startCell,
+                "rows": len(values),
+                "columns": max_cols,
+            },
+        )
     except Exception as e:
         raise Exception(f"範囲値設定エラー: {e}")
 
 
-@mcp.tool()
-def get_range_values(
+@mcp.tool(output_schema=output_schema(RangeWriteResult))
+@dispatched
+def append_rows(
     filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
     sheetName: Annotated[str, Field(description="対象のワークシート名")],
-    rangeAddr: Annotated[
-        str, Field(description="取得する範囲。A1:C3形式で指定（例: A1:C10, B2:D5）")
+    values: Annotated[
+        list[list[str | int | float | bool | None]],
+        Field(
+            description="追加する行の2次元配列。外側の配列が行、内側の配列が列を表します。例: [['2024-04-01', 'ログイン', 1]]"
+        ),
     ],
-) -> str:
+    startColumn: Annotated[
+        str, Field(description="各行を書き込む先頭の列（例: A）")
+    ] = "A",
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
     """
-    指定された範囲のデータを取得します
+    シートの最終行の次の行から行を追加します（ログのように下へ追記していくシート向け）
+
+    最終行は openpyxl がセルの追加のたびに更新している値を使うため、既存のセルを走査しません
+    （書式だけのセルがある行も最終行に含まれます）。ジャーナルモードでは変更の追記だけで応答します。
 
     Args:
         filePath: 対象のExcelファイルの絶対パス
         sheetName: 対象のワークシート名
-        rangeAddr: 取得する範囲。A1:C3形式で指定（例: A1:C10, B2:D5）
+        values: 追加する行の2次元配列
+        startColumn: 各行を書き込む先頭の列（例: A）
+        timeoutSeconds: 処理の制限時間（秒）。超えた場合は変更を保存せずに中断します
     """
     try:
-        validate_range_address(rangeAddr)
+        if not values:
+            raise ValueError("valuesは空でない2次元配列である必要があります")
+        for i, row in enumerate(values):
+            if not isinstance(row, list):
+                raise ValueError(
+                    f"{i+1}行目が配列ではありません。2次元配列を指定してください"
+                )
+        validate_cell_address(f"{startColumn}1")
 
-        workbook = load_workbook(filePath)
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+                )
 
-        if sheetName not in workbook.sheetnames:
-            available_sheets = get_sheet_names(workbook)
-            raise ValueError(
-                f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+            worksheet = workbook[sheetName]
+            # worksheet.max_row はすべてのセルを走査するため、追加のたびに更新される最終行を使う
+            start_row = worksheet._current_row + 1
+            if start_row + len(values) - 1 > MAX_ROW:
+                raise ValueError("追加する行がシートの最大行数を超えます")
+            startCell = f"{startColumn}{start_row}"
+
+            progress = ProgressReporter(len(values), timeoutSeconds)
+            write_range_values(worksheet, startCell, progress.track(values, "行の追加"))
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {
+                        "op": "set_range",
+                        "sheet": sheetName,
+                        "startCell": startCell,
+                        "values": values,
+                    }
+                ],
             )
 
-        worksheet = workbook[sheetName]
-
-        # 範囲を解析
-        start_cell, end_cell = rangeAddr.split(":")
-
-        # 開始・終了セルの座標を取得
-        start_cell_obj = worksheet[start_cell]
-        end_cell_obj = worksheet[end_cell]
-
-        start_row, start_col = start_cell_obj.row, start_cell_obj.column
-        end_row, end_col = end_cell_obj.row, end_cell_obj.column
-
-        # データを取得
-        values = []
-        for row in range(start_row, end_row + 1):
-            row_values = []
-            for col in range(start_col, end_col + 1):
-                cell_value = worksheet.cell(row=row, column=col).value
-                row_values.append(cell_value)
-            values.append(row_values)
-
-        return f"範囲 {rangeAddr} の値:\n{json.dumps(values, ensure_ascii=False, indent=2)}"
+        max_cols = max(len(row) for row in values)
+        return tool_result(
+            f"{startCell} から {len(values)}行 x {max_cols}列 のデータを追加しました。",
+            {
+                "sheetName": sheetName,
+                "startCell": startCell,
+                "rows": len(values),
+                "columns": max_cols,
+            },
+        )
     except Exception as e:
-        raise Exception(f"範囲値取得エラー: {e}")
+        raise Exception(f"行追加エラー: {e}")
 
 
-@mcp.tool()
-def format_cell(
-    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
-    sheetName: Annotated[str, Field(description="ワークシート名")],
-    cell: Annotated[str, Field(description="セル位置（例: A1）")],
-    formatSpec: Annotated[
-        dict,
+@mcp.tool(output_schema=output_schema(CellsWriteResult))
+@dispatched
+def set_cells(
+    filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
+    sheetName: Annotated[
+        str | None,
+        Field(description="cells で指定したセルを書き込むワークシート名"),
+    ] = None,
+    cells: Annotated[
+        dict[str, str | int | float | bool] | None,
         Field(
-            description="セルの書式設定（辞書形式）。font: フォント設定、fill: 塗りつぶし設定、border: 罫線設定"
+            description='セル位置と値の対応。例: {"A1": "商品名", "C10": 1000}。sheetName のシートに書き込みます'
         ),
-    ],
-) -> str:
+    ] = None,
+    updates: Annotated[
+        list[dict] | None,
+        Field(
+            description='複数シートにまたがる書き込みの配列。例: [{"sheet": "Sheet1", "cell": "B2", "value": 10}]'
+        ),
+    ] = None,
+) -> ToolResult:
     """
-    セルの書式（フォント、塗りつぶし、罫線）を設定します
+    離れた位置にある複数のセルへ、1回の読み込み・保存でまとめて値を設定します
+
+    すべてのセル位置とシート名を書き込み前に検証し、1つでも不正な指定があれば何も変更しません。
 
     Args:
-        filePath: Excelファイルのパス
-        sheetName: ワークシート名
-        cell: セル位置（例: A1）
-        formatSpec: セルの書式設定（辞書形式）
-            - font: フォント設定 {"bold": bool, "italic": bool, "size": int, "color": str}
-            - fill: 塗りつぶし設定 {"type": "pattern", "pattern": str, "fgColor": str}
-            - border: 罫線設定 {"top": {"style": str, "color": str}, ...}
+        filePath: 対象のExcelファイルの絶対パス
+        sheetName: cells で指定したセルを書き込むワークシート名
+        cells: セル位置と値の対応 {"A1": 値, ...}
+        updates: 複数シートへの書き込み [{"sheet": str, "cell": str, "value": 値}, ...]
     """
     try:
-        validate_cell_address(cell)
+        writes = []
+        if cells:
+            if not sheetName:
+                raise ValueError("cells を指定する場合は sheetName も指定してください")
+            writes.extend((sheetName, cell, value) for cell, value in cells.items())
+        for i, update in enumerate(updates or []):
+            if not isinstance(update, dict) or not {"sheet", "cell", "value"} <= set(
+                update
+            ):
+                raise ValueError(
+                    f"updatesの{i+1}番目には sheet, cell, value を指定してください"
+                )
+            writes.append((update["sheet"], update["cell"], update["value"]))
 
-        workbook = load_workbook(filePath)
+        if not writes:
+            raise ValueError("cells または updates に書き込むセルを指定してください")
 
-        if sheetName not in workbook.sheetnames:
-            raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+        # 書き込み前にすべてのセル位置を検証する
+        for _, cell, _ in writes:
+            validate_cell_address(cell)
 
-        worksheet = workbook[sheetName]
-        target_cell = worksheet[cell]
-
-        # フォント設定
-        if "font" in formatSpec:
-            font_spec = formatSpec["font"]
-            font_kwargs = {}
-            if "bold" in font_spec:
-                font_kwargs["bold"] = font_spec["bold"]
-            if "italic" in font_spec:
-                font_kwargs["italic"] = font_spec["italic"]
-            if "size" in font_spec:
-                font_kwargs["size"] = font_spec["size"]
-            if "color" in font_spec:
-                font_kwargs["color"] = font_spec["color"]
-
-            if font_kwargs:
-                target_cell.font = Font(**font_kwargs)
-
-        # 塗りつぶし設定
-        if "fill" in formatSpec:
-            fill_spec = formatSpec["fill"]
-            if fill_spec.get("type") == "pattern":
-                target_cell.fill = PatternFill(
-                    fill_type=fill_spec.get("pattern", "solid"),
-                    fgColor=fill_spec.get("fgColor", "FFFFFF"),
+        with edit_workbook(filePath) as workbook:
+            missing = sorted(
+                {sheet for sheet, _, _ in writes} - set(workbook.sheetnames)
+            )
+            if missing:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート {', '.join(repr(name) for name in missing)} が見つかりません。利用可能なシート: {available_sheets}"
                 )
 
-        # 罫線設定
-        if "border" in formatSpec:
-            border_spec = formatSpec["border"]
-            border_kwargs = {}
-            for side_name in ["top", "left", "bottom", "right"]:
-                if side_name in border_spec:
-                    side_config = border_spec[side_name]
-                    border_kwargs[side_name] = Side(
-                        style=side_config.get("style", "thin"),
-                        color=side_config.get("color", "000000"),
-                    )
-
-            if border_kwargs:
-                target_cell.border = Border(**border_kwargs)
-
-        workbook.save(filePath)
+            for sheet, cell, value in writes:
+                workbook[sheet][cell] = value
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {"op": "set_cell", "sheet": sheet, "cell": cell, "value": value}
+                    for sheet, cell, value in writes
+                ],
+            )
 
-        return f"セル {cell} の書式を設定しました。"
+        sheet_count = len({sheet for sheet, _, _ in writes})
+        return tool_result(
+            f"{sheet_count}シートの {len(writes)}セル に値を設定しました。",
+            {"sheetCount": sheet_count, "cellCount": len(writes)},
+        )
     except Exception as e:
-        raise Exception(f"セル書式設定エラー: {e}")
+        raise Exception(f"複数セル設定エラー: {e}")
 
 
-@mcp.tool()
-def add_formula(
-    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
-    sheetName: Annotated[str, Field(description="ワークシート名")],
-    cell: Annotated[str, Field(description="セル位置（例: A1）")],
-    formula: Annotated[str, Field(description="数式（=SUM(A1:A10)など、=で始まる）")],
-) -> str:
-    """
-    セルに数式を追加します
-
-    Args:
-        filePath: Excelファイルのパス
+@mcp.tool(output_schema=output_schema(RangeValuesResult))
+@dispatched
+@memoized
+def get_range_values(
+    filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="対象のワークシート名")],
+    rangeAddr: Annotated[
+        str,
+        Field(
+            description="取得する範囲。A1:C3形式のほか、列全体（B:B, A:D）、行全体（2:10）、終端の行を省略した形式（A2:D）も指定できます。シートの使用範囲より右・下の空白部分は自動的に除かれます"
+        ),
+    ],
+) -> ToolResult:
+    """
+    指定された範囲のデータを取得します
+
+    Args:
+        filePath: 対象のExcelファイルの絶対パス
+        sheetName: 対象のワークシート名
+        rangeAddr: 取得する範囲（例: A1:C10, B:B, 2:10, A2:D）。使用範囲に切り詰められます
+    """
+    try:
+        cell_range = parse_range(rangeAddr)
+
+        with open_reader(filePath) as reader:
+            require_sheet(reader, sheetName)
+
+            # 使用範囲に切り詰めてから値を取得
+            used_range = reader.clip(sheetName, cell_range)
+            values = (
+                [] if used_range is None else reader.read_range(sheetName, used_range)
+            )
+
+        label = rangeAddr
+        if used_range is None:
+            label = f"{rangeAddr}（使用範囲外）"
+        elif used_range != cell_range:
+            label = f"{rangeAddr}（{used_range.coord}）"
+
+        columns = max((len(row) for row in values), default=0)
+        return tool_result(
+            f"範囲 {label} の値: {len(values)}行 x {columns}列",
+            {
+                "sheetName": sheetName,
+                "range": rangeAddr,
+                "usedRange": used_range.coord if used_range is not None else None,
+                "values": values,
+            },
+        )
+    except Exception as e:
+        raise Exception(f"範囲値取得エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(RangesResult))
+@dispatched
+@memoized
+def get_ranges(
+    filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
+    ranges: Annotated[
+        list[dict],
+        Field(
+            description='取得する範囲の配列。例: [{"sheet": "売上", "range": "A1:C10"}, {"sheet": "集計", "range": "B:B", "key": "合計"}]。key を省略した場合は "シート名!範囲" が結果のキーになります'
+        ),
+    ],
+) -> ToolResult:
+    """
+    同じワークブックの複数シート・複数範囲のデータを1回の読み込みでまとめて取得します
+
+    シートごとに要求された範囲を行の昇順に1回だけ走査し、結果を要求ごとのキーで返します。
+
+    Args:
+        filePath: 対象のExcelファイルの絶対パス
+        ranges: 取得する範囲の配列 [{"sheet": str, "range": str, "key": str（省略可）}, ...]
+    """
+    try:
+        if not ranges:
+            raise ValueError("rangesには1つ以上の範囲を指定してください")
+
+        requests = []
+        for i, request in enumerate(ranges):
+            if not isinstance(request, dict) or not {"sheet", "range"} <= set(request):
+                raise ValueError(
+                    f"rangesの{i+1}番目には sheet と range を指定してください"
+                )
+            key = request.get("key") or f"{request['sheet']}!{request['range']}"
+            requests.append((key, request["sheet"], parse_range(request["range"])))
+
+        keys = [key for key, _, _ in requests]
+        if len(set(keys)) != len(keys):
+            raise ValueError("rangesのキーが重複しています。key を指定してください")
+
+        results = {}
+        with open_reader(filePath) as reader:
+            missing = sorted(
+                {sheet for _, sheet, _ in requests} - set(reader.sheet_names)
+            )
+            if missing:
+                available_sheets = ", ".join(reader.sheet_names)
+                raise ValueError(
+                    f"ワークシート {', '.join(repr(name) for name in missing)} が見つかりません。利用可能なシート: {available_sheets}"
+                )
+
+            # シートごとに、使用範囲に切り詰めた範囲をまとめて1回で走査する
+            by_sheet: dict[str, list[tuple[str, CellRange]]] = {}
+            for key, sheet, cell_range in requests:
+                used_range = reader.clip(sheet, cell_range)
+                if used_range is None:
+                    results[key] = []
+                else:
+                    by_sheet.setdefault(sheet, []).append((key, used_range))
+
+            for sheet, windows in by_sheet.items():
+                values = reader.read_windows(sheet, [window for _, window in windows])
+                for (key, _), window_values in zip(windows, values):
+                    results[key] = window_values
+
+        ordered = {key: results[key] for key in keys}
+        return tool_result(
+            f"{len(keys)}範囲 の値を取得しました（{', '.join(keys)}）。",
+            {"ranges": ordered},
+        )
+    except Exception as e:
+        raise Exception(f"複数範囲取得エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(ColumnValuesResult))
+@dispatched
+@memoized
+def get_column_values(
+    filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="対象のワークシート名")],
+    columns: Annotated[
+        list[str],
+        Field(description="取得する列の見出し名の一覧（例: ['商品名', '価格']）"),
+    ],
+    rowRange: Annotated[
+        str | None,
+        Field(
+            description="取得する行の範囲（例: 2:10、1行だけの場合は 5:5）。省略時は見出し行の次の行から使用範囲の最終行まで"
+        ),
+    ] = None,
+    headerRow: Annotated[int, Field(description="見出し行の行番号", ge=1)] = 1,
+) -> ToolResult:
+    """
+    見出し名で指定した列の値を取得します
+
+    列の位置を調べるために見出し行を取得する必要はありません。見出し名と列の対応は
+    ファイルが変更されるまでキャッシュされます。
+
+    Args:
+        filePath: 対象のExcelファイルの絶対パス
+        sheetName: 対象のワークシート名
+        columns: 取得する列の見出し名の一覧
+        rowRange: 取得する行の範囲（例: 2:10）。使用範囲に切り詰められます
+        headerRow: 見出し行の行番号
+    """
+    try:
+        if not columns:
+            raise ValueError("columnsには1つ以上の見出し名を指定してください")
+        first_row, last_row = (
+            parse_row_range(rowRange) if rowRange else (headerRow + 1, MAX_ROW)
+        )
+
+        with open_reader(filePath) as reader:
+            require_sheet(reader, sheetName)
+            max_row, max_col = reader.dimensions(sheetName)
+            entry = header_entry(
+                filePath,
+                sheetName,
+                headerRow,
+                lambda: reader.read_range(
+                    sheetName, CellRange(1, headerRow, max_col, headerRow)
+                )[0],
+            )
+            indices = [entry.resolve(name) for name in columns]
+
+            last_row = min(last_row, max_row)
+            values = []
+            if first_row <= last_row:
+                windows = reader.read_windows(
+                    sheetName,
+                    [
+                        CellRange(column, first_row, column, last_row)
+                        for column in indices
+                    ],
+                )
+                values = [
+                    [cells[0] for cells in row] for row in zip(*windows, strict=True)
+                ]
+
+        rows = f"{first_row}:{last_row}" if first_row <= last_row else None
+        return tool_result(
+            f"列 {', '.join(columns)} の値: {len(values)}行（行 {rows or '使用範囲外'}）",
+            {
+                "sheetName": sheetName,
+                "headerRow": headerRow,
+                "columns": [
+                    {"name": name, "column": get_column_letter(column)}
+                    for name, column in zip(columns, indices)
+                ],
+                "rows": rows,
+                "values": values,
+            },
+        )
+    except Exception as e:
+        raise Exception(f"列値取得エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(RangeWriteResult))
+@dispatched
+def set_column_values(
+    filePath: Annotated[str, Field(description="対象のExcelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="対象のワークシート名")],
+    column: Annotated[str, Field(description="書き込む列の見出し名（例: 価格）")],
+    values: Annotated[
+        list[str | int | float | bool | None],
+        Field(
+            description="上から順に書き込む値の配列。None の位置のセルは変更しません"
+        ),
+    ],
+    startRow: Annotated[
+        int | None,
+        Field(description="書き込みを開始する行番号。省略時は見出し行の次の行", ge=1),
+    ] = None,
+    headerRow: Annotated[int, Field(description="見出し行の行番号", ge=1)] = 1,
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
+    """
+    見出し名で指定した列に、開始行から下方向に値を設定します
+
+    Args:
+        filePath: 対象のExcelファイルの絶対パス
+        sheetName: 対象のワークシート名
+        column: 書き込む列の見出し名
+        values: 上から順に書き込む値の配列
+        startRow: 書き込みを開始する行番号（省略時は見出し行の次の行）
+        headerRow: 見出し行の行番号
+        timeoutSeconds: 処理の制限時間（秒）。超えた場合は変更を保存せずに中断します
+    """
+    try:
+        if not values:
+            raise ValueError("valuesは空でない配列である必要があります")
+        start_row = startRow or headerRow + 1
+        if start_row + len(values) - 1 > MAX_ROW:
+            raise ValueError("書き込む行がシートの範囲外になります")
+
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+                )
+
+            worksheet = workbook[sheetName]
+            entry = header_entry(
+                filePath,
+                sheetName,
+                headerRow,
+                lambda: worksheet_header(worksheet, headerRow),
+            )
+            startCell = f"{get_column_letter(entry.resolve(column))}{start_row}"
+            rows = [[value] for value in values]
+            progress = ProgressReporter(len(rows), timeoutSeconds)
+            write_range_values(worksheet, startCell, progress.track(rows, "書き込み"))
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {
+                        "op": "set_range",
+                        "sheet": sheetName,
+                        "startCell": startCell,
+                        "values": rows,
+                    }
+                ],
+            )
+
+        return tool_result(
+            f"列 '{column}' の {startCell} から {len(rows)}行 のデータを設定しました。",
+            {
+                "sheetName": sheetName,
+                "startCell": startCell,
+                "rows": len(rows),
+                "columns": 1,
+            },
+        )
+    except Exception as e:
+        raise Exception(f"列値設定エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(CellFormatResult))
+@dispatched
+def format_cell(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="ワークシート名")],
+    cell: Annotated[str, Field(description="セル位置（例: A1）")],
+    formatSpec: Annotated[
+        dict,
+        Field(
+            description="セルの書式設定（辞書形式）。font: フォント設定、fill: 塗りつぶし設定、border: 罫線設定"
+        ),
+    ],
+) -> ToolResult:
+    """
+    セルの書式（フォント、塗りつぶし、罫線）を設定します
+
+    Args:
+        filePath: Excelファイルのパス
         sheetName: ワークシート名
         cell: セル位置（例: A1）
-        formula: 数式（=SUM(A1:A10)など、=で始まる）
+        formatSpec: セルの書式設定（辞書形式）
+            - font: フォント設定 {"bold": bool, "italic": bool, "size": int, "color": str}
+            - fill: 塗りつぶし設定 {"type": "pattern", "pattern": str, "fgColor": str}
+            - border: 罫線設定 {"top": {"style": str, "color": str}, ...}
     """
     try:
         validate_cell_address(cell)
 
-        workbook = load_workbook(filePath)
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+
+            worksheet = workbook[sheetName]
+            apply_cell_format(worksheet[cell], formatSpec)
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {
+                        "op": "format_cell",
+                        "sheet": sheetName,
+                        "cell": cell,
+                        "formatSpec": formatSpec,
+                    }
+                ],
+            )
 
-        if sheetName not in workbook.sheetnames:
-            raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+        return tool_result(
+            f"セル {cell} の書式を設定しました。",
+            {"sheetName": sheetName, "cell": cell},
+        )
+    except Exception as e:
+        raise Exception(f"セル書式設定エラー: {e}")
 
-        worksheet = workbook[sheetName]
-        worksheet[cell] = formula
-        workbook.save(filePath)
 
-        return f"セル {cell} に数式 '{formula}' を設定しました。"
+@mcp.tool(output_schema=output_schema(CellResult))
+@dispatched
+def add_formula(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="ワークシート名")],
+    cell: Annotated[str, Field(description="セル位置（例: A1）")],
+    formula: Annotated[str, Field(description="数式（=SUM(A1:A10)など、=で始まる）")],
+) -> ToolResult:
+    """
+    セルに数式を追加します
+
+    Args:
+        filePath: Excelファイルのパス
+        sheetName: ワークシート名
+        cell: セル位置（例: A1）
+        formula: 数式（=SUM(A1:A10)など、=で始まる）
+    """
+    try:
+        validate_cell_address(cell)
+
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+
+            worksheet = workbook[sheetName]
+            worksheet[cell] = formula
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {
+                        "op": "set_cell",
+                        "sheet": sheetName,
+                        "cell": cell,
+                        "value": formula,
+                    }
+                ],
+            )
+
+        return tool_result(
+            f"セル {cell} に数式 '{formula}' を設定しました。",
+            {"sheetName": sheetName, "cell": cell, "value": formula},
+        )
     except Exception as e:
         raise Exception(f"数式追加エラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(FormulaFillResult))
+@dispatched
+def fill_formula(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="ワークシート名")],
+    rangeAddr: Annotated[
+        str,
+        Field(
+            description="数式を入力する範囲（例: D2:D50001, D2:D）。終端を省略した行・列はシートの使用範囲まで"
+        ),
+    ],
+    formula: Annotated[
+        str,
+        Field(
+            description="アンカーのセルに入力する数式（例: =B2*C2、=で始まる）。他のセルには相対参照を移して入力します"
+        ),
+    ],
+    anchorCell: Annotated[
+        str | None,
+        Field(
+            description="formula をそのまま入力するセル（例: D2）。省略時は範囲の左上のセル"
+        ),
+    ] = None,
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
+    """
+    数式を範囲の各セルに入力します（Excelのフィルと同様に相対参照を移し、$付きの絶対参照はそのまま）
+
+    数式の字句解析はアンカーの数式について1回だけ行い、すべてのセルを書き込んでから1回だけ保存します。
+
+    Args:
+        filePath: Excelファイルのパス
+        sheetName: ワークシート名
+        rangeAddr: 数式を入力する範囲（例: D2:D50001, D2:D）
+        formula: アンカーのセルの数式（例: =B2*C2）
+        anchorCell: formula をそのまま入力するセル（省略時は範囲の左上）
+        timeoutSeconds: 処理の制限時間（秒）。超えた場合は変更を保存せずに中断します
+    """
+    try:
+        cell_range = parse_range(rangeAddr)
+        template = FormulaTemplate(formula)
+
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                available_sheets = get_sheet_names(workbook)
+                raise ValueError(
+                    f"ワークシート '{sheetName}' が見つかりません。利用可能なシート: {available_sheets}"
+                )
+
+            worksheet = workbook[sheetName]
+            # 終端を省略した行・列（列全体・行全体）だけを使用範囲までに切り詰める
+            max_row, max_col = cell_range.max_row, cell_range.max_col
+            if max_row == MAX_ROW:
+                max_row = worksheet.max_row
+            if max_col == MAX_COLUMN:
+                max_col = worksheet.max_column
+            if cell_range.min_row > max_row or cell_range.min_col > max_col:
+                raise ValueError(f"範囲 {rangeAddr} に数式を入力するセルがありません")
+            cell_range = CellRange(
+                cell_range.min_col, cell_range.min_row, max_col, max_row
+            )
+
+            if anchorCell is None:
+                anchor_row, anchor_col = cell_range.min_row, cell_range.min_col
+                anchorCell = f"{get_column_letter(anchor_col)}{anchor_row}"
+            else:
+                validate_cell_address(anchorCell)
+                anchor_row, anchor_col = parse_cell(anchorCell)
+
+            progress = ProgressReporter(cell_range.rows, timeoutSeconds)
+            fill_formula_rows(
+                worksheet,
+                template,
+                cell_range,
+                anchor_row,
+                anchor_col,
+                progress.track(
+                    range(cell_range.min_row, cell_range.max_row + 1), "数式の入力"
+                ),
+            )
+            commit_workbook(
+                filePath,
+                workbook,
+                [
+                    {
+                        "op": "fill_formula",
+                        "sheet": sheetName,
+                        "range": cell_range.coord,
+                        "anchorCell": anchorCell,
+                        "formula": formula,
+                    }
+                ],
+            )
+
+        cells = cell_range.rows * cell_range.columns
+        return tool_result(
+            f"範囲 {cell_range.coord} の {cells}個 のセルに数式 '{formula}' を入力しました。",
+            {
+                "sheetName": sheetName,
+                "range": cell_range.coord,
+                "anchorCell": anchorCell,
+                "formula": formula,
+                "cells": cells,
+            },
+        )
+    except Exception as e:
+        raise Exception(f"数式入力エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(FindResult))
+@dispatched
+@memoized
 def find_data(
     filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
     sheetName: Annotated[str, Field(description="ワークシート名")],
     searchValue: Annotated[
         str | int | float, Field(description="検索する値（文字列、数値）")
     ],
-) -> str:
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
     """
     ワークシート内で指定された値を検索します
 
@@ -501,34 +2113,96 @@ def find_data(
         filePath: Excelファイルのパス
         sheetName: ワークシート名
         searchValue: 検索する値
+        timeoutSeconds: 処理の制限時間（秒）
     """
     try:
-        workbook = load_workbook(filePath)
+        with open_reader(filePath) as reader:
+            if sheetName not in reader.sheet_names:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+
+            results = []
+            max_row, _ = reader.dimensions(sheetName)
+            progress = ProgressReporter(max_row, timeoutSeconds)
+            rows = progress.track(reader.iter_rows(sheetName), "検索")
+
+            for row_idx, row in enumerate(rows, start=1):
+                for col_idx, value in enumerate(row, start=1):
+                    if value == searchValue:
+                        results.append(f"{get_column_letter(col_idx)}{row_idx}")
+
+        return tool_result(
+            f"値 '{searchValue}' が {len(results)}個のセルで見つかりました。",
+            {"sheetName": sheetName, "searchValue": searchValue, "cells": results},
+        )
+    except Exception as e:
+        raise Exception(f"データ検索エラー: {e}")
 
-        if sheetName not in workbook.sheetnames:
-            raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
 
-        worksheet = workbook[sheetName]
-        results = []
+@mcp.tool(output_schema=output_schema(SheetProfileResult))
+@dispatched
+@memoized
+def profile_sheet(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="ワークシート名")],
+    headerRow: Annotated[
+        int | None,
+        Field(
+            description="見出し行の行番号。省略時は先頭の行から推定し、0 の場合は見出し行なしとして扱います",
+            ge=0,
+        ),
+    ] = None,
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
+    """
+    ワークシートを1回だけ走査し、列ごとの型・空白の割合・異なる値の数・最小値と最大値・
+    値の例と、見出し行・表の範囲を返します
 
-        for row in worksheet.iter_rows():
-            for cell in row:
-                if cell.value == searchValue:
-                    results.append(cell.coordinate)
+    シート全体を読み取らずに表の構成を把握するために使います。異なる値の数が多い列は
+    推定値（誤差約2%）です。
 
-        return f"値 '{searchValue}' が見つかったセル: {', '.join(results)}"
+    Args:
+        filePath: Excelファイルのパス
+        sheetName: ワークシート名
+        headerRow: 見出し行の行番号（省略時は推定、0 は見出し行なし）
+        timeoutSeconds: 処理の制限時間（秒）
+    """
+    try:
+        with open_reader(filePath) as reader:
+            require_sheet(reader, sheetName)
+            progress = ProgressReporter(None, timeoutSeconds)
+            rows = progress.track(reader.stream_rows(sheetName), "プロファイル")
+            profile = sheet_profile.profile_rows(rows, headerRow)
+
+        columns = profile["columns"]
+        return tool_result(
+            f"ワークシート '{sheetName}' の {len(columns)}列 x {profile['dataRows']}行"
+            f"（表の範囲: {profile['tableRange'] or 'なし'}）をプロファイルしました。",
+            {"sheetName": sheetName, "engine": reader.engine, **profile},
+        )
     except Exception as e:
-        raise Exception(f"データ検索エラー: {e}")
+        raise Exception(f"シートプロファイルエラー: {e}")
 
 
-@mcp.tool()
+@mcp.tool(output_schema=output_schema(ExportResult))
+@dispatched
 def export_to_csv(
     filePath: Annotated[
         str, Field(description="Excelファイルの絶対パス（既存ファイル）")
     ],
     sheetName: Annotated[str, Field(description="ワークシート名（既存シート）")],
     csvPath: Annotated[str, Field(description="CSVファイルの出力パス")],
-) -> str:
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は途中までの結果を残さずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
     """
     ワークシートをCSVファイルにエクスポートします
 
@@ -536,31 +2210,1388 @@ def export_to_csv(
         filePath: Excelファイルのパス（既存ファイル）
         sheetName: ワークシート名（既存シート）
         csvPath: CSVファイルの出力パス
+        timeoutSeconds: 処理の制限時間（秒）。超えた場合はCSVファイルを作成せずに中断します
     """
     try:
-        workbook = load_workbook(filePath)
+        with open_reader(filePath) as reader:
+            if sheetName not in reader.sheet_names:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
 
-        if sheetName not in workbook.sheetnames:
-            raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+            # 読み取りと書き込みの両方の行数を進捗の全体とする
+            max_row, _ = reader.dimensions(sheetName)
+            progress = ProgressReporter(max_row * 2, timeoutSeconds)
+            data = list(progress.track(reader.iter_rows(sheetName), "読み取り"))
 
-        # DataFrameに変換してCSVに出力
-        worksheet = workbook[sheetName]
-        data = []
+        # DataFrameに変換し、一時ファイルに行のまとまりごとに書き出してから置き換える
+        df = pd.DataFrame(data)
+        temp_path = f"{csvPath}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8-sig", newline="") as csv_file:
+                for start in range(0, len(df), PROGRESS_CHUNK_ROWS):
+                    chunk = df.iloc[start : start + PROGRESS_CHUNK_ROWS]
+                    chunk.to_csv(csv_file, index=False, header=False)
+                    progress.advance(len(chunk), "書き込み")
+            os.replace(temp_path, csvPath)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return tool_result(
+            f"ワークシート '{sheetName}' をCSVファイル '{csvPath}' にエクスポートしました。",
+            {"sheetName": sheetName, "csvPath": csvPath, "rows": len(df)},
+        )
+    except Exception as e:
+        raise Exception(f"CSV出力エラー: {e}")
 
-        for row in worksheet.iter_rows(values_only=True):
-            data.append(row)
 
-        df = pd.DataFrame(data)
-        df.to_csv(csvPath, index=False, header=False, encoding="utf-8-sig")
+@mcp.tool(output_schema=output_schema(ExportWorkbookResult))
+@dispatched
+def export_workbook(
+    filePath: Annotated[
+        str, Field(description="Excelファイルの絶対パス（既存ファイル）")
+    ],
+    outputDir: Annotated[
+        str,
+        Field(
+            description="出力先のディレクトリ。シートごとのファイルと manifest.json を作成します（存在しない場合は作成）"
+        ),
+    ],
+    format: Annotated[
+        str,
+        Field(
+            description="出力形式。csv（既定）、jsonl（1行1JSON）、parquet（列指向・圧縮、pyarrowが必要）"
+        ),
+    ] = "csv",
+    sheetNames: Annotated[
+        list[str] | None,
+        Field(
+            description="エクスポートするワークシート名。省略時はすべてのワークシート"
+        ),
+    ] = None,
+    headerRow: Annotated[
+        bool,
+        Field(
+            description="各シートの1行目を列名として使うか（CSVの見出し、JSONLのキー、Parquetの列名）"
+        ),
+    ] = False,
+    maxWorkers: Annotated[
+        int | None,
+        Field(
+            description="並列に処理するプロセス数。省略時は1MB以上のファイルでCPUコア数、それ以外は1（1の場合はプロセスを起動せずに順に処理）",
+            ge=1,
+        ),
+    ] = None,
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は manifest.json を作成せずに中断します"
+        ),
+    ] = None,
+) -> ToolResult:
+    """
+    ワークブックの全シート（または指定したシート）を1回の呼び出しでファイルにエクスポートします
+
+    シートごとの読み取りと書き出しをプロセスプールで並列に行い、出力先のディレクトリに
+    シートごとのファイルと、行数・バイト数を記録した manifest.json を作成します。
 
-        return f"ワークシート '{sheetName}' をCSVファイル '{csvPath}' にエクスポートしました。"
+    Args:
+        filePath: Excelファイルのパス（既存ファイル）
+        outputDir: 出力先のディレクトリ
+        format: 出力形式（csv / jsonl / parquet）
+        sheetNames: エクスポートするワークシート名（省略時はすべて）
+        headerRow: 各シートの1行目を列名として使うか
+        maxWorkers: 並列に処理するプロセス数（省略時はファイルサイズに応じて決定）
+        timeoutSeconds: 処理の制限時間（秒）
+    """
+    try:
+        validate_file_path(filePath)
+        if format not in workbook_export.EXPORT_FORMATS:
+            raise ValueError(
+                f"無効な出力形式: '{format}'。{', '.join(workbook_export.EXPORT_FORMATS)} のいずれかを指定してください"
+            )
+        if format == "parquet" and not workbook_export.parquet_available():
+            raise ValueError(
+                "Parquet 形式で出力するには pyarrow をインストールしてください"
+            )
+
+        # 各プロセスはファイルから直接読み取るため、保留中の変更を先に反映する
+        flush_journal(filePath)
+        available = workbook_export.worksheet_names(filePath)
+        if sheetNames:
+            missing = [name for name in sheetNames if name not in available]
+            if missing:
+                raise ValueError(
+                    f"ワークシート {', '.join(repr(name) for name in missing)} が見つかりません。利用可能なシート: {', '.join(available)}"
+                )
+            selected = list(dict.fromkeys(sheetNames))
+        else:
+            selected = available
+
+        engine = "calamine" if use_fast_reader(filePath) else "openpyxl"
+        os.makedirs(outputDir, exist_ok=True)
+        file_names = workbook_export.output_file_names(selected, format)
+        jobs = [
+            {
+                "filePath": filePath,
+                "sheetName": sheetName,
+                "outputPath": os.path.join(outputDir, file_name),
+                "format": format,
+                "engine": engine,
+                "headerRow": headerRow,
+            }
+            for sheetName, file_name in zip(selected, file_names)
+        ]
+
+        progress = ProgressReporter(len(jobs), timeoutSeconds)
+        sheets = workbook_export.export_sheets(
+            jobs,
+            workbook_export.export_workers(filePath, len(jobs), maxWorkers),
+            lambda result: progress.advance(1, result["sheetName"]),
+            progress.check,
+        )
+
+        manifest = {
+            "source": filePath,
+            "outputDir": outputDir,
+            "format": format,
+            "headerRow": headerRow,
+            "exportedAt": datetime.now().isoformat(),
+            "sheets": sheets,
+            "totalRows": sum(sheet["rows"] for sheet in sheets),
+            "totalBytes": sum(sheet["bytes"] for sheet in sheets),
+        }
+        manifest_path = workbook_export.write_manifest(outputDir, manifest)
+
+        return tool_result(
+            f"{len(sheets)}シート（{manifest['totalRows']}行）を {format} 形式で '{outputDir}' にエクスポートしました。",
+            {**manifest, "manifestPath": manifest_path},
+        )
     except Exception as e:
-        raise Exception(f"CSV出力エラー: {e}")
+        raise Exception(f"ワークブック出力エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(RenderTemplateResult))
+@dispatched(routeBy="templatePath", flushPaths=("templatePath",))
+def render_template(
+    templatePath: Annotated[
+        str, Field(description="テンプレートのExcelファイルの絶対パス")
+    ],
+    recordsPath: Annotated[
+        str,
+        Field(
+            description="レコードのファイルの絶対パス（.jsonl: 1行に1つのJSONオブジェクト、.csv: 見出し行付きのUTF-8）"
+        ),
+    ],
+    mapping: Annotated[
+        dict[str, str],
+        Field(
+            description='項目名 → 値を書き込むセルの対応表。例: {"顧客名": "B3", "金額": "請求書!E10"}。シート名を省略したセルは最初のワークシート'
+        ),
+    ],
+    outputDir: Annotated[
+        str, Field(description="作成したファイルの出力先ディレクトリ")
+    ],
+    fileName: Annotated[
+        str,
+        Field(
+            description="出力ファイル名。{項目名} はレコードの値、{index} はレコードの番号（1始まり）に置き換えます。例: 請求書_{顧客ID}.xlsx"
+        ),
+    ] = "{index}.xlsx",
+    maxWorkers: Annotated[
+        int | None,
+        Field(
+            description="並列に処理するプロセス数。省略時は16件以上のレコードでCPUコア数",
+            ge=1,
+        ),
+    ] = None,
+    timeoutSeconds: Annotated[
+        float | None,
+        Field(
+            description="処理の制限時間（秒）。超えた場合は未処理のレコードを取り消して中断します"
+        ),
+    ] = None,
+) -> ToolResult:
+    """
+    テンプレートのワークブックから、レコードごとに値を書き込んだワークブックを一括で作成します
+
+    レコードはプロセスプールで並列に処理し、各プロセスはテンプレートを1回だけ解析して使い回します。
+    項目が足りないなどで作成できなかったレコードは処理を止めずに結果の failedRecords に記録します。
+
+    Args:
+        templatePath: テンプレートのExcelファイルのパス（既存ファイル）
+        recordsPath: レコードのファイル（.jsonl / .csv）のパス
+        mapping: 項目名 → 値を書き込むセルの対応表
+        outputDir: 出力先のディレクトリ
+        fileName: 出力ファイル名のパターン（例: 請求書_{顧客ID}.xlsx）
+        maxWorkers: 並列に処理するプロセス数（省略時はレコード数に応じて決定）
+        timeoutSeconds: 処理の制限時間（秒）
+    """
+    try:
+        validate_file_path(templatePath)
+        if not mapping:
+            raise ValueError("mappingには1つ以上の項目を指定してください")
+
+        started = perf_counter()
+        # 各プロセスはファイルから直接読み取るため、保留中の変更を先に反映する
+        flush_journal(templatePath)
+        placements = template_render.resolve_mapping(
+            mapping, workbook_export.worksheet_names(templatePath)
+        )
+        records = template_render.read_records(recordsPath)
+
+        os.makedirs(outputDir, exist_ok=True)
+        paths = template_render.output_paths(outputDir, fileName, records)
+        failures = [
+            {
+                "record": index,
+                "error": "出力ファイル名を作成できないか、前のレコードと重複しています",
+            }
+            for index, path in enumerate(paths, start=1)
+            if path is None
+        ]
+        targets = [
+            (index, record, path)
+            for index, (record, path) in enumerate(zip(records, paths), start=1)
+            if path is not None
+        ]
+
+        workers = template_render.render_workers(len(targets), maxWorkers)
+        size = template_render.batch_size(len(targets), workers)
+        jobs = [
+            {
+                "templatePath": templatePath,
+                "placements": placements,
+                "batch": targets[start : start + size],
+            }
+            for start in range(0, len(targets), size)
+        ]
+
+        progress = ProgressReporter(len(targets), timeoutSeconds)
+        batches = workbook_export.run_jobs(
+            template_render.render_batch,
+            jobs,
+            workers,
+            lambda results: progress.advance(len(results), "テンプレートの展開"),
+            progress.check,
+        )
+        failures.extend(
+            {"record": result["record"], "error": result["error"]}
+            for results in batches
+            for result in results
+            if result["error"] is not None
+        )
+        failures.sort(key=lambda failure: failure["record"])
+
+        elapsed = perf_counter() - started
+        rendered = len(records) - len(failures)
+        per_second = rendered / elapsed if elapsed > 0 else 0.0
+        return tool_result(
+            f"{len(records)}件のレコードから {rendered}個 のファイルを '{outputDir}' に作成しました"
+            f"（失敗: {len(failures)}件、{elapsed:.1f}秒、{per_second:.1f}件/秒）。",
+            {
+                "template": templatePath,
+                "outputDir": outputDir,
+                "records": len(records),
+                "rendered": rendered,
+                "failedCount": len(failures),
+                "failedRecords": failures[: template_render.RENDER_MAX_FAILURES],
+                "elapsedSeconds": round(elapsed, 3),
+                "recordsPerSecond": round(per_second, 1),
+            },
+        )
+    except Exception as e:
+        raise Exception(f"テンプレート展開エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(SortResult))
+@dispatched
+def sort_range(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="ワークシート名")],
+    rangeAddr: Annotated[
+        str, Field(description="並べ替える範囲。A1:C3形式で指定（例: A1:D100）")
+    ],
+    sortKeys: Annotated[
+        list[dict],
+        Field(
+            description='並べ替えキーの配列。先頭が最優先です。例: [{"column": "B", "order": "desc"}, {"column": "A"}]。orderは asc（既定）または desc'
+        ),
+    ],
+    hasHeader: Annotated[
+        bool, Field(description="範囲の先頭行を見出し行として並べ替えから除外するか")
+    ] = False,
+) -> ToolResult:
+    """
+    指定された範囲の行をキー列に従ってワークブック内で直接並べ替えます（安定ソート）
+
+    Args:
+        filePath: Excelファイルのパス
+        sheetName: ワークシート名
+        rangeAddr: 並べ替える範囲（例: A1:D100）
+        sortKeys: 並べ替えキーの配列 [{"column": "B", "order": "asc" | "desc"}, ...]
+        hasHeader: 先頭行を見出し行として除外するか
+    """
+    try:
+        cell_range = parse_range(rangeAddr)
+
+        if not sortKeys:
+            raise ValueError("sortKeysには1つ以上のキーを指定してください")
+
+        min_col, max_col = cell_range.min_col, cell_range.max_col
+        key_specs = []
+        for key in sortKeys:
+            order = key.get("order", "asc")
+            if order not in ("asc", "desc"):
+                raise ValueError(
+                    f"無効な並べ替え順序: '{order}'。asc または desc を指定してください"
+                )
+            key_specs.append(
+                (
+                    resolve_range_column(key.get("column"), min_col, max_col),
+                    order == "desc",
+                )
+            )
+
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+
+            worksheet = workbook[sheetName]
+            used_range = clip_to_used_range(cell_range, worksheet)
+            min_row = cell_range.min_row + (1 if hasHeader else 0)
+            if used_range is None or min_row > used_range.max_row:
+                return tool_result(
+                    f"範囲 {rangeAddr} に並べ替える行がありません。",
+                    {"sheetName": sheetName, "range": rangeAddr, "rows": 0},
+                )
+
+            block = read_range_block(
+                worksheet, min_row, min_col, used_range.max_row, used_range.max_col
+            )
+
+            # np.lexsortは最後のキーを最優先とする安定ソート
+            rank_arrays = [
+                excel_sort_ranks(range_column_values(block, col_offset), descending)
+                for col_offset, descending in key_specs
+            ]
+            order = np.lexsort(tuple(reversed(rank_arrays)))
+
+            write_range_rows(worksheet, block, order.tolist(), min_row, min_col)
+            commit_workbook(filePath, workbook, sheets=[sheetName])
+
+        return tool_result(
+            f"範囲 {rangeAddr} の {len(block)}行 を並べ替えました。",
+            {"sheetName": sheetName, "range": rangeAddr, "rows": len(block)},
+        )
+    except Exception as e:
+        raise Exception(f"範囲並べ替えエラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(FilterResult))
+@dispatched
+def filter_range(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="ワークシート名")],
+    rangeAddr: Annotated[
+        str, Field(description="絞り込む範囲。A1:C3形式で指定（例: A1:D100）")
+    ],
+    conditions: Annotated[
+        list[dict],
+        Field(
+            description='残す行の条件の配列（すべてを満たす行を残します）。例: [{"column": "C", "operator": ">=", "value": 100}]。operator: ==, !=, >, >=, <, <=, contains, notContains, startsWith, endsWith, isBlank, notBlank'
+        ),
+    ],
+    hasHeader: Annotated[
+        bool, Field(description="範囲の先頭行を見出し行として絞り込みから除外するか")
+    ] = False,
+) -> ToolResult:
+    """
+    条件を満たさない行を範囲から削除し、残った行を上に詰めます
+
+    範囲外のセルは移動しません。詰めた結果空いた範囲下部の行は値と書式がクリアされます。
+
+    Args:
+        filePath: Excelファイルのパス
+        sheetName: ワークシート名
+        rangeAddr: 絞り込む範囲（例: A1:D100）
+        conditions: 残す行の条件の配列 [{"column": "C", "operator": ">=", "value": 100}, ...]
+        hasHeader: 先頭行を見出し行として除外するか
+    """
+    try:
+        cell_range = parse_range(rangeAddr)
+
+        if not conditions:
+            raise ValueError("conditionsには1つ以上の条件を指定してください")
+
+        min_col, max_col = cell_range.min_col, cell_range.max_col
+        condition_columns = [
+            resolve_range_column(condition.get("column"), min_col, max_col)
+            for condition in conditions
+        ]
+
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+
+            worksheet = workbook[sheetName]
+            used_range = clip_to_used_range(cell_range, worksheet)
+            min_row = cell_range.min_row + (1 if hasHeader else 0)
+            if used_range is None or min_row > used_range.max_row:
+                return tool_result(
+                    f"範囲 {rangeAddr} に絞り込む行がありません。",
+                    {
+                        "sheetName": sheetName,
+                        "range": rangeAddr,
+                        "keptRows": 0,
+                        "removedRows": 0,
+                    },
+                )
+
+            max_row = used_range.max_row
+            block = read_range_block(
+                worksheet, min_row, min_col, max_row, used_range.max_col
+            )
+
+            keep = np.ones(len(block), dtype=bool)
+            for col_offset, condition in zip(condition_columns, conditions):
+                keep &= evaluate_condition(
+                    range_column_values(block, col_offset), condition
+                )
+
+            kept_rows = np.flatnonzero(keep).tolist()
+            removed = len(block) - len(kept_rows)
+
+            if removed:
+                write_range_rows(worksheet, block, kept_rows, min_row, min_col)
+                clear_range_rows(
+                    worksheet,
+                    min_row + len(kept_rows),
+                    max_row,
+                    min_col,
+                    used_range.max_col,
+                )
+                commit_workbook(filePath, workbook, sheets=[sheetName])
+
+        return tool_result(
+            f"範囲 {rangeAddr} を絞り込みました（残り {len(kept_rows)}行、削除 {removed}行）。",
+            {
+                "sheetName": sheetName,
+                "range": rangeAddr,
+                "keptRows": len(kept_rows),
+                "removedRows": removed,
+            },
+        )
+    except Exception as e:
+        raise Exception(f"範囲絞り込みエラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(JoinResult))
+@dispatched(flushPaths=("lookupFilePath",))
+def lookup_join(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="値を書き込む対象のワークシート名")],
+    rangeAddr: Annotated[
+        str,
+        Field(
+            description="対象の範囲（例: A1:D100000, A:D）。使用範囲に切り詰められます"
+        ),
+    ],
+    keyColumn: Annotated[str, Field(description="対象の範囲内のキー列（例: B）")],
+    lookupSheetName: Annotated[str, Field(description="照合先のワークシート名")],
+    lookupRange: Annotated[str, Field(description="照合先の範囲（例: A1:C5000, A:C）")],
+    lookupKeyColumn: Annotated[
+        str, Field(description="照合先の範囲内のキー列（例: A）")
+    ],
+    returnColumns: Annotated[
+        list[str],
+        Field(
+            description='照合先の範囲から取得する列の配列。例: ["B", "C"]。指定した順に出力先の列へ書き込みます'
+        ),
+    ],
+    lookupFilePath: Annotated[
+        str | None,
+        Field(
+            description="照合先のExcelファイルの絶対パス。省略時は filePath と同じファイル"
+        ),
+    ] = None,
+    outputColumn: Annotated[
+        str | None,
+        Field(
+            description="取得した値を書き込む先頭の列（例: E）。省略時は対象の範囲の右隣の列"
+        ),
+    ] = None,
+    how: Annotated[
+        str,
+        Field(
+            description="結合方法。left（既定）: すべての行を残し、一致しない行には noMatchValue を書き込む。inner: 一致しない行を範囲から削除して上に詰める"
+        ),
+    ] = "left",
+    noMatchValue: Annotated[
+        str | int | float | bool | None,
+        Field(description="left で一致しなかった行に書き込む値（省略時は空白）"),
+    ] = None,
+    hasHeader: Annotated[
+        bool,
+        Field(
+            description="対象と照合先の範囲の先頭行を見出し行とするか（出力先の見出しには照合先の見出しを書き込みます）"
+        ),
+    ] = False,
+    matchCase: Annotated[
+        bool,
+        Field(
+            description="文字列のキーの大文字小文字を区別するか（既定はVLOOKUPと同じく区別しない）"
+        ),
+    ] = False,
+) -> ToolResult:
+    """
+    照合先の範囲のキー列にハッシュインデックスを作成し、対象の各行のキーで照合して、
+    一致した行の列の値を対象の行の隣に書き込みます（VLOOKUPと同様、1回の保存で反映）
+
+    照合先のキーが重複する場合は最初の行を使います。空白のキーは一致しません。
+
+    Args:
+        filePath: Excelファイルのパス
+        sheetName: 値を書き込む対象のワークシート名
+        rangeAddr: 対象の範囲（例: A1:D100000）
+        keyColumn: 対象の範囲内のキー列（例: B）
+        lookupSheetName: 照合先のワークシート名
+        lookupRange: 照合先の範囲（例: A1:C5000）
+        lookupKeyColumn: 照合先の範囲内のキー列（例: A）
+        returnColumns: 照合先の範囲から取得する列の配列（例: ["B", "C"]）
+        lookupFilePath: 照合先のExcelファイルのパス（省略時は filePath）
+        outputColumn: 書き込む先頭の列（省略時は対象の範囲の右隣）
+        how: 結合方法（left / inner）
+        noMatchValue: left で一致しなかった行に書き込む値
+        hasHeader: 先頭行を見出し行とするか
+        matchCase: 文字列のキーの大文字小文字を区別するか
+    """
+    try:
+        cell_range = parse_range(rangeAddr)
+        lookup_range = parse_range(lookupRange)
+
+        if how not in ("left", "inner"):
+            raise ValueError(
+                f"無効な結合方法: '{how}'。left または inner を指定してください"
+            )
+        if not returnColumns:
+            raise ValueError("returnColumnsには1つ以上の列を指定してください")
+
+        min_col, max_col = cell_range.min_col, cell_range.max_col
+        key_offset = resolve_range_column(keyColumn, min_col, max_col)
+        lookup_key_offset = resolve_range_column(
+            lookupKeyColumn, lookup_range.min_col, lookup_range.max_col
+        )
+        return_offsets = [
+            resolve_range_column(column, lookup_range.min_col, lookup_range.max_col)
+            for column in returnColumns
+        ]
+
+        if outputColumn is None:
+            output_col = max_col + 1
+        else:
+            output_col = resolve_range_column(outputColumn, 1, 16384) + 1
+        output_cols = range(output_col, output_col + len(return_offsets))
+        if min_col + key_offset in output_cols:
+            raise ValueError("出力先の列が対象のキー列と重なっています")
+        output_letters = [get_column_letter(column) for column in output_cols]
+
+        def read_lookup(reader: WorkbookReader) -> list[list[Any]]:
+            require_sheet(reader, lookupSheetName)
+            used = reader.clip(lookupSheetName, lookup_range)
+            return [] if used is None else reader.read_range(lookupSheetName, used)
+
+        same_file = lookupFilePath is None or normalize_path(
+            lookupFilePath
+        ) == normalize_path(filePath)
+        lookup_rows = None
+        if not same_file:
+            # 照合先を読み終えてから対象のファイルを開く（ファイルのロックを同時に保持しない）
+            with open_reader(lookupFilePath) as reader:
+                lookup_rows = read_lookup(reader)
+
+        with edit_workbook(filePath) as workbook:
+            if sheetName not in workbook.sheetnames:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+            if lookup_rows is None:
+                lookup_rows = read_lookup(OpenpyxlReader(workbook))
+
+            lookup_header = lookup_rows[0] if hasHeader and lookup_rows else None
+            lookup_rows = lookup_rows[1:] if hasHeader else lookup_rows
+
+            def lookup_column(offset: int) -> list[Any]:
+                return [
+                    row[offset] if offset < len(row) else None for row in lookup_rows
+                ]
+
+            worksheet = workbook[sheetName]
+            used_range = clip_to_used_range(cell_range, worksheet)
+            min_row = cell_range.min_row + (1 if hasHeader else 0)
+            if used_range is None or min_row > used_range.max_row:
+                return tool_result(
+                    f"範囲 {rangeAddr} に照合する行がありません。",
+                    {
+                        "sheetName": sheetName,
+                        "range": rangeAddr,
+                        "outputColumns": output_letters,
+                        "matchedRows": 0,
+                        "unmatchedRows": 0,
+                        "removedRows": 0,
+                    },
+                )
+
+            max_row = used_range.max_row
+            target_keys = [
+                row[0]
+                for row in worksheet.iter_rows(
+                    min_row=min_row,
+                    max_row=max_row,
+                    min_col=min_col + key_offset,
+                    max_col=min_col + key_offset,
+                    values_only=True,
+                )
+            ]
+            matched = match_lookup_keys(
+                lookup_column(lookup_key_offset), target_keys, matchCase
+            )
+            found = matched >= 0
+            columns = [
+                np.array(lookup_column(offset), dtype=object)
+                for offset in return_offsets
+            ]
+
+            rows = np.arange(len(target_keys))
+            removed = 0
+            if how == "inner":
+                rows = np.flatnonzero(found)
+                removed = len(target_keys) - len(rows)
+                if removed:
+                    # filter_range と同じく、一致した行を上に詰めて空いた行をクリアする
+                    block = read_range_block(
+                        worksheet, min_row, min_col, max_row, used_range.max_col
+                    )
+                    write_range_rows(worksheet, block, rows.tolist(), min_row, min_col)
+                    clear_range_rows(
+                        worksheet,
+                        min_row + len(rows),
+                        max_row,
+                        min_col,
+                        used_range.max_col,
+                    )
+                    clear_range_rows(
+                        worksheet,
+                        min_row + len(rows),
+                        max_row,
+                        output_col,
+                        output_cols[-1],
+                    )
+
+            if lookup_header is not None:
+                for column, offset in zip(output_cols, return_offsets):
+                    worksheet.cell(
+                        row=cell_range.min_row,
+                        column=column,
+                        value=(
+                            lookup_header[offset]
+                            if offset < len(lookup_header)
+                            else None
+                        ),
+                    )
+
+            for target_idx, source_idx in enumerate(rows.tolist()):
+                lookup_idx = matched[source_idx]
+                row = min_row + target_idx
+                for column, values in zip(output_cols, columns):
+                    value = values[lookup_idx] if lookup_idx >= 0 else noMatchValue
+                    worksheet.cell(row=row, column=column, value=value)
+
+            commit_workbook(filePath, workbook, sheets=[sheetName])
+
+        matched_count = int(found.sum())
+        unmatched_count = len(target_keys) - matched_count
+        return tool_result(
+            f"範囲 {rangeAddr} の {len(target_keys)}行 を照合し、{matched_count}行 が一致しました"
+            f"（一致しない行: {unmatched_count}行、削除: {removed}行、出力先: "
+            f"{output_letters[0]}:{output_letters[-1]}）。",
+            {
+                "sheetName": sheetName,
+                "range": rangeAddr,
+                "outputColumns": output_letters,
+                "matchedRows": matched_count,
+                "unmatchedRows": unmatched_count,
+                "removedRows": removed,
+            },
+        )
+    except Exception as e:
+        raise Exception(f"照合結合エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(RangeTransferResult))
+@dispatched(flushPaths=("targetFilePath",))
+def copy_range(
+    filePath: Annotated[str, Field(description="コピー元のExcelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="コピー元のワークシート名")],
+    rangeAddr: Annotated[
+        str,
+        Field(
+            description="コピー元の範囲（例: A1:D20, A:D）。使用範囲に切り詰められます"
+        ),
+    ],
+    targetCell: Annotated[str, Field(description="貼り付け先の左上のセル（例: F1）")],
+    targetSheetName: Annotated[
+        str | None,
+        Field(
+            description="貼り付け先のワークシート名。省略時は sheetName と同じシート"
+        ),
+    ] = None,
+    targetFilePath: Annotated[
+        str | None,
+        Field(
+            description="貼り付け先のExcelファイルの絶対パス。省略時は filePath と同じファイル"
+        ),
+    ] = None,
+    includeFormats: Annotated[
+        bool,
+        Field(description="書式と結合セルもコピーするか（false の場合は値と数式だけ）"),
+    ] = True,
+) -> ToolResult:
+    """
+    範囲の値・書式・数式・結合セルを、同じシート・別のシート・別のワークブックへコピーします
+
+    数式の相対参照は貼り付け先の位置に合わせて変換されます（Excelのコピーと同様）。
+    貼り付け先と重なる結合セルは解除されます。ワークブックは1回だけ読み込み、
+    貼り付け先のワークブックを1回だけ保存します。
+
+    Args:
+        filePath: コピー元のExcelファイルのパス
+        sheetName: コピー元のワークシート名
+        rangeAddr: コピー元の範囲（例: A1:D20）
+        targetCell: 貼り付け先の左上のセル（例: F1）
+        targetSheetName: 貼り付け先のワークシート名（省略時は sheetName）
+        targetFilePath: 貼り付け先のExcelファイルのパス（省略時は filePath）
+        includeFormats: 書式と結合セルもコピーするか
+    """
+    try:
+        result = transfer_range(
+            filePath,
+            sheetName,
+            rangeAddr,
+            targetCell,
+            targetSheetName,
+            targetFilePath,
+            includeFormats,
+            move=False,
+        )
+        if result["targetRange"] is None:
+            return tool_result(
+                f"範囲 {rangeAddr} にコピーするセルがありません。", result
+            )
+        return tool_result(
+            f"範囲 {rangeAddr} を {result['targetSheetName']}!{result['targetRange']} に"
+            f"コピーしました（{result['rows']}行 x {result['columns']}列）。",
+            result,
+        )
+    except Exception as e:
+        raise Exception(f"範囲コピーエラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(RangeTransferResult))
+@dispatched(flushPaths=("targetFilePath",))
+def move_range(
+    filePath: Annotated[str, Field(description="移動元のExcelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="移動元のワークシート名")],
+    rangeAddr: Annotated[
+        str,
+        Field(
+            description="移動元の範囲（例: A1:D20, A:D）。使用範囲に切り詰められます"
+        ),
+    ],
+    targetCell: Annotated[str, Field(description="移動先の左上のセル（例: F1）")],
+    targetSheetName: Annotated[
+        str | None,
+        Field(description="移動先のワークシート名。省略時は sheetName と同じシート"),
+    ] = None,
+    targetFilePath: Annotated[
+        str | None,
+        Field(
+            description="移動先のExcelファイルの絶対パス。省略時は filePath と同じファイル"
+        ),
+    ] = None,
+) -> ToolResult:
+    """
+    範囲の値・書式・数式・結合セルを移動先へ移し、移動元のセルをクリアします
+
+    移動した数式の相対参照は移動先の位置に合わせて変換されます（sort_range で行を
+    移動する場合と同じ）。他のセルから移動した範囲への参照は変更されません。
+    移動元と移動先が同じシート内で重なっていても正しく移動します。
+
+    Args:
+        filePath: 移動元のExcelファイルのパス
+        sheetName: 移動元のワークシート名
+        rangeAddr: 移動元の範囲（例: A1:D20）
+        targetCell: 移動先の左上のセル（例: F1）
+        targetSheetName: 移動先のワークシート名（省略時は sheetName）
+        targetFilePath: 移動先のExcelファイルのパス（省略時は filePath）
+    """
+    try:
+        result = transfer_range(
+            filePath,
+            sheetName,
+            rangeAddr,
+            targetCell,
+            targetSheetName,
+            targetFilePath,
+            includeFormats=True,
+            move=True,
+        )
+        if result["targetRange"] is None:
+            return tool_result(f"範囲 {rangeAddr} に移動するセルがありません。", result)
+        return tool_result(
+            f"範囲 {rangeAddr} を {result['targetSheetName']}!{result['targetRange']} に"
+            f"移動しました（{result['rows']}行 x {result['columns']}列）。",
+            result,
+        )
+    except Exception as e:
+        raise Exception(f"範囲移動エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(SheetDiffResult))
+@dispatched(flushPaths=("otherFilePath",))
+def diff_sheets(
+    filePath: Annotated[str, Field(description="比較元のExcelファイルの絶対パス")],
+    sheetName: Annotated[str, Field(description="比較元のワークシート名")],
+    otherFilePath: Annotated[
+        str,
+        Field(
+            description="比較先のExcelファイルの絶対パス。同じファイル内のシート同士を比較する場合は filePath と同じパス"
+        ),
+    ],
+    otherSheetName: Annotated[
+        str | None,
+        Field(description="比較先のワークシート名。省略時は sheetName と同じ名前"),
+    ] = None,
+    keyColumn: Annotated[
+        str | None,
+        Field(
+            description="行の対応付けに使うキー列（例: A）。省略時は行の内容のハッシュで対応付けます"
+        ),
+    ] = None,
+    compareColumns: Annotated[
+        bool, Field(description="列単位の差分（挿入・削除・変更列）も報告するか")
+    ] = False,
+    maxChanges: Annotated[
+        int, Field(description="報告する変更・削除・挿入行の詳細の最大件数", ge=0)
+    ] = 1000,
+) -> ToolResult:
+    """
+    2つのワークシートを比較し、挿入・削除・変更された行とセルだけを報告します
+
+    各シートを1回ずつストリーミングして行ハッシュを作成し、ハッシュまたはキー列で行を対応付けます。
+    キー列が空白の行と重複したキーの行は、内容が同じ行がなければ削除・挿入として報告します。
+
+    Args:
+        filePath: 比較元のExcelファイルのパス
+        sheetName: 比較元のワークシート名
+        otherFilePath: 比較先のExcelファイルのパス
+        otherSheetName: 比較先のワークシート名（省略時は sheetName）
+        keyColumn: 行の対応付けに使うキー列（例: A）
+        compareColumns: 列単位の差分も報告するか
+        maxChanges: 報告する詳細の最大件数
+    """
+    try:
+        validate_file_path(filePath)
+        validate_file_path(otherFilePath)
+        flush_journal(filePath)
+        flush_journal(otherFilePath)
+
+        key_index = None
+        if keyColumn is not None:
+            key_index = resolve_range_column(keyColumn, 1, 16384) + 1
+
+        result = sheet_diff.diff_sheets(
+            filePath,
+            sheetName,
+            otherFilePath,
+            otherSheetName or sheetName,
+            keyColumn=key_index,
+            compareColumns=compareColumns,
+            maxChanges=maxChanges,
+        )
+
+        return tool_result(
+            f"シート比較結果: 変更 {result['changedRowCount']}行、"
+            f"削除 {result['deletedRowCount']}行、挿入 {result['insertedRowCount']}行",
+            {"diff": result},
+        )
+    except Exception as e:
+        raise Exception(f"シート比較エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(WorkbookDiffResult))
+@dispatched(flushPaths=("otherFilePath",))
+def diff_workbooks(
+    filePath: Annotated[str, Field(description="比較元のExcelファイルの絶対パス")],
+    otherFilePath: Annotated[str, Field(description="比較先のExcelファイルの絶対パス")],
+    keyColumn: Annotated[
+        str | None,
+        Field(
+            description="行の対応付けに使うキー列（例: A）。省略時は行の内容のハッシュで対応付けます"
+        ),
+    ] = None,
+    compareColumns: Annotated[
+        bool, Field(description="列単位の差分（挿入・削除・変更列）も報告するか")
+    ] = False,
+    maxChanges: Annotated[
+        int, Field(description="シートごとに報告する詳細の最大件数", ge=0)
+    ] = 1000,
+) -> ToolResult:
+    """
+    2つのワークブックを比較し、追加・削除されたシートと同名シートごとの差分を報告します
+
+    Args:
+        filePath: 比較元のExcelファイルのパス
+        otherFilePath: 比較先のExcelファイルのパス
+        keyColumn: 行の対応付けに使うキー列（例: A）
+        compareColumns: 列単位の差分も報告するか
+        maxChanges: シートごとに報告する詳細の最大件数
+    """
+    try:
+        validate_file_path(filePath)
+        validate_file_path(otherFilePath)
+        flush_journal(filePath)
+        flush_journal(otherFilePath)
+
+        key_index = None
+        if keyColumn is not None:
+            key_index = resolve_range_column(keyColumn, 1, 16384) + 1
+
+        old_sheets = openpyxl.load_workbook(filePath, read_only=True)
+        new_sheets = openpyxl.load_workbook(otherFilePath, read_only=True)
+        old_names, new_names = old_sheets.sheetnames, new_sheets.sheetnames
+        old_sheets.close()
+        new_sheets.close()
+
+        sheets = {}
+        for name in old_names:
+            if name not in new_names:
+                continue
+            diff = sheet_diff.diff_sheets(
+                filePath,
+                name,
+                otherFilePath,
+                name,
+                keyColumn=key_index,
+                compareColumns=compareColumns,
+                maxChanges=maxChanges,
+            )
+            if (
+                diff["changedRowCount"]
+                or diff["deletedRowCount"]
+                or diff["insertedRowCount"]
+            ):
+                sheets[name] = diff
+
+        result = {
+            "removedSheets": [name for name in old_names if name not in new_names],
+            "addedSheets": [name for name in new_names if name not in old_names],
+            "changedSheets": sheets,
+        }
+
+        return tool_result(
+            f"ワークブック比較結果: 削除されたシート {len(result['removedSheets'])}個、"
+            f"追加されたシート {len(result['addedSheets'])}個、"
+            f"差分のあるシート {len(sheets)}個",
+            result,
+        )
+    except Exception as e:
+        raise Exception(f"ワークブック比較エラー: {e}")
+
+
+@mcp.tool(output_schema=output_schema(SavedWorkbookResult))
+@dispatched
+def save_workbook(
+    filePath: Annotated[str, Field(description="Excelファイルの絶対パス")],
+) -> ToolResult:
+    """
+    ジャーナルモードで保留中の変更をExcelファイルに保存します
+
+    Args:
+        filePath: Excelファイルのパス
+    """
+    try:
+        validate_file_path(filePath)
+
+        applied = compact_workbook(filePath)
+
+        return tool_result(
+            f"ワークブック '{filePath}' を保存しました（反映した変更: {applied}件）。",
+            {"filePath": filePath, "appliedChanges": applied},
+        )
+    except Exception as e:
+        raise Exception(f"ワークブック保存エラー: {e}")
 
 
-def main():
+def server_stats() -> dict:
+    """このプロセスのキャッシュ統計"""
+    return {
+        "responseCache": response_cache.stats(),
+        "cachedWorkbooks": workbook_cache.size(),
+        "pendingJournals": len(mutation_journal.pending_files()),
+        "memory": {**memory_governor.stats(), "rssBytes": process_rss()},
+    }
+
+
+def process_rss() -> int | None:
+    """このプロセスの現在の常駐メモリ量（取得できない環境では None）"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+TOOL_FUNCTIONS["server_stats"] = server_stats
+
+
+def merge_stats(total: dict, stats: dict) -> None:
+    """ワーカーの統計を合計に加算（入れ子の辞書は項目ごとに合算）"""
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            merge_stats(total.setdefault(name, {}), value)
+        elif value is not None:
+            total[name] = total.get(name, 0) + value
+
+
+@mcp.tool(output_schema=output_schema(ServerStatsResult))
+def get_server_stats() -> ToolResult:
+    """
+    サーバーのキャッシュ統計を取得します（応答キャッシュのヒット数・ミス数、メモリ使用量など）
+    """
+    try:
+        if worker_pool is None:
+            stats = server_stats()
+        else:
+            # ワーカーごとの統計を合算する
+            stats = {
+                "responseCache": {},
+                "cachedWorkbooks": 0,
+                "pendingJournals": 0,
+                "memory": {},
+            }
+            for worker_stats in worker_pool.broadcast("server_stats", {}):
+                merge_stats(stats, worker_stats)
+
+        cache = stats["responseCache"]
+        lookups = cache["hits"] + cache["misses"]
+        cache["hitRate"] = round(cache["hits"] / lookups, 4) if lookups else 0.0
+
+        return tool_result(
+            f"サーバー統計: 応答キャッシュのヒット率 {cache['hitRate']:.1%}、"
+            f"キャッシュ中のワークブック {stats['cachedWorkbooks']}個、"
+            f"保留中のジャーナル {stats['pendingJournals']}件",
+            stats,
+        )
+    except Exception as e:
+        raise Exception(f"サーバー統計取得エラー: {e}")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """コマンドライン引数を解析"""
+    parser = argparse.ArgumentParser(description="Excel MCP Server")
+    parser.add_argument(
+        "--durability",
+        choices=["save", "journal"],
+        default=SERVER_CONFIG.durability,
+        help="変更の永続化方式（save: 毎回xlsxを保存、journal: ジャーナルに追記して後でまとめて保存）",
+    )
+    parser.add_argument(
+        "--journal-dir",
+        default=SERVER_CONFIG.journal_dir,
+        help="ジャーナルファイルの保存先ディレクトリ",
+    )
+    parser.add_argument(
+        "--compact-interval",
+        type=float,
+        default=SERVER_CONFIG.compact_interval,
+        help="ジャーナルをxlsxへ反映する間隔（秒）",
+    )
+    parser.add_argument(
+        "--compact-threshold",
+        type=int,
+        default=SERVER_CONFIG.compact_threshold,
+        help="この件数の変更が溜まったらすぐにxlsxへ反映",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=SERVER_CONFIG.cache_size,
+        help="メモリ上に保持するワークブック数（0でキャッシュ無効）",
+    )
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=SERVER_CONFIG.memory_budget // (1024 * 1024),
+        help="読み込んだワークブックと応答キャッシュのメモリ予算（MB、0で無制限）。超える場合は古いキャッシュを解放し、それでも足りなければ読み込みを待機・拒否",
+    )
+    parser.add_argument(
+        "--memory-wait",
+        type=float,
+        default=SERVER_CONFIG.memory_wait,
+        help="メモリ予算が空くのを待つ最大時間（秒）",
+    )
+    parser.add_argument(
+        "--full-save",
+        action="store_true",
+        help="部分保存（変更されたシートのXMLだけを書き直す保存）を使わず、毎回xlsx全体を保存",
+    )
+    parser.add_argument(
+        "--lazy-sheets",
+        action="store_true",
+        help="ワークシートを初めてアクセスされた時点で読み込む（使わないシートは解析せず、保存時もそのままコピー）",
+    )
+    parser.add_argument(
+        "--response-cache-size",
+        type=int,
+        default=SERVER_CONFIG.response_cache_size,
+        help="読み取りツールの応答キャッシュの最大件数（0でキャッシュ無効）",
+    )
+    parser.add_argument(
+        "--response-cache-mb",
+        type=int,
+        default=SERVER_CONFIG.response_cache_bytes // (1024 * 1024),
+        help="読み取りツールの応答キャッシュの最大サイズ（MB）",
+    )
+    parser.add_argument(
+        "--reader-engine",
+        choices=READER_ENGINES,
+        default=SERVER_CONFIG.reader_engine,
+        help="読み取りエンジン（calamine: python-calamineによる高速な読み取り専用エンジン、auto: 大きなファイルのみcalamineを使用）",
+    )
+    parser.add_argument(
+        "--reader-auto-mb",
+        type=int,
+        default=SERVER_CONFIG.reader_auto_bytes // (1024 * 1024),
+        help="--reader-engine auto でcalamineを使うファイルサイズ（MB）",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=SERVER_CONFIG.workers,
+        help="ツール呼び出しを振り分けるワーカープロセス数（ファイルパスごとに担当ワーカーを固定。0でプロセス内実行）",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="開いたワークブックのファイルを監視し、外部で変更されたらキャッシュを無効化（呼び出しごとのファイル確認を省略）",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=SERVER_CONFIG.watch_interval,
+        help="ファイル監視の確認間隔（秒）",
+    )
+    parser.add_argument(
+        "--watch-polling",
+        action="store_true",
+        help="OSの変更通知を使わずポーリングで監視（ネットワーク共有など）",
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="キャッシュ済みのファイルが外部で変更されたらバックグラウンドで再読み込み",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=PROFILE_MODES,
+        default=SERVER_CONFIG.profile_mode or None,
+        help="すべてのツール呼び出しをプロファイル（cprofile: 決定的プロファイル、sample: サンプリング）",
+    )
+    parser.add_argument(
+        "--profile-dir",
+        default=SERVER_CONFIG.profile_dir,
+        help="プロファイル結果の保存先。指定すると要求の _meta の profile で呼び出しごとに計測可能（--profile のみ指定時は ~/.excel_mcp_server/profiles）",
+    )
+    parser.add_argument(
+        "--no-summary",
+        action="store_true",
+        help="ツールの戻り値を構造化データ（structuredContent）のみとし、要約の文章を省略",
+    )
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http", "sse"],
+        default=SERVER_CONFIG.transport,
+        help="MCPトランスポート（http: 複数クライアントで共有できる常駐サーバー）",
+    )
+    parser.add_argument(
+        "--host",
+        default=SERVER_CONFIG.host,
+        help="HTTP/SSEモードで待ち受けるホスト",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVER_CONFIG.port,
+        help="HTTP/SSEモードで待ち受けるポート",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=SERVER_CONFIG.max_concurrency,
+        help="同時に実行するツール呼び出しの上限（0で無制限）",
+    )
+    return parser.parse_args(argv)
+
+
+class ConcurrencyLimitMiddleware(Middleware):
+    """同時に実行するツール呼び出しの数を制限するミドルウェア"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore: asyncio.Semaphore | None = None
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.limit)
+        async with self._semaphore:
+            return await call_next(context)
+
+
+@mcp.custom_route("/health", methods=["GET"])
+async def health_check(request: Request) -> JSONResponse:
+    """HTTPモードの死活監視用エンドポイント"""
+    return JSONResponse(
+        {
+            "status": "ok",
+            "transport": SERVER_CONFIG.transport,
+            "workers": worker_pool.size if worker_pool is not None else 0,
+            "maxConcurrency": SERVER_CONFIG.max_concurrency,
+            "durability": SERVER_CONFIG.durability,
+        }
+    )
+
+
+def apply_server_config(**options) -> None:
+    """サーバー設定を反映（ワーカープロセスの初期化でも使用）"""
+    configure(**options)
+    workbook_cache.configure(SERVER_CONFIG.cache_size)
+    response_cache.configure(
+        SERVER_CONFIG.response_cache_size, SERVER_CONFIG.response_cache_bytes
+    )
+    mutation_journal.configure(SERVER_CONFIG.journal_dir)
+    memory_governor.configure(SERVER_CONFIG.memory_budget, SERVER_CONFIG.memory_wait)
+
+
+def start_background_services() -> None:
+    """ジャーナルモードのバックグラウンドコンパクションとファイル監視を開始"""
+    global journal_compactor, workbook_watcher
+
+    if SERVER_CONFIG.durability == "journal" and journal_compactor is None:
+        journal_compactor = JournalCompactor(
+            mutation_journal,
+            compact_workbook,
+            SERVER_CONFIG.compact_interval,
+            SERVER_CONFIG.compact_threshold,
+        )
+        journal_compactor.start()
+
+    if SERVER_CONFIG.watch and workbook_watcher is None:
+        workbook_watcher = WorkbookWatcher(
+            handle_file_change,
+            SERVER_CONFIG.watch_interval,
+            SERVER_CONFIG.watch_polling,
+        )
+        workbook_watcher.start()
+        # 外部での変更は監視で検知するため、呼び出しごとのファイル確認を省く
+        workbook_cache.verify = False
+        response_cache.verify = False
+
+
+def stop_watcher() -> None:
+    """ファイル監視を停止し、呼び出しごとのファイル確認に戻す"""
+    global workbook_watcher
+
+    if workbook_watcher is not None:
+        workbook_watcher.stop()
+        workbook_watcher = None
+    workbook_cache.verify = True
+    response_cache.verify = True
+
+
+def shutdown_services() -> None:
+    """終了時に保留中のジャーナルを反映し、ワーカーを停止"""
+    global worker_pool
+
+    workbook_export.shutdown_pool()
+
+    if worker_pool is not None:
+        worker_pool.broadcast("compact_pending_journals", {})
+        worker_pool.shutdown()
+        worker_pool = None
+        return
+
+    stop_watcher()
+    if journal_compactor is not None:
+        journal_compactor.stop()
+    compact_pending_journals()
+
+
+def main(argv: list[str] | None = None):
     """メイン関数"""
-    mcp.run()
+    global worker_pool
+
+    args = parse_args(argv)
+    if args.reader_engine == "calamine" and not calamine_available():
+        raise SystemExit(
+            "--reader-engine calamine を使うには python-calamine をインストールしてください"
+        )
+    options = {
+        "durability": args.durability,
+        "journal_dir": args.journal_dir,
+        "compact_interval": args.compact_interval,
+        "compact_threshold": args.compact_threshold,
+        "cache_size": args.cache_size,
+        "incremental_save": not args.full_save,
+        "memory_budget": args.memory_budget_mb * 1024 * 1024,
+        "memory_wait": args.memory_wait,
+        "lazy_sheets": args.lazy_sheets,
+        "reader_engine": args.reader_engine,
+        "reader_auto_bytes": args.reader_auto_mb * 1024 * 1024,
+        "response_cache_size": args.response_cache_size,
+        "response_cache_bytes": args.response_cache_mb * 1024 * 1024,
+        "workers": args.workers,
+        "watch": args.watch,
+        "watch_interval": args.watch_interval,
+        "watch_polling": args.watch_polling,
+        "prewarm": args.prewarm,
+        "transport": args.transport,
+        "host": args.host,
+        "port": args.port,
+        "max_concurrency": args.max_concurrency,
+        "result_summary": not args.no_summary,
+        "profile_mode": args.profile or "",
+        "profile_dir": args.profile_dir
+        or (default_profile_dir() if args.profile else ""),
+    }
+    apply_server_config(**options)
+
+    recover_journals()
+    if SERVER_CONFIG.workers > 0:
+        worker_pool = StickyWorkerPool(SERVER_CONFIG.workers, options)
+    else:
+        start_background_services()
+    atexit.register(shutdown_services)
+
+    if SERVER_CONFIG.max_concurrency > 0:
+        mcp.add_middleware(ConcurrencyLimitMiddleware(SERVER_CONFIG.max_concurrency))
+
+    if SERVER_CONFIG.transport == "stdio":
+        mcp.run()
+    else:
+        # 1つの常駐プロセスを複数のクライアントで共有し、キャッシュも共有する
+        mcp.run(
+            transport=SERVER_CONFIG.transport,
+            host=SERVER_CONFIG.host,
+            port=SERVER_CONFIG.port,
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+"""
+読み込んだワークブックのメモリ予算の管理
+
+複数のエージェントが大きなファイルを開くとサーバーのメモリが不足するため、
+openpyxl で読み込む前にメモリ使用量を見積もり、設定した予算に収まるよう
+キャッシュを古いものから解放します。解放できるものがなく、他の読み込みが
+予約している分が空くのを待っても収まらない場合は MemoryBudgetError を送出します。
+
+見積もりには、各シートの <dimension> 要素の範囲と展開後のXMLの大きさを使います。
+読み込み後の使用量は、キャッシュ済みワークブックのセル数から概算します。
+"""
+
+import re
+import threading
+import time
+import zipfile
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+
+# openpyxl のセル1個あたりのメモリ（値・書式の参照を含む実測値）
+CELL_BYTES = 400
+# シートXMLのセル1個あたりの最小バイト数（共有文字列を使う場合の目安）
+CELL_XML_BYTES = 30
+# ワークブック1つあたりの固定的なメモリ（書式・テーマ・定義名など）
+WORKBOOK_OVERHEAD = 1024 * 1024
+# 共有文字列XMLに対するメモリの倍率
+SHARED_STRINGS_FACTOR = 2
+# <dimension> 要素を探すシートXMLの先頭部分の大きさ
+DIMENSION_SCAN_BYTES = 4096
+
+DIMENSION_PATTERN = re.compile(rb'<(?:\w+:)?dimension\s+ref="([^"]+)"')
+
+
+class MemoryBudgetError(Exception):
+    """メモリ予算を超えるため読み込めない"""
+
+
+def estimate_workbook_bytes(filePath: str, include_sheets: bool = True) -> int:
+    """ファイルを openpyxl で読み込んだ場合のメモリ使用量を見積もる"""
+    total = WORKBOOK_OVERHEAD
+    with zipfile.ZipFile(filePath) as archive:
+        for info in archive.infolist():
+            name = info.filename
+            if name.endswith("sharedStrings.xml"):
+                total += info.file_size * SHARED_STRINGS_FACTOR
+            elif include_sheets and name.startswith("xl/worksheets/sheet"):
+                total += estimate_sheet_cells(archive, info) * CELL_BYTES
+    return total
+
+
+def estimate_sheet_cells(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> int:
+    """シートのセル数を見積もる（範囲の面積とXMLの大きさの小さい方）"""
+    by_size = info.file_size // CELL_XML_BYTES
+    with archive.open(info) as stream:
+        match = DIMENSION_PATTERN.search(stream.read(DIMENSION_SCAN_BYTES))
+    if match is None:
+        return by_size
+    try:
+        min_col, min_row, max_col, max_row = range_boundaries(match.group(1).decode())
+    except (TypeError, ValueError):
+        return by_size
+    by_dimension = (max_col - min_col + 1) * (max_row - min_row + 1)
+    return min(by_dimension, by_size)
+
+
+def workbook_memory(workbook: Workbook) -> int:
+    """読み込み済みワークブックのメモリ使用量の概算（読み込まれたセル数から計算）"""
+    cells = sum(
+        len(sheet._cells) for sheet in workbook._sheets if isinstance(sheet, Worksheet)
+    )
+    return WORKBOOK_OVERHEAD + cells * CELL_BYTES
+
+
+@dataclass
+class MemoryConsumer:
+    """メモリを使うキャッシュ（使用量の取得と、最も古い要素の解放）"""
+
+    usage: Callable[[], int]
+    release: Callable[[], bool]
+
+
+class MemoryGovernor:
+    """キャッシュのメモリ使用量と読み込み中の予約量を予算内に抑える"""
+
+    def __init__(self, budget_bytes: int = 0, wait_seconds: float = 30.0):
+        self.budget_bytes = budget_bytes
+        self.wait_seconds = wait_seconds
+        self.reserved_bytes = 0
+        self.evictions = 0
+        self.rejections = 0
+        self.waits = 0
+        # 解放の優先順（先に登録したものから解放する）
+        self._consumers: dict[str, MemoryConsumer] = {}
+        self._condition = threading.Condition()
+
+    def configure(self, budget_bytes: int, wait_seconds: float) -> None:
+        """予算と待機時間を変更"""
+        with self._condition:
+            self.budget_bytes = budget_bytes
+            self.wait_seconds = wait_seconds
+            self._condition.notify_all()
+
+    @property
+    def enabled(self) -> bool:
+        """予算が設定されているか（0の場合は見積もりも行わない）"""
+        return self.budget_bytes > 0
+
+    def register(
+        self, name: str, usage: Callable[[], int], release: Callable[[], bool]
+    ) -> None:
+        """メモリを使うキャッシュを登録"""
+        self._consumers[name] = MemoryConsumer(usage, release)
+
+    def used_bytes(self) -> int:
+        """登録されたキャッシュの合計使用量"""
+        return sum(consumer.usage() for consumer in self._consumers.values())
+
+    @contextmanager
+    def reserve(self, filePath: str, estimate: int) -> Iterator[None]:
+        """
+        読み込みの前に見積もった量を予約する
+
+        予算を超える場合はキャッシュを解放し、それでも足りなければ他の読み込みの
+        完了を待ちます。待っても収まらない場合は MemoryBudgetError を送出します。
+        """
+        if not self.enabled:
+            yield
+            return
+
+        with self._condition:
+            self._admit(filePath, estimate)
+            self.reserved_bytes += estimate
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.reserved_bytes -= estimate
+                self._condition.notify_all()
+
+    def _admit(self, filePath: str, estimate: int) -> None:
+        if estimate > self.budget_bytes:
+            self.rejections += 1
+            raise MemoryBudgetError(
+                f"'{filePath}' の読み込みに必要なメモリ（推定 {to_mb(estimate)}MB）が"
+                f"予算（{to_mb(self.budget_bytes)}MB）を超えています"
+            )
+
+        deadline = time.monotonic() + self.wait_seconds
+        waited = False
+        while self.used_bytes() + self.reserved_bytes + estimate > self.budget_bytes:
+            if self._release_one():
+                continue
+            remaining = deadline - time.monotonic()
+            if self.reserved_bytes == 0 or remaining <= 0:
+                self.rejections += 1
+                raise MemoryBudgetError(
+                    f"メモリ予算が不足しているため '{filePath}' を読み込めません"
+                    f"（推定 {to_mb(estimate)}MB、使用中 {to_mb(self.used_bytes())}MB、"
+                    f"読み込み中 {to_mb(self.reserved_bytes)}MB、"
+                    f"予算 {to_mb(self.budget_bytes)}MB）"
+                )
+            # 他の読み込みが終わればキャッシュとして解放できるようになる
+            if not waited:
+                self.waits += 1
+                waited = True
+            self._condition.wait(remaining)
+
+    def _release_one(self) -> bool:
+        for consumer in self._consumers.values():
+            if consumer.release():
+                self.evictions += 1
+                return True
+        return False
+
+    def stats(self) -> dict:
+        """メモリ使用量の統計"""
+        with self._condition:
+            usage = {
+                name: consumer.usage() for name, consumer in self._consumers.items()
+            }
+            return {
+                "budgetBytes": self.budget_bytes,
+                "usedBytes": sum(usage.values()),
+                "reservedBytes": self.reserved_bytes,
+                "usageBytes": usage,
+                "evictions": self.evictions,
+                "rejections": self.rejections,
+                "waits": self.waits,
+            }
+
+
+def to_mb(size: int) -> str:
+    """バイト数をMB表記に変換"""
+    return f"{size / (1024 * 1024):.1f}"
@@ -0,0 +1,197 @@
+"""
+ツール呼び出し単位のプロファイリング
+
+特定のワークブックでだけ遅い呼び出しの原因を、手元で再現せずに調べるための仕組みです。
+サーバーオプション --profile ですべての呼び出しを、要求の _meta に
+{"profile": "cprofile" | "sample" | true} を指定するとその呼び出しだけを計測し、
+--profile-dir のディレクトリに「ツール名-日時」の名前で次のファイルを保存します。
+
+- cprofile: cProfile による決定的プロファイル（.pstats、pstats / snakeviz で表示）
+- sample: 一定間隔でスタックを採取するサンプリングプロファイル
+  （.collapsed、flamegraph.pl / speedscope で表示できる collapsed stack 形式）
+- どちらの場合も tracemalloc によるメモリ確保の上位（.tracemalloc.txt）
+
+cProfile は Python 3.12 以降ではプロセス全体で1つしか動かせない（sys.monitoring）ため、
+別の呼び出しを cProfile で計測中の場合はサンプリングで計測し、その旨を .warning.txt に
+書き出します。
+
+プロファイル用のディレクトリが設定されていない場合は何も行いません。
+"""
+
+import cProfile
+import os
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from .progress import current_context
+
+PROFILE_MODES = ["cprofile", "sample"]
+# サンプリングの間隔（秒）と、tracemalloc の結果に含める上位の件数
+SAMPLE_INTERVAL = 0.005
+TRACEMALLOC_TOP = 25
+
+# cProfile で計測中の呼び出しがあるか（同時に1つだけ）
+_cprofile_lock = threading.Lock()
+# tracemalloc を使用中の呼び出しの数と、計測をこのモジュールが開始したか
+_tracing_lock = threading.Lock()
+_tracing_calls = 0
+_started_tracing = False
+
+
+def requested_profile_mode(default_mode: str) -> str | None:
+    """
+    この呼び出しで使うプロファイルの種類（計測しない場合は None）
+
+    要求の _meta の profile が優先され、指定がなければサーバーの設定に従います。
+    """
+    context = current_context()
+    request = context.request_context if context is not None else None
+    meta = request.meta if request is not None else None
+    if isinstance(meta, dict):
+        requested = meta.get("profile")
+    else:
+        # mcp 1.x では _meta の追加の項目は pydantic の Meta モデルの属性になる
+        requested = getattr(meta, "profile", None)
+
+    if requested is None or requested is False:
+        return default_mode or None
+    if requested is True:
+        return default_mode or "cprofile"
+    if requested not in PROFILE_MODES:
+        raise ValueError(
+            f"不明なプロファイルの種類です: {requested}（{', '.join(PROFILE_MODES)}）"
+        )
+    return requested
+
+
+def profile_call(name: str, mode: str, directory: str, call: Callable[[], Any]) -> Any:
+    """call をプロファイラーの下で実行し、結果のファイルを directory に保存"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    base = os.path.join(directory, f"{name}-{stamp}")
+
+    if mode == "cprofile" and not _cprofile_lock.acquire(blocking=False):
+        mode = "sample"
+        save_profile(
+            lambda path: write_text(
+                path,
+                "別の呼び出しを cProfile で計測中のため、サンプリングで計測しました\n",
+            ),
+            f"{base}.warning.txt",
+        )
+
+    start_tracing()
+    try:
+        if mode == "sample":
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+            try:
+                return call()
+            finally:
+                sampler.stop()
+                save_profile(sampler.write, f"{base}.collapsed")
+        else:
+            profiler = cProfile.Profile()
+            try:
+                return profiler.runcall(call)
+            finally:
+                _cprofile_lock.release()
+                save_profile(profiler.dump_stats, f"{base}.pstats")
+    finally:
+        save_profile(
+            lambda path: write_allocations(path, tracemalloc.take_snapshot()),
+            f"{base}.tracemalloc.txt",
+        )
+        stop_tracing()
+        print(f"プロファイルを保存しました: {base}.*", file=sys.stderr)
+
+
+def start_tracing() -> None:
+    """
+    tracemalloc の計測を開始（プロセス全体で共有されるため、計測中の呼び出しの数を数える）
+
+    最初の呼び出しが計測を開始した場合だけ、最後の呼び出しの終了時に計測を停止します。
+    """
+    global _tracing_calls, _started_tracing
+    with _tracing_lock:
+        if _tracing_calls == 0:
+            _started_tracing = not tracemalloc.is_tracing()
+            if _started_tracing:
+                tracemalloc.start()
+        _tracing_calls += 1
+
+
+def stop_tracing() -> None:
+    """start_tracing() に対応する計測の終了"""
+    global _tracing_calls
+    with _tracing_lock:
+        _tracing_calls -= 1
+        if _tracing_calls == 0 and _started_tracing:
+            tracemalloc.stop()
+
+
+def save_profile(write: Callable[[str], None], path: str) -> None:
+    """プロファイルの結果を保存（失敗してもツールの結果やエラーを置き換えない）"""
+    try:
+        write(path)
+    except Exception as e:
+        print(f"プロファイルを保存できませんでした: {path}: {e}", file=sys.stderr)
+
+
+def write_text(path: str, text: str) -> None:
+    """文字列をファイルに書き出す"""
+    with open(path, "w", encoding="utf-8") as output:
+        output.write(text)
+
+
+def write_allocations(path: str, snapshot: tracemalloc.Snapshot) -> None:
+    """メモリ確保の多い行の上位を書き出す"""
+    stats = snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    ).statistics("lineno")
+    with open(path, "w", encoding="utf-8") as output:
+        total = sum(stat.size for stat in stats)
+        output.write(f"確保中のメモリ合計: {total / 1024:.1f} KiB\n")
+        for stat in stats[:TRACEMALLOC_TOP]:
+            output.write(f"{stat}\n")
+
+
+class StackSampler(threading.Thread):
+    """対象スレッドのスタックを一定間隔で採取するサンプリングプロファイラー"""
+
+    def __init__(self, thread_id: int, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        """採取を終了"""
+        self._stopped.set()
+        self.join()
+
+    def write(self, path: str) -> None:
+        """collapsed stack 形式（スタック 回数）で書き出す"""
+        with open(path, "w", encoding="utf-8") as output:
+            for stack, count in self.samples.most_common():
+                output.write(f"{stack} {count}\n")
@@ -0,0 +1,97 @@
+"""
+長時間のツールの進捗通知・キャンセル・制限時間
+
+同期関数のツールは FastMCP によってワーカースレッドで実行されます。行のまとまり
+（チャンク）を処理するごとに ProgressReporter.advance() を呼ぶと、
+
+- MCPクライアントへ進捗通知（処理済み件数 / 全体件数）を送り
+- クライアントが要求をキャンセルしていれば処理を中断し
+- 呼び出しごとの制限時間を過ぎていれば TimeoutError で中断します
+
+MCPの要求の外（テストやワーカープロセス）から呼ばれた場合は進捗通知を行わず、
+イベントループのワーカースレッド以外ではキャンセルの確認も行いません。
+"""
+
+import time
+from collections.abc import Iterable, Iterator
+from typing import TypeVar
+
+import anyio.from_thread
+from fastmcp.server.context import Context
+from fastmcp.server.dependencies import get_context
+
+# 進捗を確認する行数の単位と、進捗通知の最小間隔（秒）
+PROGRESS_CHUNK_ROWS = 1000
+PROGRESS_INTERVAL = 0.5
+
+T = TypeVar("T")
+
+
+def current_context() -> Context | None:
+    """実行中のMCP要求のコンテキスト（要求の外では None）"""
+    try:
+        return get_context()
+    except RuntimeError:
+        return None
+
+
+class ProgressReporter:
+    """処理済み件数の通知とキャンセル・制限時間の確認"""
+
+    def __init__(self, total: int | None = None, timeoutSeconds: float | None = None):
+        self.total = total
+        self.done = 0
+        self.timeout = timeoutSeconds
+        self.deadline = (
+            time.monotonic() + timeoutSeconds if timeoutSeconds is not None else None
+        )
+        self.context = current_context()
+        self._last_report = 0.0
+        self._in_worker_thread = True
+
+    def advance(self, count: int, message: str | None = None) -> None:
+        """count 件の処理が終わったことを記録し、中断の要否を確認する"""
+        self.done += count
+        self.check()
+
+        now = time.monotonic()
+        if self.context is not None and (
+            now - self._last_report >= PROGRESS_INTERVAL or self.done == self.total
+        ):
+            self._last_report = now
+            self._report(message)
+
+    def track(self, items: Iterable[T], message: str | None = None) -> Iterator[T]:
+        """要素を順に返しながら、PROGRESS_CHUNK_ROWS 件ごとに advance() を呼ぶ"""
+        pending = 0
+        for item in items:
+            yield item
+            pending += 1
+            if pending == PROGRESS_CHUNK_ROWS:
+                self.advance(pending, message)
+                pending = 0
+        if pending:
+            self.advance(pending, message)
+
+    def check(self) -> None:
+        """キャンセルされた、または制限時間を過ぎた場合に例外を送出"""
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise TimeoutError(
+                f"制限時間（{self.timeout}秒）を超えたため処理を中断しました"
+                f"（{self.done}件処理済み）"
+            )
+        if self._in_worker_thread:
+            try:
+                # クライアントがキャンセルした場合はキャンセル例外が送出される
+                anyio.from_thread.check_cancelled()
+            except RuntimeError:
+                # ワーカースレッドの外（新しい anyio では派生クラスの NoEventLoopError）
+                self._in_worker_thread = False
+
+    def _report(self, message: str | None) -> None:
+        try:
+            anyio.from_thread.run(
+                self.context.report_progress, self.done, self.total, message
+            )
+        except RuntimeError:
+            self.context = None
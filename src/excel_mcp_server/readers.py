@@ -0,0 +1,249 @@
+"""
+読み取り用のリーダーバックエンド
+
+読み取りツール（get_range_values, get_column_values, find_data, profile_sheet, export_to_csv,
+get_workbook_info）はこのモジュールのリーダーを通してセルの値を取得します。
+
+- openpyxl: メモリ上のワークブック（キャッシュ・未反映のジャーナルを含む）から読み取る
+- calamine: python-calamine（任意の依存パッケージ）でファイルを直接読み取る高速な読み取り専用エンジン
+
+書き込みや書式の操作には常に openpyxl が使われます。calamine は数式のセルの数式を
+読み取れない（最後に計算された値、または未計算の場合は空白になる）ため、数式を含む
+ファイルは calamine を選択した場合も openpyxl で読み取ります（has_formulas）。
+どちらのエンジンでも、使用範囲は値のあるセルだけから求めます（書式だけのセルは含まない）。
+"""
+
+import functools
+import os
+import re
+import zipfile
+from collections.abc import Iterator
+from datetime import date, datetime
+from typing import Any
+
+from openpyxl.workbook import Workbook
+
+from .addressing import CellRange, read_range_values, read_windows
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # pragma: no cover - 任意の依存パッケージ
+    CalamineWorkbook = None
+
+READER_ENGINES = ("openpyxl", "calamine", "auto")
+
+# calamine が整数値を浮動小数点数で返す場合に、openpyxl と同じく整数として扱う上限
+INTEGRAL_FLOAT_LIMIT = 10**15
+# stream_rows() で1回に読み取る行数
+STREAM_WINDOW_ROWS = 10000
+
+# シートのXMLの数式の要素（<f>, <f t="shared" ...>, <x:f> など）
+FORMULA_ELEMENT = re.compile(rb"<(?:[A-Za-z_][\w.-]*:)?f[\s/>]")
+# 数式を探すときに1回に展開するバイト数
+FORMULA_SCAN_BYTES = 1 << 20
+
+
+def calamine_available() -> bool:
+    """calamine エンジンが利用可能か"""
+    return CalamineWorkbook is not None
+
+
+def has_formulas(filePath: str) -> bool:
+    """ファイルのいずれかのワークシートに数式のセルがあるか（ファイルの内容ごとに1回だけ調べる）"""
+    stat = os.stat(filePath)
+    return _scan_formulas(os.path.abspath(filePath), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=64)
+def _scan_formulas(filePath: str, mtime_ns: int, size: int) -> bool:
+    """シートのXMLを解析せずに、展開したバイト列から数式の要素を探す"""
+    with zipfile.ZipFile(filePath) as archive:
+        for name in archive.namelist():
+            if not (name.startswith("xl/worksheets/") and name.endswith(".xml")):
+                continue
+            with archive.open(name) as part:
+                tail = b""
+                while chunk := part.read(FORMULA_SCAN_BYTES):
+                    if FORMULA_ELEMENT.search(tail + chunk):
+                        return True
+                    tail = chunk[-64:]
+    return False
+
+
+class WorkbookReader:
+    """読み取り専用リーダーの共通インターフェース"""
+
+    engine = ""
+
+    @property
+    def sheet_names(self) -> list[str]:
+        """シート名の一覧"""
+        raise NotImplementedError
+
+    def dimensions(self, sheetName: str) -> tuple[int, int]:
+        """シートの使用範囲の (最終行, 最終列)"""
+        raise NotImplementedError
+
+    def read_range(self, sheetName: str, cell_range: CellRange) -> list[list[Any]]:
+        """範囲内の値を行単位で取得（範囲は使用範囲に切り詰め済みであること）"""
+        raise NotImplementedError
+
+    def read_windows(
+        self, sheetName: str, cell_ranges: list[CellRange]
+    ) -> list[list[list[Any]]]:
+        """同じシートの複数の範囲の値をまとめて取得"""
+        return [self.read_range(sheetName, cell_range) for cell_range in cell_ranges]
+
+    def iter_rows(self, sheetName: str) -> Iterator[tuple[Any, ...]]:
+        """1行目から使用範囲の最終行まで、最終列までの値を行ごとに返す"""
+        max_row, max_col = self.dimensions(sheetName)
+        for row in self.read_range(sheetName, CellRange(1, 1, max_col, max_row)):
+            yield tuple(row)
+
+    def stream_rows(self, sheetName: str) -> Iterator[list[Any]]:
+        """
+        1行目からの値を行ごとに返す（末尾の空白セルは含まない）
+
+        iter_rows() と異なり、シート全体の値を一度に取り出さずに STREAM_WINDOW_ROWS 行ずつ
+        読み取ります。
+        """
+        max_row, max_col = self.dimensions(sheetName)
+        for start in range(1, max_row + 1, STREAM_WINDOW_ROWS):
+            end = min(start + STREAM_WINDOW_ROWS - 1, max_row)
+            for row in self.read_range(sheetName, CellRange(1, start, max_col, end)):
+                while row and row[-1] is None:
+                    row.pop()
+                yield row
+
+    def clip(self, sheetName: str, cell_range: CellRange) -> CellRange | None:
+        """範囲を使用範囲の右下端までに切り詰める（範囲外の場合は None）"""
+        max_row, max_col = self.dimensions(sheetName)
+        max_row = min(cell_range.max_row, max_row)
+        max_col = min(cell_range.max_col, max_col)
+        if cell_range.min_row > max_row or cell_range.min_col > max_col:
+            return None
+        return CellRange(cell_range.min_col, cell_range.min_row, max_col, max_row)
+
+    def close(self) -> None:
+        """リソースを解放"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class OpenpyxlReader(WorkbookReader):
+    """メモリ上の openpyxl ワークブックから読み取るリーダー"""
+
+    engine = "openpyxl"
+
+    def __init__(self, workbook: Workbook):
+        self.workbook = workbook
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self.workbook.sheetnames)
+
+    def dimensions(self, sheetName: str) -> tuple[int, int]:
+        # max_row / max_column は書式だけのセルも含むため、calamine と同じく値のあるセルで求める
+        max_row = max_col = 1
+        for (row, column), cell in self.workbook[sheetName]._cells.items():
+            if cell._value is not None:
+                max_row = max(max_row, row)
+                max_col = max(max_col, column)
+        return max_row, max_col
+
+    def read_range(self, sheetName: str, cell_range: CellRange) -> list[list[Any]]:
+        return read_range_values(self.workbook[sheetName], cell_range)
+
+    def read_windows(
+        self, sheetName: str, cell_ranges: list[CellRange]
+    ) -> list[list[list[Any]]]:
+        # 行の昇順に1回だけ走査する
+        return read_windows(self.workbook[sheetName], cell_ranges)
+
+
+def normalize_calamine_value(value: Any) -> Any:
+    """calamine の値を openpyxl と同じ表現にそろえる"""
+    if value == "":
+        return None
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < INTEGRAL_FLOAT_LIMIT:
+            return int(value)
+        return value
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+class CalamineReader(WorkbookReader):
+    """python-calamine でファイルを直接読み取る高速なリーダー"""
+
+    engine = "calamine"
+
+    def __init__(self, filePath: str):
+        if CalamineWorkbook is None:
+            raise RuntimeError(
+                "calamine エンジンを使うには python-calamine をインストールしてください"
+            )
+        self._workbook = CalamineWorkbook.from_path(filePath)
+        self._rows: dict[str, list[list[Any]]] = {}
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self._workbook.sheet_names)
+
+    def dimensions(self, sheetName: str) -> tuple[int, int]:
+        rows = self._sheet_rows(sheetName)
+        # 空のシートは openpyxl と同じく 1行 x 1列 として扱う
+        return max(len(rows), 1), max((len(row) for row in rows), default=0) or 1
+
+    def read_range(self, sheetName: str, cell_range: CellRange) -> list[list[Any]]:
+        rows = self._sheet_rows(sheetName)
+        width = cell_range.max_col - cell_range.min_col + 1
+        values = []
+        for row in range(cell_range.min_row - 1, cell_range.max_row):
+            source = rows[row] if row < len(rows) else []
+            window = source[cell_range.min_col - 1 : cell_range.max_col]
+            values.append(window + [None] * (width - len(window)))
+        return values
+
+    def stream_rows(self, sheetName: str) -> Iterator[list[Any]]:
+        # 読み込み済みでなければ、行の値を Python のリストにまとめずに1行ずつ変換する
+        if sheetName in self._rows:
+            yield from (list(row) for row in self._rows[sheetName])
+            return
+        if sheetName not in self.sheet_names:
+            raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+        sheet = self._workbook.get_sheet_by_name(sheetName)
+        # iter_rows() は1行目から返すが、列は使用範囲の最初の列から始まる
+        padding = [None] * sheet.start[1] if sheet.start else []
+        for raw in sheet.iter_rows():
+            row = padding + [normalize_calamine_value(value) for value in raw]
+            while row and row[-1] is None:
+                row.pop()
+            yield row
+
+    def close(self) -> None:
+        self._rows.clear()
+        self._workbook.close()
+
+    def _sheet_rows(self, sheetName: str) -> list[list[Any]]:
+        """シート全体の値（末尾の空白行・空白セルを除く）を1回だけ読み込む"""
+        rows = self._rows.get(sheetName)
+        if rows is None:
+            if sheetName not in self.sheet_names:
+                raise ValueError(f"ワークシート '{sheetName}' が見つかりません。")
+            sheet = self._workbook.get_sheet_by_name(sheetName)
+            rows = []
+            for raw in sheet.to_python(skip_empty_area=False):
+                row = [normalize_calamine_value(value) for value in raw]
+                while row and row[-1] is None:
+                    row.pop()
+                rows.append(row)
+            while rows and not rows[-1]:
+                rows.pop()
+            self._rows[sheetName] = rows
+        return rows
@@ -0,0 +1,172 @@
+"""
+読み取りツールの応答キャッシュ
+
+(ツール名, 引数, ファイルのフィンガープリント) をキーにツールの戻り値を保持します。
+同じファイルへの変更ツールの実行時、またはファイルが外部で変更された時点で
+自動的に無効になります。件数と合計バイト数の上限を超えると古いものから削除します。
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import pydantic_core
+from pydantic import BaseModel
+
+from .results import ToolResult
+from .workbook_cache import Fingerprint, file_fingerprint, normalize_path
+
+ResponseKey = tuple[str, str, str]
+
+
+@dataclass
+class ResponseEntry:
+    """キャッシュされた応答"""
+
+    response: Any
+    fingerprint: Fingerprint | None
+    size: int
+
+
+def response_size(response: Any) -> int:
+    """応答のバイト数（構造化された戻り値はJSONにした場合の大きさ）"""
+    if isinstance(response, ToolResult):
+        # fastmcp のバージョンによって ToolResult は pydantic のモデルではない
+        response = [response.content, response.structured_content]
+    if isinstance(response, (BaseModel, list, dict)):
+        return len(pydantic_core.to_json(response, fallback=str))
+    return len(str(response).encode("utf-8"))
+
+
+class ResponseCache:
+    """LRU方式・バイト数上限付きの応答キャッシュ"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # False の場合は呼び出しごとのファイル確認を省く（ファイル監視で無効化する場合）
+        self.verify = True
+        self._entries: OrderedDict[ResponseKey, ResponseEntry] = OrderedDict()
+        self._keys_by_path: dict[str, set[ResponseKey]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries: int, max_bytes: int) -> None:
+        """上限を変更"""
+        with self._lock:
+            self.max_entries = max_entries
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def make_key(self, tool: str, filePath: str, arguments: dict) -> ResponseKey:
+        """ツール名と引数からキャッシュキーを作成"""
+        return (
+            normalize_path(filePath),
+            tool,
+            json.dumps(arguments, ensure_ascii=False, sort_keys=True, default=str),
+        )
+
+    def get(self, key: ResponseKey) -> Any | None:
+        """フィンガープリントが一致する場合のみキャッシュ済みの応答を返す"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if (
+                entry is not None
+                and self.verify
+                and entry.fingerprint != file_fingerprint(key[0])
+            ):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.response
+
+    def put(
+        self, key: ResponseKey, response: Any, fingerprint: Fingerprint | None
+    ) -> None:
+        """応答をキャッシュに登録（上限を超える大きさの応答は保持しない）"""
+        size = response_size(response)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = ResponseEntry(response, fingerprint, size)
+            self._keys_by_path.setdefault(key[0], set()).add(key)
+            self._total_bytes += size
+            self._evict()
+
+    def invalidate(self, filePath: str) -> None:
+        """ファイルに関するすべての応答を削除"""
+        with self._lock:
+            for key in self._keys_by_path.pop(normalize_path(filePath), set()):
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._total_bytes -= entry.size
+
+    def discard_stale(self, filePath: str) -> None:
+        """ファイルの現在の内容と一致しない応答を削除"""
+        key = normalize_path(filePath)
+        fingerprint = file_fingerprint(key)
+        with self._lock:
+            for response_key in list(self._keys_by_path.get(key, ())):
+                if self._entries[response_key].fingerprint != fingerprint:
+                    self._remove(response_key)
+
+    def clear(self) -> None:
+        """すべての応答を削除"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_path.clear()
+            self._total_bytes = 0
+
+    def evict_oldest(self) -> bool:
+        """最も長く使われていない応答を削除し、削除したかを返す"""
+        with self._lock:
+            if not self._entries:
+                return False
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+            return True
+
+    def memory_usage(self) -> int:
+        """保持している応答の合計バイト数"""
+        with self._lock:
+            return self._total_bytes
+
+    def stats(self) -> dict:
+        """ヒット数などの統計情報"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+            }
+
+    def _remove(self, key: ResponseKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._total_bytes -= entry.size
+        keys = self._keys_by_path.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_path[key[0]]
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > max(self.max_entries, 0)
+            or self._total_bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
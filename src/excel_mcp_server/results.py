@@ -0,0 +1,364 @@
+"""
+ツールの構造化された戻り値
+
+各ツールは結果のデータを MCP の structuredContent（型付きの辞書）として返し、
+出力スキーマを tools/list で公開します。テキストの content には結果を要約した
+短い文章だけを入れるため、範囲の値などの大きなデータは1回だけシリアライズされます。
+要約はサーバーオプション --no-summary で省略できます。
+"""
+
+from typing import Any
+
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+from .config import SERVER_CONFIG
+
+try:
+    from fastmcp.tools import ToolResult
+except ImportError:  # fastmcp 2.11〜2.x では fastmcp.tools.tool にのみ定義されている
+    from fastmcp.tools.tool import ToolResult
+
+# セルの値（日付・時刻はISO 8601形式の文字列になります）
+CellValue = str | int | float | bool | None
+
+
+def output_schema(result_type: type) -> dict[str, Any]:
+    """結果の型から出力スキーマ（JSON Schema）を作成"""
+    return TypeAdapter(result_type).json_schema()
+
+
+def tool_result(summary: str, data: dict[str, Any]) -> ToolResult:
+    """要約の文章と構造化データからツールの戻り値を作成"""
+    content = summary if SERVER_CONFIG.result_summary else []
+    return ToolResult(content=content, structured_content=data)
+
+
+class WorkbookResult(TypedDict):
+    """ワークブックの作成・保存の結果"""
+
+    filePath: str
+
+
+class SavedWorkbookResult(TypedDict):
+    """保留中の変更の保存結果"""
+
+    filePath: str
+    appliedChanges: int
+
+
+class WorkbookInfoResult(TypedDict):
+    """ワークブックの情報"""
+
+    filePath: str
+    sheetCount: int
+    sheetNames: list[str]
+    fileSize: int
+    modifiedAt: str
+
+
+class SheetResult(TypedDict):
+    """ワークシートの追加結果"""
+
+    sheetName: str
+
+
+class CellResult(TypedDict):
+    """1つのセルの値の取得・設定結果（数式の場合は value が数式の文字列）"""
+
+    sheetName: str
+    cell: str
+    value: CellValue
+
+
+class CellFormatResult(TypedDict):
+    """セルの書式の設定結果"""
+
+    sheetName: str
+    cell: str
+
+
+class RangeWriteResult(TypedDict):
+    """範囲への書き込み結果"""
+
+    sheetName: str
+    startCell: str
+    rows: int
+    columns: int
+
+
+class FormulaFillResult(TypedDict):
+    """数式の一括入力の結果（range は入力した範囲、formula はアンカーのセルの数式）"""
+
+    sheetName: str
+    range: str
+    anchorCell: str
+    formula: str
+    cells: int
+
+
+class CellsWriteResult(TypedDict):
+    """複数セルへの書き込み結果"""
+
+    sheetCount: int
+    cellCount: int
+
+
+class RangeValuesResult(TypedDict):
+    """範囲の値（usedRange は使用範囲に切り詰めた範囲、使用範囲外の場合は None）"""
+
+    sheetName: str
+    range: str
+    usedRange: str | None
+    values: list[list[CellValue]]
+
+
+class HeaderColumn(TypedDict):
+    """見出し名と列名（例: A）"""
+
+    name: str
+    column: str
+
+
+class ColumnValuesResult(TypedDict):
+    """見出し名で指定した列の値（rows は読み取った行の範囲、使用範囲外の場合は None）"""
+
+    sheetName: str
+    headerRow: int
+    columns: list[HeaderColumn]
+    rows: str | None
+    values: list[list[CellValue]]
+
+
+class RangesResult(TypedDict):
+    """複数範囲の値（要求ごとのキー → 2次元配列）"""
+
+    ranges: dict[str, list[list[CellValue]]]
+
+
+class FindResult(TypedDict):
+    """値が見つかったセルの一覧"""
+
+    sheetName: str
+    searchValue: str | int | float
+    cells: list[str]
+
+
+class ColumnProfileResult(TypedDict):
+    """
+    列のプロファイル
+
+    type は値の型（integer / number / string / boolean / datetime / date / time / formula、
+    空白だけの列は empty、混在する場合は mixed）、min / max は最も多い型の値の範囲です。
+    distinctIsEstimate が True の場合、distinctCount は HyperLogLog による推定値です。
+    """
+
+    column: str
+    name: str
+    type: str
+    typeCounts: dict[str, int]
+    nonBlank: int
+    nullRatio: float
+    distinctCount: int
+    distinctIsEstimate: bool
+    min: CellValue
+    max: CellValue
+    samples: list[CellValue]
+
+
+class SheetProfileResult(TypedDict):
+    """シートのプロファイル（tableRange は見出し行を含む表の範囲、空のシートは None）"""
+
+    sheetName: str
+    engine: str
+    tableRange: str | None
+    headerRow: int | None
+    firstDataRow: int | None
+    lastDataRow: int | None
+    dataRows: int
+    blankRows: int
+    columns: list[ColumnProfileResult]
+
+
+class ExportResult(TypedDict):
+    """CSVへのエクスポート結果"""
+
+    sheetName: str
+    csvPath: str
+    rows: int
+
+
+class ExportedSheet(TypedDict):
+    """エクスポートしたシートのファイルと行数・列数・バイト数"""
+
+    sheetName: str
+    file: str
+    rows: int
+    columns: int
+    bytes: int
+
+
+class ExportWorkbookResult(TypedDict):
+    """ワークブック全体のエクスポート結果（manifest.json と同じ内容とそのパス）"""
+
+    source: str
+    outputDir: str
+    format: str
+    headerRow: bool
+    exportedAt: str
+    sheets: list[ExportedSheet]
+    totalRows: int
+    totalBytes: int
+    manifestPath: str
+
+
+class RenderFailure(TypedDict):
+    """作成に失敗したレコード（record はレコードの番号、1始まり）"""
+
+    record: int
+    error: str
+
+
+class RenderTemplateResult(TypedDict):
+    """テンプレートからの一括作成の結果（failedRecords は先頭の最大100件）"""
+
+    template: str
+    outputDir: str
+    records: int
+    rendered: int
+    failedCount: int
+    failedRecords: list[RenderFailure]
+    elapsedSeconds: float
+    recordsPerSecond: float
+
+
+class SortResult(TypedDict):
+    """並べ替えの結果"""
+
+    sheetName: str
+    range: str
+    rows: int
+
+
+class FilterResult(TypedDict):
+    """絞り込みの結果"""
+
+    sheetName: str
+    range: str
+    keptRows: int
+    removedRows: int
+
+
+class JoinResult(TypedDict):
+    """照合結合の結果（outputColumns は値を書き込んだ列）"""
+
+    sheetName: str
+    range: str
+    outputColumns: list[str]
+    matchedRows: int
+    unmatchedRows: int
+    removedRows: int
+
+
+class RangeTransferResult(TypedDict):
+    """範囲のコピー・移動の結果（targetRange は書き込んだ範囲、コピーするセルがない場合は None）"""
+
+    sheetName: str
+    range: str
+    targetFilePath: str
+    targetSheetName: str
+    targetRange: str | None
+    rows: int
+    columns: int
+
+
+class DiffSheet(TypedDict):
+    """比較したシート"""
+
+    filePath: str
+    sheetName: str
+    rowCount: int
+
+
+class CellChange(TypedDict):
+    """変更されたセル（cell は比較先でのセル番地）"""
+
+    cell: str
+    oldValue: CellValue
+    newValue: CellValue
+
+
+class ChangedRow(TypedDict):
+    """変更された行（oldRow / newRow は比較元・比較先での行番号）"""
+
+    oldRow: int
+    newRow: int
+    cells: list[CellChange]
+
+
+class DiffRow(TypedDict):
+    """削除・挿入された行"""
+
+    row: int
+    values: list[CellValue]
+
+
+class ColumnDiff(TypedDict):
+    """列単位の差分（列記号）"""
+
+    changedColumns: list[str]
+    deletedColumns: list[str]
+    insertedColumns: list[str]
+
+
+class KeyCount(TypedDict):
+    """比較元・比較先それぞれの行数"""
+
+    source: int
+    target: int
+
+
+class DiffSummary(TypedDict):
+    """
+    1シート分の比較結果
+
+    changedRows / deletedRows / insertedRows は最大 maxChanges 件で、超えた場合は
+    truncated が True になります。duplicateKeyCount / blankKeyCount はキー列で対応付けた
+    場合、columnDiff は列単位の差分を求めた場合のみ値があります。
+    """
+
+    source: DiffSheet
+    target: DiffSheet
+    changedRowCount: int
+    deletedRowCount: int
+    insertedRowCount: int
+    changedRows: list[ChangedRow]
+    deletedRows: list[DiffRow]
+    insertedRows: list[DiffRow]
+    truncated: bool
+    duplicateKeyCount: KeyCount | None
+    blankKeyCount: KeyCount | None
+    columnDiff: ColumnDiff | None
+
+
+class SheetDiffResult(TypedDict):
+    """シートの比較結果"""
+
+    diff: DiffSummary
+
+
+class WorkbookDiffResult(TypedDict):
+    """ワークブックの比較結果（差分のあるシート名 → シートの比較結果）"""
+
+    removedSheets: list[str]
+    addedSheets: list[str]
+    changedSheets: dict[str, DiffSummary]
+
+
+class ServerStatsResult(TypedDict):
+    """サーバーのキャッシュ・メモリの統計"""
+
+    responseCache: dict[str, Any]
+    cachedWorkbooks: int
+    pendingJournals: int
+    memory: dict[str, Any]
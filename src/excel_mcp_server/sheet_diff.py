@@ -0,0 +1,330 @@
+"""
+ワークシート比較（差分検出）
+
+各シートを読み取り専用モードで1回ストリーミングしながら行ごとのハッシュ値だけを保持し、
+ハッシュ列（またはキー列）で行を対応付けます。差分のある行の値だけを2回目の
+ストリーミングで取得するため、メモリ使用量は行数 × 8バイト程度に抑えられます。
+
+キー列で対応付ける場合は キーの値 → 行インデックス の辞書もすべての行について保持するため、
+メモリ使用量はキーの値の大きさ × 行数に比例します（数百万行では数百MBになり得ます）。
+キーが空白の行と、同じキーが2回目以降に現れる行はキーでは対応付けられないため、
+内容のハッシュが一致する行どうしだけを同一とみなし、残りは削除・挿入として報告します。
+"""
+
+import hashlib
+from array import array
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from difflib import SequenceMatcher
+from typing import Any
+
+import openpyxl
+from openpyxl.utils import get_column_letter
+
+from .results import CellChange, ColumnDiff, DiffSummary
+
+
+@dataclass
+class SheetDigest:
+    """1シート分のハッシュ情報"""
+
+    row_hashes: array = field(default_factory=lambda: array("Q"))
+    keys: dict[Any, int] = field(default_factory=dict)
+    duplicate_keys: int = 0
+    blank_keys: int = 0
+    # キーで対応付けられない行（キーが空白または重複）のインデックス
+    keyless_rows: array = field(default_factory=lambda: array("Q"))
+    column_hashes: list[int] = field(default_factory=list)
+    max_column: int = 0
+
+
+def normalize_row(values: tuple) -> tuple:
+    """末尾の空セルを取り除いた行の値を返す"""
+    end = len(values)
+    while end and values[end - 1] is None:
+        end -= 1
+    return tuple(values[:end])
+
+
+def hash_values(values: tuple) -> int:
+    """値のタプルから64ビットのハッシュ値を計算"""
+    digest = hashlib.blake2b(repr(values).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def open_sheet(filePath: str, sheetName: str):
+    """シートを読み取り専用モードで開く（ワークブックは呼び出し側で閉じる）"""
+    workbook = openpyxl.load_workbook(filePath, read_only=True)
+    if sheetName not in workbook.sheetnames:
+        workbook.close()
+        raise ValueError(f"ワークシート '{sheetName}' が見つかりません（{filePath}）。")
+    worksheet = workbook[sheetName]
+    # 不正確なdimension情報で行が欠落しないようにする
+    worksheet.reset_dimensions()
+    return workbook, worksheet
+
+
+def iter_sheet_rows(worksheet):
+    """シートの行を1行目から順に返す"""
+    for row in worksheet.iter_rows(min_row=1, min_col=1, values_only=True):
+        yield normalize_row(row)
+
+
+def scan_sheet(
+    worksheet,
+    keyColumn: int | None = None,
+    compareColumns: bool = False,
+) -> SheetDigest:
+    """シートを1回ストリーミングして行（と必要なら列）のハッシュを作成"""
+    digest = SheetDigest()
+    column_hashers: list[Any] = []
+
+    for row_idx, values in enumerate(iter_sheet_rows(worksheet)):
+        digest.row_hashes.append(hash_values(values))
+        digest.max_column = max(digest.max_column, len(values))
+
+        if keyColumn is not None:
+            key = values[keyColumn - 1] if len(values) >= keyColumn else None
+            if key is None:
+                digest.blank_keys += 1
+                digest.keyless_rows.append(row_idx)
+            elif key in digest.keys:
+                digest.duplicate_keys += 1
+                digest.keyless_rows.append(row_idx)
+            else:
+                digest.keys[key] = row_idx
+
+        if compareColumns:
+            while len(column_hashers) < len(values):
+                hasher = hashlib.blake2b(digest_size=8)
+                # 列が途中から始まる場合も行位置がずれないよう空行分を埋める
+                hasher.update((repr(None).encode("utf-8") + b"\x00") * row_idx)
+                column_hashers.append(hasher)
+            for col_idx, hasher in enumerate(column_hashers):
+                value = values[col_idx] if col_idx < len(values) else None
+                hasher.update(repr(value).encode("utf-8") + b"\x00")
+
+    digest.column_hashes = [
+        int.from_bytes(hasher.digest(), "little") for hasher in column_hashers
+    ]
+    return digest
+
+
+def align_rows(
+    old_hashes: array, new_hashes: array
+) -> tuple[list[tuple[int, int]], list[int], list[int]]:
+    """
+    ハッシュ列を対応付けて (変更行の組, 削除行, 挿入行) を返す
+
+    共通の先頭・末尾を先に取り除いてから残りを SequenceMatcher で対応付けます。
+    """
+    old_len, new_len = len(old_hashes), len(new_hashes)
+    prefix = 0
+    while (
+        prefix < old_len
+        and prefix < new_len
+        and old_hashes[prefix] == new_hashes[prefix]
+    ):
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < old_len - prefix
+        and suffix < new_len - prefix
+        and old_hashes[old_len - 1 - suffix] == new_hashes[new_len - 1 - suffix]
+    ):
+        suffix += 1
+
+    old_mid = old_hashes[prefix : old_len - suffix]
+    new_mid = new_hashes[prefix : new_len - suffix]
+
+    changed: list[tuple[int, int]] = []
+    deleted: list[int] = []
+    inserted: list[int] = []
+
+    matcher = SequenceMatcher(None, old_mid, new_mid, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        old_rows = range(prefix + i1, prefix + i2)
+        new_rows = range(prefix + j1, prefix + j2)
+        paired = min(len(old_rows), len(new_rows))
+        changed.extend(zip(old_rows[:paired], new_rows[:paired]))
+        deleted.extend(old_rows[paired:])
+        inserted.extend(new_rows[paired:])
+
+    return changed, deleted, inserted
+
+
+def align_by_key(
+    old: SheetDigest, new: SheetDigest
+) -> tuple[list[tuple[int, int]], list[int], list[int]]:
+    """
+    キー列の値で行を対応付けて (変更行の組, 削除行, 挿入行) を返す
+
+    キーで対応付けられない行は内容のハッシュが一致する行と先頭から順に組にし、
+    組にならなかった行を削除行・挿入行とします。
+    """
+    changed = [
+        (old_idx, new.keys[key])
+        for key, old_idx in old.keys.items()
+        if key in new.keys and old.row_hashes[old_idx] != new.row_hashes[new.keys[key]]
+    ]
+    deleted = [idx for key, idx in old.keys.items() if key not in new.keys]
+    inserted = [idx for key, idx in new.keys.items() if key not in old.keys]
+
+    spare: defaultdict[int, deque[int]] = defaultdict(deque)
+    for idx in old.keyless_rows:
+        spare[old.row_hashes[idx]].append(idx)
+    for idx in new.keyless_rows:
+        candidates = spare.get(new.row_hashes[idx])
+        if candidates:
+            candidates.popleft()
+        else:
+            inserted.append(idx)
+    deleted.extend(idx for candidates in spare.values() for idx in candidates)
+
+    return sorted(changed), sorted(deleted), sorted(inserted)
+
+
+def fetch_rows(worksheet, row_indexes: set[int]) -> dict:
+    """指定された行インデックスの値だけをストリーミングで取得"""
+    if not row_indexes:
+        return {}
+
+    last = max(row_indexes)
+    rows = {}
+    for row_idx, values in enumerate(iter_sheet_rows(worksheet)):
+        if row_idx in row_indexes:
+            rows[row_idx] = values
+        if row_idx >= last:
+            break
+    return rows
+
+
+def compare_columns(old: SheetDigest, new: SheetDigest) -> ColumnDiff:
+    """列ハッシュを対応付けて列単位の差分を返す"""
+    inserted: list[str] = []
+    deleted: list[str] = []
+    changed: list[str] = []
+
+    matcher = SequenceMatcher(None, old.column_hashes, new.column_hashes)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        paired = min(i2 - i1, j2 - j1)
+        changed.extend(get_column_letter(j1 + k + 1) for k in range(paired))
+        deleted.extend(get_column_letter(i) for i in range(i1 + paired + 1, i2 + 1))
+        inserted.extend(get_column_letter(j) for j in range(j1 + paired + 1, j2 + 1))
+
+    return {
+        "changedColumns": changed,
+        "deletedColumns": deleted,
+        "insertedColumns": inserted,
+    }
+
+
+def diff_cells(old_values: tuple, new_values: tuple, new_row: int) -> list[CellChange]:
+    """1行分のセル単位の差分を返す"""
+    cells = []
+    for col_idx in range(max(len(old_values), len(new_values))):
+        old_value = old_values[col_idx] if col_idx < len(old_values) else None
+        new_value = new_values[col_idx] if col_idx < len(new_values) else None
+        if old_value != new_value or type(old_value) is not type(new_value):
+            cells.append(
+                {
+                    "cell": f"{get_column_letter(col_idx + 1)}{new_row}",
+                    "oldValue": old_value,
+                    "newValue": new_value,
+                }
+            )
+    return cells
+
+
+def diff_sheets(
+    filePath: str,
+    sheetName: str,
+    otherFilePath: str,
+    otherSheetName: str,
+    keyColumn: int | None = None,
+    compareColumns: bool = False,
+    maxChanges: int = 1000,
+) -> DiffSummary:
+    """2つのシートを比較し、挿入・削除・変更された行とセルを返す"""
+    old_workbook, old_sheet = open_sheet(filePath, sheetName)
+    try:
+        new_workbook, new_sheet = open_sheet(otherFilePath, otherSheetName)
+    except Exception:
+        old_workbook.close()
+        raise
+
+    try:
+        old = scan_sheet(old_sheet, keyColumn, compareColumns)
+        new = scan_sheet(new_sheet, keyColumn, compareColumns)
+
+        if keyColumn is not None:
+            changed, deleted, inserted = align_by_key(old, new)
+        else:
+            changed, deleted, inserted = align_rows(old.row_hashes, new.row_hashes)
+
+        # 詳細は maxChanges 件までに制限し、必要な行だけを再取得する
+        changed_detail = changed[:maxChanges]
+        deleted_detail = deleted[:maxChanges]
+        inserted_detail = inserted[:maxChanges]
+
+        old_rows = fetch_rows(
+            old_sheet, {old_idx for old_idx, _ in changed_detail} | set(deleted_detail)
+        )
+        new_rows = fetch_rows(
+            new_sheet,
+            {new_idx for _, new_idx in changed_detail} | set(inserted_detail),
+        )
+    finally:
+        old_workbook.close()
+        new_workbook.close()
+
+    result: DiffSummary = {
+        "source": {
+            "filePath": filePath,
+            "sheetName": sheetName,
+            "rowCount": len(old.row_hashes),
+        },
+        "target": {
+            "filePath": otherFilePath,
+            "sheetName": otherSheetName,
+            "rowCount": len(new.row_hashes),
+        },
+        "changedRowCount": len(changed),
+        "deletedRowCount": len(deleted),
+        "insertedRowCount": len(inserted),
+        "changedRows": [
+            {
+                "oldRow": old_idx + 1,
+                "newRow": new_idx + 1,
+                "cells": diff_cells(old_rows[old_idx], new_rows[new_idx], new_idx + 1),
+            }
+            for old_idx, new_idx in changed_detail
+        ],
+        "deletedRows": [
+            {"row": old_idx + 1, "values": list(old_rows[old_idx])}
+            for old_idx in deleted_detail
+        ],
+        "insertedRows": [
+            {"row": new_idx + 1, "values": list(new_rows[new_idx])}
+            for new_idx in inserted_detail
+        ],
+        "truncated": max(len(changed), len(deleted), len(inserted)) > maxChanges,
+        "duplicateKeyCount": None,
+        "blankKeyCount": None,
+        "columnDiff": None,
+    }
+
+    if keyColumn is not None:
+        result["duplicateKeyCount"] = {
+            "source": old.duplicate_keys,
+            "target": new.duplicate_keys,
+        }
+        result["blankKeyCount"] = {"source": old.blank_keys, "target": new.blank_keys}
+    if compareColumns:
+        result["columnDiff"] = compare_columns(old, new)
+
+    return result
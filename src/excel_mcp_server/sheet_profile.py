@@ -0,0 +1,317 @@
+"""
+シートの列のプロファイル
+
+シートを1行目から1回だけ走査し、列ごとの型・空白の割合・異なる値の数・最小値と最大値・
+値の例と、見出し行・表の範囲を求めます。行は PROFILE_CHUNK_ROWS 行ずつまとめて列ごとに
+集計し、それ以外の行は保持しないため、使用するメモリは行数によらずほぼ一定です。
+
+- 異なる値の数: 値のハッシュを HyperLogLog（2^12 個のレジスタ、誤差約1.6%）で数えます。
+  EXACT_DISTINCT_LIMIT 個以下の場合はハッシュの集合による正確な数です
+- 値の例: 空白以外の値からの一様な無作為抽出（リザーバーサンプリング、乱数の種は固定）
+- 見出し行: 先頭の HEADER_SCAN_ROWS 行から推定します（数値・日付などの値を持つ列がない
+  表では検出できないため、呼び出し側で行番号を指定します）
+"""
+
+import itertools
+from collections import Counter
+from collections.abc import Iterable, Sequence
+from datetime import date, datetime, time
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from openpyxl.utils.cell import get_column_letter
+
+# 1回にまとめて集計する行数
+PROFILE_CHUNK_ROWS = 10000
+# 見出し行を推定するために先読みする行数
+HEADER_SCAN_ROWS = 20
+# HyperLogLog の精度（レジスタ数 2^HLL_PRECISION）
+HLL_PRECISION = 12
+# 異なる値をハッシュの集合で正確に数える上限
+EXACT_DISTINCT_LIMIT = 1000
+# 列ごとに保持する値の例の数
+SAMPLE_SIZE = 5
+
+# セルの値の型 → プロファイルでの型名（数式の文字列は "formula"）
+VALUE_TYPES = {
+    int: "integer",
+    float: "number",
+    str: "string",
+    bool: "boolean",
+    datetime: "datetime",
+    date: "date",
+    time: "time",
+}
+# 最小値・最大値を比較する型のグループ
+COMPARABLE_GROUPS = {
+    "integer": "number",
+    "number": "number",
+    "string": "string",
+    "datetime": "datetime",
+    "date": "date",
+    "time": "time",
+}
+
+
+def value_type(value: Any) -> str:
+    """セルの値の型名"""
+    if isinstance(value, str) and value.startswith("="):
+        return "formula"
+    return VALUE_TYPES.get(type(value), "string")
+
+
+def json_value(value: Any) -> Any:
+    """結果に含める値（日付・時刻は ISO 8601 形式の文字列）"""
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    return value
+
+
+def is_blank(value: Any) -> bool:
+    """空白セルか"""
+    return value is None or value == ""
+
+
+class HyperLogLog:
+    """64ビットのハッシュから異なる値の数を推定する"""
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, hashes: np.ndarray) -> None:
+        """ハッシュ（uint64 の配列）を追加"""
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.intp)
+        # 残りのビットの先頭の0の数 + 1（浮動小数点数で正確に表せる上位53ビットで求める）
+        rest = (hashes << np.uint64(self.precision)) >> np.uint64(11)
+        bit_length = np.frexp(rest.astype(np.float64))[1]
+        rank = (54 - bit_length).clip(max=64 - self.precision + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def estimate(self) -> int:
+        """異なる値の数の推定値"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # 少ない場合は空のレジスタの数から推定する（線形カウンティング）
+            raw = m * np.log(m / zeros)
+        return int(round(raw))
+
+
+class ColumnProfile:
+    """1つの列の集計"""
+
+    def __init__(self, rng: np.random.Generator):
+        self.rng = rng
+        self.count = 0
+        self.types: Counter[str] = Counter()
+        self.hll = HyperLogLog()
+        self.exact: set[int] | None = set()
+        self.bounds: dict[str, list[Any]] = {}
+        self.samples: list[Any] = []
+
+    def add(self, values: list[Any]) -> None:
+        """列の値のまとまりを集計（空白は除いて数える）"""
+        present: list[Any] = []
+        types: list[str] = []
+        groups: dict[str, list[Any]] = {}
+        for value in values:
+            if value is None or value == "":
+                continue
+            name = value_type(value)
+            types.append(name)
+            present.append(value)
+            group = COMPARABLE_GROUPS.get(name)
+            if group is not None:
+                groups.setdefault(group, []).append(value)
+        if not present:
+            return
+        self.types.update(types)
+
+        hashes = pd.util.hash_array(np.array(present, dtype=object))
+        self.hll.add(hashes)
+        if self.exact is not None:
+            self.exact.update(hashes.tolist())
+            if len(self.exact) > EXACT_DISTINCT_LIMIT:
+                self.exact = None
+
+        for group, group_values in groups.items():
+            low, high = min(group_values), max(group_values)
+            bounds = self.bounds.get(group)
+            if bounds is None:
+                self.bounds[group] = [low, high]
+            else:
+                bounds[0] = min(bounds[0], low)
+                bounds[1] = max(bounds[1], high)
+
+        # リザーバーサンプリング: n 個目の値を確率 SAMPLE_SIZE / n で採用する
+        seen = np.arange(self.count + 1, self.count + len(present) + 1)
+        slots = self.rng.integers(0, seen)
+        for offset in np.flatnonzero(slots < SAMPLE_SIZE).tolist():
+            if len(self.samples) < SAMPLE_SIZE:
+                self.samples.append(present[offset])
+            else:
+                self.samples[slots[offset]] = present[offset]
+        self.count += len(present)
+
+    def inferred_type(self) -> str:
+        """列の型（空白だけの列は empty、複数の型が混在する場合は mixed）"""
+        names = set(self.types)
+        if not names:
+            return "empty"
+        if names <= {"integer", "number"}:
+            return "number" if "number" in names else "integer"
+        return names.pop() if len(names) == 1 else "mixed"
+
+    def result(self, column: int, name: str, rows: int) -> dict:
+        """列のプロファイル"""
+        inferred = self.inferred_type()
+        if inferred == "mixed":
+            group = COMPARABLE_GROUPS.get(self.types.most_common(1)[0][0])
+        else:
+            group = COMPARABLE_GROUPS.get(inferred)
+        low, high = self.bounds.get(group, (None, None))
+        exact = self.exact is not None
+        return {
+            "column": get_column_letter(column),
+            "name": name,
+            "type": inferred,
+            "typeCounts": dict(self.types.most_common()),
+            "nonBlank": self.count,
+            "nullRatio": round(1 - self.count / rows, 4) if rows else 0.0,
+            "distinctCount": len(self.exact) if exact else self.hll.estimate(),
+            "distinctIsEstimate": not exact,
+            "min": json_value(low),
+            "max": json_value(high),
+            "samples": [json_value(value) for value in self.samples],
+        }
+
+
+def filled_span(row: Sequence[Any]) -> tuple[int, int] | None:
+    """値のある最初と最後の列番号（空白行は None）"""
+    first = next(
+        (index for index, value in enumerate(row) if not is_blank(value)), None
+    )
+    if first is None:
+        return None
+    last = len(row)
+    while is_blank(row[last - 1]):
+        last -= 1
+    return first + 1, last
+
+
+def detect_header(rows: list[Sequence[Any]]) -> int:
+    """
+    先頭の行から見出し行の行番号を推定（見つからない場合は 0）
+
+    値の入ったセルの数が最も多い行の半分以上ある最初の行を候補とし、候補の値が
+    すべて異なる文字列で、その下の行の同じ列に文字列以外の値がある場合に見出し行とします。
+    """
+    filled = [sum(not is_blank(value) for value in row) for row in rows]
+    if not filled or max(filled) == 0:
+        return 0
+    candidate = next(
+        index for index, count in enumerate(filled) if count * 2 >= max(filled)
+    )
+    header = {
+        column: value
+        for column, value in enumerate(rows[candidate])
+        if not is_blank(value)
+    }
+    names = list(header.values())
+    if not all(value_type(value) == "string" for value in names) or len(
+        set(names)
+    ) != len(names):
+        return 0
+    for row in rows[candidate + 1 :]:
+        for column in header:
+            if column < len(row) and not is_blank(row[column]):
+                if value_type(row[column]) != "string":
+                    return candidate + 1
+    return 0
+
+
+def profile_rows(
+    rows: Iterable[Sequence[Any]], headerRow: int | None = None, seed: int = 0
+) -> dict:
+    """
+    1行目からの行の値を1回だけ走査してプロファイルを作成
+
+    headerRow が None の場合は見出し行を推定し、0 の場合は見出し行なしとして扱います。
+    表は見出し行（見出し行がない場合は値のある最初の行）から値のある最後の行までで、
+    その間の空白行は blankRows として数えます。
+    """
+    rows = iter(rows)
+    head = list(itertools.islice(rows, HEADER_SCAN_ROWS))
+    if headerRow is None:
+        headerRow = detect_header(head)
+
+    rng = np.random.default_rng(seed)
+    profiles: dict[int, ColumnProfile] = {}
+    header: Sequence[Any] = ()
+    first_row = last_row = 0
+    min_col, max_col = 0, 0
+    blank_rows = pending_blanks = 0
+    chunk: list[Sequence[Any]] = []
+
+    def flush() -> None:
+        width = max(map(len, chunk), default=0)
+        for column in range(width):
+            profile = profiles.get(column)
+            if profile is None:
+                profile = profiles[column] = ColumnProfile(rng)
+            profile.add([row[column] if column < len(row) else None for row in chunk])
+        chunk.clear()
+
+    for row_number, row in enumerate(itertools.chain(head, rows), start=1):
+        if row_number < headerRow:
+            continue
+        filled = filled_span(row)
+        if row_number == headerRow:
+            header = row
+        elif not filled:
+            if first_row:
+                pending_blanks += 1
+            continue
+        else:
+            blank_rows += pending_blanks
+            pending_blanks = 0
+            last_row = row_number
+            chunk.append(row)
+            if len(chunk) >= PROFILE_CHUNK_ROWS:
+                flush()
+        if filled:
+            first_row = first_row or row_number
+            min_col = min(min_col or filled[0], filled[0])
+            max_col = max(max_col, filled[1])
+        elif row_number == headerRow:
+            first_row = first_row or row_number
+    flush()
+
+    data_start = headerRow + 1 if headerRow else first_row
+    data_rows = last_row - data_start + 1 if last_row else 0
+    columns = []
+    for column in range(min_col, max_col + 1) if max_col else ():
+        value = header[column - 1] if column - 1 < len(header) else None
+        name = str(value) if not is_blank(value) else get_column_letter(column)
+        profile = profiles.get(column - 1) or ColumnProfile(rng)
+        columns.append(profile.result(column, name, data_rows))
+
+    table_range = None
+    if max_col:
+        table_range = (
+            f"{get_column_letter(min_col)}{first_row}:"
+            f"{get_column_letter(max_col)}{max(last_row, first_row)}"
+        )
+    return {
+        "tableRange": table_range,
+        "headerRow": headerRow or None,
+        "firstDataRow": data_start if last_row else None,
+        "lastDataRow": last_row or None,
+        "dataRows": data_rows,
+        "blankRows": blank_rows,
+        "columns": columns,
+    }
@@ -0,0 +1,313 @@
+"""
+テンプレートからのワークブックの一括作成
+
+テンプレートのxlsxとレコードの一覧（JSONL / CSV）から、レコードごとに1つのワークブックを
+作成します。レコードはまとめてプロセスプールの各プロセスに渡し、各プロセスはテンプレートを
+1回だけ解析して使い回します。レコードごとの保存では、対応表のセルの要素だけを作成して
+シートのXMLの雛形に差し込み、他のシート・画像・書式テーブルなどはテンプレートの
+圧縮済みのバイト列をそのままコピーします（部分保存と同じ仕組み）。
+"""
+
+import csv
+import io
+import json
+import os
+import re
+import threading
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+import openpyxl
+from openpyxl.cell import Cell
+from openpyxl.cell._writer import write_cell
+from openpyxl.worksheet.worksheet import Worksheet
+from openpyxl.xml.functions import xmlfile
+
+from .addressing import parse_cell
+from .incremental_save import copy_archive, plan_replacements, remember_styles
+from .workbook_export import UNSAFE_FILE_CHARS
+
+RECORD_FORMATS = (".jsonl", ".csv")
+# 1回のジョブで処理するレコード数の上限（進捗の通知とプロセス間の負荷の偏りを抑える）
+RENDER_BATCH_SIZE = 50
+# プロセス数の指定がない場合に並列に処理するレコード数（少ない場合はその場で処理する）
+RENDER_PARALLEL_RECORDS = 16
+# 結果に含める失敗したレコードの件数の上限
+RENDER_MAX_FAILURES = 100
+
+# CSVの値のうち数値として扱う文字列（先頭が0の数字列などは文字列のまま）
+INTEGER_PATTERN = re.compile(r"^-?(0|[1-9]\d{0,15})$")
+FLOAT_PATTERN = re.compile(r"^-?(0|[1-9]\d*)\.\d+$")
+
+# シートのXMLの雛形で、値を差し込むセルに入れる目印の値の接頭辞
+TEMPLATE_MARKER = "@@excel-mcp-render-"
+
+# このプロセスで解析済みのテンプレート（(パス, 更新日時, サイズ, 対応表), 雛形）
+_template: "tuple[tuple, TemplatePlan] | None" = None
+_template_lock = threading.Lock()
+
+
+def csv_value(text: str) -> Any:
+    """CSVの値を変換（空欄は None、数値の形式の文字列は数値）"""
+    if text == "":
+        return None
+    if INTEGER_PATTERN.match(text):
+        return int(text)
+    if FLOAT_PATTERN.match(text):
+        return float(text)
+    return text
+
+
+def read_records(recordsPath: str) -> list[dict]:
+    """JSONL（1行に1つのオブジェクト）またはCSV（見出し行付き、UTF-8）のレコードを読み込む"""
+    extension = os.path.splitext(recordsPath)[1].lower()
+    if extension not in RECORD_FORMATS:
+        raise ValueError(
+            f"レコードのファイルは {' / '.join(RECORD_FORMATS)} である必要があります"
+        )
+
+    records = []
+    with open(recordsPath, encoding="utf-8-sig", newline="") as source:
+        if extension == ".csv":
+            for row in csv.DictReader(source):
+                records.append({key: csv_value(value) for key, value in row.items()})
+            return records
+
+        for line_number, line in enumerate(source, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError(f"{line_number}行目がJSONオブジェクトではありません")
+            records.append(record)
+    return records
+
+
+def resolve_mapping(
+    mapping: dict[str, str], sheetNames: list[str]
+) -> list[tuple[str, str, str]]:
+    """
+    項目名 → セル（例: B3, 請求書!B3, 'My Sheet'!B3）の対応表を (項目名, シート名, セル) に変換
+
+    シート名を省略したセルはテンプレートの最初のワークシートのセルです。
+    """
+    placements = []
+    used = set()
+    for field, target in mapping.items():
+        sheetName, _, cell = target.rpartition("!")
+        if sheetName.startswith("'") and sheetName.endswith("'"):
+            sheetName = sheetName[1:-1].replace("''", "'")
+        sheetName = sheetName or sheetNames[0]
+        if sheetName not in sheetNames:
+            raise ValueError(
+                f"項目 '{field}' のワークシート '{sheetName}' が見つかりません。"
+                f"利用可能なシート: {', '.join(sheetNames)}"
+            )
+        parse_cell(cell)
+        if (sheetName, cell) in used:
+            raise ValueError(f"セル {sheetName}!{cell} に複数の項目が指定されています")
+        used.add((sheetName, cell))
+        placements.append((field, sheetName, cell))
+    return placements
+
+
+def output_paths(
+    outputDir: str, fileName: str, records: list[dict]
+) -> list[str | None]:
+    """
+    レコードごとの出力先のパス（fileName の {項目名} と {index} をレコードの値で置き換える）
+
+    置き換えに失敗したレコードと、前のレコードと重複したレコードは None になります。
+    """
+    paths: list[str | None] = []
+    used = set()
+    for index, record in enumerate(records, start=1):
+        try:
+            name = fileName.format_map({**record, "index": index})
+        except (KeyError, IndexError, ValueError):
+            paths.append(None)
+            continue
+        name = UNSAFE_FILE_CHARS.sub("_", name).strip(" .")
+        if not name.lower().endswith(".xlsx"):
+            name += ".xlsx"
+        if name.lower() in used:
+            paths.append(None)
+            continue
+        used.add(name.lower())
+        paths.append(os.path.join(outputDir, name))
+    return paths
+
+
+def cell_value(value: Any) -> Any:
+    """レコードの値をセルに書き込める値に変換（配列・オブジェクトはJSONの文字列）"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def cell_xml(worksheet: Worksheet, cell: Cell) -> bytes:
+    """1つのセルの <c> 要素（シートの部分保存と同じ形式）"""
+    output = io.BytesIO()
+    with xmlfile(output) as xf:
+        write_cell(xf, worksheet, cell, cell.has_style)
+    return output.getvalue()
+
+
+class TemplatePlan:
+    """
+    解析済みのテンプレートと、レコードごとに書き換えるシートのXMLの雛形
+
+    対応表のセルに目印の値を入れてシートのXMLを1回だけ作成し、目印のセルの <c> 要素の
+    前後でXMLを分割しておきます。レコードごとの保存では目印の位置にセルの要素だけを
+    作成して差し込むため、シート全体を毎回シリアライズし直す必要がありません。
+    部分保存できないテンプレート（コメントや図を持つシートなど）では、レコードごとに
+    ワークブック全体を保存します。レコードの値は共有のセルに一時的に書き込むため、
+    同じ雛形を使う複数のスレッドの render() はロックで1つずつ実行します。
+    """
+
+    def __init__(self, templatePath: str, placements: list[tuple[str, str, str]]):
+        self.templatePath = templatePath
+        self.placements = placements
+        self.workbook = openpyxl.load_workbook(templatePath)
+        remember_styles(self.workbook)
+        self.cells = [
+            self.workbook[sheetName][cell] for _, sheetName, cell in placements
+        ]
+        self.lock = threading.Lock()
+        self.replaced: dict[str, bytes] = {}
+        self.dropped: set[str] = set()
+        # シートのパーツ名 → (XMLの断片, 断片の間に差し込むセルの番号)
+        self.sheet_parts: dict[str, tuple[list[bytes], list[int]]] = {}
+        self.incremental = self.prepare()
+
+    def prepare(self) -> bool:
+        """目印の値を入れたシートのXMLを作成して分割（部分保存できない場合は False）"""
+        markers = [f"{TEMPLATE_MARKER}{index}@@" for index in range(len(self.cells))]
+        with self.values(markers):
+            with zipfile.ZipFile(self.templatePath) as source:
+                plan = plan_replacements(
+                    self.workbook,
+                    source,
+                    {sheetName for _, sheetName, _ in self.placements},
+                )
+        if plan is None:
+            return False
+        self.replaced, self.dropped = plan
+
+        positions: dict[str, list[tuple[int, int, int]]] = {}
+        for index, marker in enumerate(markers):
+            for part, data in self.replaced.items():
+                found = data.find(marker.encode())
+                if found < 0:
+                    continue
+                start = data.rfind(b"<c ", 0, found)
+                end = data.find(b"</c>", found) + len(b"</c>")
+                positions.setdefault(part, []).append((start, end, index))
+                break
+            else:
+                return False
+
+        for part, spans in positions.items():
+            data = self.replaced[part]
+            chunks, order, offset = [], [], 0
+            for start, end, index in sorted(spans):
+                chunks.append(data[offset:start])
+                order.append(index)
+                offset = end
+            chunks.append(data[offset:])
+            self.sheet_parts[part] = (chunks, order)
+        return True
+
+    @contextmanager
+    def values(self, values: list[Any]) -> Iterator[None]:
+        """対応表のセルに値を一時的に書き込む（終了時にテンプレートの値に戻す）"""
+        original = [cell.value for cell in self.cells]
+        try:
+            for cell, value in zip(self.cells, values):
+                cell.value = cell_value(value)
+            yield
+        finally:
+            for cell, value in zip(self.cells, original):
+                cell.value = value
+
+    def render(self, record: dict, outputPath: str) -> None:
+        """1つのレコードの値を書き込んだワークブックを保存"""
+        missing = [field for field, _, _ in self.placements if field not in record]
+        if missing:
+            raise ValueError(
+                f"項目 {', '.join(repr(field) for field in missing)} がありません"
+            )
+
+        temp_path = f"{outputPath}.{os.getpid()}.tmp"
+        try:
+            with (
+                self.lock,
+                self.values([record[field] for field, _, _ in self.placements]),
+            ):
+                if self.incremental:
+                    fragments = [cell_xml(cell.parent, cell) for cell in self.cells]
+                    replaced = dict(self.replaced)
+                    for part, (chunks, order) in self.sheet_parts.items():
+                        pieces = [chunks[0]]
+                        for index, chunk in zip(order, chunks[1:]):
+                            pieces.append(fragments[index])
+                            pieces.append(chunk)
+                        replaced[part] = b"".join(pieces)
+                    with zipfile.ZipFile(self.templatePath) as source:
+                        copy_archive(source, temp_path, replaced, self.dropped)
+                else:
+                    self.workbook.save(temp_path)
+            os.replace(temp_path, outputPath)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+
+def load_plan(
+    templatePath: str, placements: list[tuple[str, str, str]]
+) -> TemplatePlan:
+    """テンプレートを解析（同じプロセスでは、ファイルと対応表が変わらない限り使い回す）"""
+    global _template
+    stat = os.stat(templatePath)
+    key = (templatePath, stat.st_mtime_ns, stat.st_size, tuple(placements))
+    with _template_lock:
+        if _template is None or _template[0] != key:
+            _template = (key, TemplatePlan(templatePath, placements))
+        return _template[1]
+
+
+def render_batch(
+    templatePath: str,
+    placements: list[tuple[str, str, str]],
+    batch: list[tuple[int, dict, str]],
+) -> list[dict]:
+    """
+    (レコード番号, レコード, 出力先) の一覧を順に作成する（プロセスプールで実行される）
+
+    失敗したレコードは例外を送出せず、エラーの内容を結果に含めます。
+    """
+    plan = load_plan(templatePath, placements)
+    results = []
+    for index, record, outputPath in batch:
+        try:
+            plan.render(record, outputPath)
+            results.append({"record": index, "error": None})
+        except Exception as e:
+            results.append({"record": index, "error": str(e) or type(e).__name__})
+    return results
+
+
+def render_workers(recordCount: int, maxWorkers: int | None) -> int:
+    """並列に処理するプロセス数（指定がない場合、少ないレコードはその場で処理する）"""
+    if maxWorkers is None:
+        if recordCount < RENDER_PARALLEL_RECORDS:
+            return 1
+        maxWorkers = os.cpu_count() or 1
+    return max(min(maxWorkers, recordCount), 1)
+
+
+def batch_size(recordCount: int, workers: int) -> int:
+    """1回のジョブで処理するレコード数（プロセスごとに複数のジョブに分ける）"""
+    return max(min(-(-recordCount // (workers * 4)), RENDER_BATCH_SIZE), 1)
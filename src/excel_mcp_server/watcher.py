@@ -0,0 +1,124 @@
+"""
+開いたワークブックのファイル監視
+
+Excelで人が保存し直したり、パイプラインが新しい版のファイルを置いたりしたことを検知し、
+キャッシュ済みのワークブックや応答を無効化します。watchfiles がインストールされていれば
+OSのファイル変更通知（Linux では inotify）を使い、なければ一定間隔でファイルの
+フィンガープリント（更新日時とサイズ）を確認するポーリングで監視します。
+"""
+
+import os
+import sys
+import threading
+from collections.abc import Callable
+
+from .workbook_cache import Fingerprint, file_fingerprint, normalize_path
+
+try:
+    import watchfiles
+except ImportError:  # pragma: no cover - 任意の依存パッケージ
+    watchfiles = None
+
+
+def native_watch_available() -> bool:
+    """OSのファイル変更通知を使った監視が利用可能か"""
+    return watchfiles is not None
+
+
+class WorkbookWatcher(threading.Thread):
+    """開いたワークブックのディレクトリを監視し、変更されたファイルを通知するスレッド"""
+
+    def __init__(
+        self,
+        on_change: Callable[[str], None],
+        interval: float = 1.0,
+        polling: bool = False,
+    ):
+        super().__init__(name="workbook-watcher", daemon=True)
+        self.on_change = on_change
+        self.interval = interval
+        self.polling = polling or not native_watch_available()
+        self._files: dict[str, Fingerprint | None] = {}
+        self._directories: set[str] = set()
+        self._lock = threading.Lock()
+        # 監視対象のディレクトリが増えたとき、またはスレッドを止めるときに設定する
+        self._restart = threading.Event()
+        self._stopped = threading.Event()
+
+    def watch(self, filePath: str) -> None:
+        """ファイルを監視対象に追加"""
+        key = normalize_path(filePath)
+        with self._lock:
+            if key in self._files:
+                return
+            self._files[key] = file_fingerprint(key)
+            directory = os.path.dirname(key)
+            if directory not in self._directories:
+                self._directories.add(directory)
+                self._restart.set()
+
+    def watched_files(self) -> list[str]:
+        """監視中のファイルのパス一覧"""
+        with self._lock:
+            return list(self._files)
+
+    def stop(self) -> None:
+        """スレッドを停止"""
+        self._stopped.set()
+        self._restart.set()
+
+    def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                if self.polling:
+                    self._poll()
+                else:
+                    self._watch_native()
+            except Exception as e:
+                # 監視できないディレクトリがあってもサーバーは止めず、ポーリングに切り替える
+                print(
+                    f"ファイル監視に失敗したためポーリングに切り替えます: {e}",
+                    file=sys.stderr,
+                )
+                self.polling = True
+
+    def _poll(self) -> None:
+        """一定間隔でフィンガープリントを比較する"""
+        self._stopped.wait(self.interval)
+        with self._lock:
+            files = dict(self._files)
+        for key, previous in files.items():
+            current = file_fingerprint(key)
+            if current != previous:
+                with self._lock:
+                    self._files[key] = current
+                self._notify(key)
+
+    def _watch_native(self) -> None:
+        """OSの変更通知を受け取る（監視対象のディレクトリが増えたら張り直す）"""
+        with self._lock:
+            directories = sorted(d for d in self._directories if os.path.isdir(d))
+            self._restart.clear()
+        if not directories:
+            self._restart.wait()
+            return
+
+        for changes in watchfiles.watch(
+            *directories,
+            watch_filter=lambda change, path: normalize_path(path) in self._files,
+            debounce=200,
+            stop_event=self._restart,
+            rust_timeout=int(self.interval * 1000),
+            recursive=False,
+            raise_interrupt=False,
+        ):
+            for key in sorted({normalize_path(path) for _, path in changes}):
+                with self._lock:
+                    self._files[key] = file_fingerprint(key)
+                self._notify(key)
+
+    def _notify(self, filePath: str) -> None:
+        try:
+            self.on_change(filePath)
+        except Exception as e:
+            print(f"変更の反映に失敗しました: {filePath}: {e}", file=sys.stderr)
@@ -0,0 +1,144 @@
+"""
+読み込み済みワークブックのキャッシュ
+
+ファイルの更新日時とサイズ（フィンガープリント）で有効性を確認し、
+外部でファイルが変更された場合は自動的に再読み込みされます。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from openpyxl.workbook import Workbook
+
+from .memory_governor import workbook_memory
+
+Fingerprint = tuple[int, int]
+
+
+def normalize_path(filePath: str) -> str:
+    """キャッシュのキーとして使う正規化済みパス"""
+    return os.path.normcase(os.path.abspath(filePath))
+
+
+def file_fingerprint(filePath: str) -> Fingerprint | None:
+    """ファイルのフィンガープリント（更新日時ns, サイズ）を取得"""
+    try:
+        stat = os.stat(filePath)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@dataclass
+class CacheEntry:
+    """キャッシュされたワークブック"""
+
+    workbook: Workbook
+    fingerprint: Fingerprint | None
+
+
+class WorkbookCache:
+    """LRU方式のワークブックキャッシュとファイルごとのロック"""
+
+    def __init__(self, max_entries: int = 4):
+        self.max_entries = max_entries
+        # False の場合は呼び出しごとのファイル確認を省く（ファイル監視で無効化する場合）
+        self.verify = True
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._locks: dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, max_entries: int) -> None:
+        """最大保持数を変更"""
+        with self._lock:
+            self.max_entries = max_entries
+            self._evict()
+
+    def path_lock(self, filePath: str) -> threading.RLock:
+        """ファイルごとの排他ロックを取得"""
+        key = normalize_path(filePath)
+        with self._lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.RLock()
+            return lock
+
+    def get(self, filePath: str) -> Workbook | None:
+        """フィンガープリントが一致する場合のみキャッシュ済みワークブックを返す"""
+        key = normalize_path(filePath)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if self.verify and entry.fingerprint != file_fingerprint(filePath):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry.workbook
+
+    def put(
+        self, filePath: str, workbook: Workbook, fingerprint: Fingerprint | None
+    ) -> None:
+        """ワークブックをキャッシュに登録"""
+        if self.max_entries <= 0:
+            return
+        key = normalize_path(filePath)
+        with self._lock:
+            self._entries[key] = CacheEntry(workbook, fingerprint)
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def loaded_fingerprint(
+        self, filePath: str, workbook: Workbook
+    ) -> Fingerprint | None:
+        """ワークブックを読み込んだ（保存した）時点のファイルのフィンガープリント"""
+        with self._lock:
+            entry = self._entries.get(normalize_path(filePath))
+            if entry is None or entry.workbook is not workbook:
+                return None
+            return entry.fingerprint
+
+    def invalidate(self, filePath: str) -> None:
+        """キャッシュからワークブックを削除"""
+        with self._lock:
+            self._entries.pop(normalize_path(filePath), None)
+
+    def discard_stale(self, filePath: str) -> bool:
+        """ファイルが変更されていればキャッシュから削除し、削除したかを返す"""
+        key = normalize_path(filePath)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.fingerprint == file_fingerprint(filePath):
+                return False
+            del self._entries[key]
+            return True
+
+    def evict_oldest(self) -> bool:
+        """最も長く使われていないワークブックを削除し、削除したかを返す"""
+        with self._lock:
+            if not self._entries:
+                return False
+            self._entries.popitem(last=False)
+            return True
+
+    def memory_usage(self) -> int:
+        """キャッシュ済みワークブックのメモリ使用量の概算"""
+        with self._lock:
+            workbooks = [entry.workbook for entry in self._entries.values()]
+        return sum(workbook_memory(workbook) for workbook in workbooks)
+
+    def size(self) -> int:
+        """キャッシュされているワークブック数"""
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self) -> None:
+        """すべてのキャッシュを削除"""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self) -> None:
+        while len(self._entries) > max(self.max_entries, 0):
+            self._entries.popitem(last=False)
@@ -0,0 +1,305 @@
+"""
+ワークブック全体のエクスポート
+
+複数のシートを1回の呼び出しでファイルに書き出します。シートごとの読み取りと書き出しは
+プロセスプールで並列に行い、各プロセスは担当するシートのXMLだけを解析します
+（openpyxl の読み取り専用モード、または python-calamine）。プロセスプールは初回の
+使用時に起動し、プロセスの起動にかかる時間を2回目以降の呼び出しでは省きます。
+
+出力形式:
+- csv: export_to_csv と同じ形式（UTF-8 BOM付き）
+- jsonl: 1行につき1つのJSON（見出し行を使う場合はオブジェクト、使わない場合は配列）
+- parquet: 列指向・zstd圧縮（pyarrow が必要）。型が混在する列は文字列として保存
+
+出力先のディレクトリには、シートごとの行数・列数・バイト数を記録した
+manifest.json も作成されます。
+"""
+
+import importlib.util
+import itertools
+import json
+import multiprocessing
+import os
+import re
+import threading
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, time
+from typing import Any
+
+import openpyxl
+import pandas as pd
+from openpyxl.chartsheet import Chartsheet
+from openpyxl.utils.cell import get_column_letter
+
+from .readers import CalamineReader
+
+EXPORT_FORMATS = ("csv", "jsonl", "parquet")
+MANIFEST_NAME = "manifest.json"
+# 並列実行中にキャンセル・制限時間を確認する間隔（秒）
+EXPORT_POLL_INTERVAL = 0.5
+# プロセス数の指定がない場合に並列に処理するファイルサイズ（小さなファイルは
+# プロセスの起動と結果の受け渡しの方が時間がかかるため、その場で処理する）
+EXPORT_PARALLEL_BYTES = 1024 * 1024
+
+# ファイル名に使えない文字
+UNSAFE_FILE_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]')
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def parquet_available() -> bool:
+    """Parquet 形式で出力できるか（pyarrow はサーバーの起動を遅くしないよう使う時点で読み込む）"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def worksheet_names(filePath: str) -> list[str]:
+    """ワークシート名の一覧（チャートシートを除く、シートの内容は解析しない）"""
+    workbook = openpyxl.load_workbook(filePath, read_only=True)
+    try:
+        return [
+            name
+            for name in workbook.sheetnames
+            if not isinstance(workbook[name], Chartsheet)
+        ]
+    finally:
+        workbook.close()
+
+
+def output_file_names(sheetNames: list[str], format: str) -> list[str]:
+    """シート名から重複しない出力ファイル名を作成"""
+    names = []
+    used = {MANIFEST_NAME.lower()}
+    for sheetName in sheetNames:
+        stem = UNSAFE_FILE_CHARS.sub("_", sheetName).strip(" .") or "sheet"
+        name = f"{stem}.{format}"
+        suffix = 2
+        while name.lower() in used:
+            name = f"{stem}_{suffix}.{format}"
+            suffix += 1
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def read_sheet_rows(filePath: str, sheetName: str, engine: str) -> list[tuple]:
+    """シートの値を行ごとに読み取る（指定したシートのXMLだけを解析する）"""
+    if engine == "calamine":
+        with CalamineReader(filePath) as reader:
+            return list(reader.iter_rows(sheetName))
+
+    workbook = openpyxl.load_workbook(filePath, read_only=True)
+    try:
+        return list(workbook[sheetName].iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def column_names(header: tuple, width: int) -> list[str]:
+    """見出し行から重複しない列名を作成（空の見出しは列番号の文字）"""
+    names = []
+    used = set()
+    for index in range(width):
+        value = header[index] if index < len(header) else None
+        base = str(value) if value is not None else get_column_letter(index + 1)
+        name = base
+        suffix = 2
+        while name in used:
+            name = f"{base}_{suffix}"
+            suffix += 1
+        used.add(name)
+        names.append(name)
+    return names
+
+
+def json_default(value: Any) -> Any:
+    """JSONに変換できない値の変換（日付・時刻はISO 8601形式）"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def write_csv(path: str, rows: list[tuple], columns: list[str] | None) -> None:
+    """export_to_csv と同じ形式でCSVを書き出す"""
+    frame = pd.DataFrame(rows, columns=columns)
+    frame.to_csv(path, index=False, header=columns is not None, encoding="utf-8-sig")
+
+
+def write_jsonl(path: str, rows: list[tuple], columns: list[str] | None) -> None:
+    """1行につき1つのJSONを書き出す"""
+    with open(path, "w", encoding="utf-8", newline="\n") as output:
+        for row in rows:
+            record = dict(zip(columns, row)) if columns is not None else list(row)
+            output.write(json.dumps(record, ensure_ascii=False, default=json_default))
+            output.write("\n")
+
+
+def write_parquet(path: str, rows: list[tuple], columns: list[str] | None) -> None:
+    """列ごとに型を推定して Parquet（zstd圧縮）で書き出す"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    width = len(columns) if columns is not None else max(map(len, rows), default=0)
+    names = columns or [get_column_letter(index + 1) for index in range(width)]
+    arrays = []
+    for index in range(width):
+        values = [row[index] if index < len(row) else None for row in rows]
+        try:
+            arrays.append(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 数値と文字列などが混在する列は文字列として保存する
+            arrays.append(
+                pa.array([None if value is None else str(value) for value in values])
+            )
+    pq.write_table(pa.Table.from_arrays(arrays, names=names), path, compression="zstd")
+
+
+WRITERS: dict[str, Callable[[str, list[tuple], list[str] | None], None]] = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "parquet": write_parquet,
+}
+
+
+def export_sheet(
+    filePath: str,
+    sheetName: str,
+    outputPath: str,
+    format: str,
+    engine: str,
+    headerRow: bool,
+) -> dict:
+    """1つのシートを読み取ってファイルに書き出す（プロセスプールで実行される）"""
+    rows = read_sheet_rows(filePath, sheetName, engine)
+    width = max(map(len, rows), default=0)
+    rows = [row + (None,) * (width - len(row)) for row in rows]
+
+    columns = None
+    if headerRow and rows:
+        columns = column_names(rows[0], width)
+        rows = rows[1:]
+
+    temp_path = f"{outputPath}.{os.getpid()}.tmp"
+    try:
+        WRITERS[format](temp_path, rows, columns)
+        os.replace(temp_path, outputPath)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {
+        "sheetName": sheetName,
+        "file": os.path.basename(outputPath),
+        "rows": len(rows),
+        "columns": width,
+        "bytes": os.path.getsize(outputPath),
+    }
+
+
+def export_workers(filePath: str, sheetCount: int, maxWorkers: int | None) -> int:
+    """並列に処理するプロセス数（指定がない場合、小さなファイルはその場で処理する）"""
+    if maxWorkers is None:
+        if os.path.getsize(filePath) < EXPORT_PARALLEL_BYTES:
+            return 1
+        maxWorkers = os.cpu_count() or 1
+    return max(min(maxWorkers, sheetCount), 1)
+
+
+def export_pool() -> ProcessPoolExecutor:
+    """
+    エクスポートとテンプレートの展開に使うプロセスプール
+
+    初回の使用時に起動し、以降の呼び出しで再利用します。
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # ワーカープールと同じく、親プロセスの状態を引き継がない spawn を使う
+            _pool = ProcessPoolExecutor(
+                max_workers=os.cpu_count() or 1,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """エクスポートとテンプレートの展開に使うプロセスプールを停止"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
+
+
+def run_jobs(
+    function: Callable[..., Any],
+    jobs: list[dict],
+    workers: int,
+    on_done: Callable[[Any], None],
+    check: Callable[[], None],
+) -> list[Any]:
+    """
+    function を jobs の各引数で最大 workers 個ずつ並列に実行し、結果を jobs の順に返す
+
+    function はプロセスプールに渡すため、モジュールの最上位で定義された関数を指定します。
+    workers が1の場合は、プロセスプールを使わずにその場で順に実行します。
+    check() が例外を送出した場合は、未開始のジョブを取り消して例外をそのまま送出します。
+    """
+    results: list[Any] = [None] * len(jobs)
+
+    if workers <= 1:
+        for index, job in enumerate(jobs):
+            check()
+            results[index] = function(**job)
+            on_done(results[index])
+        return results
+
+    queued = iter(enumerate(jobs))
+    pending: dict[Future, int] = {}
+    try:
+        pool = export_pool()
+        while True:
+            # 同時に実行するジョブを workers 個までに抑える
+            for index, job in itertools.islice(queued, workers - len(pending)):
+                pending[pool.submit(function, **job)] = index
+            if not pending:
+                return results
+            done, _ = wait(
+                pending, timeout=EXPORT_POLL_INTERVAL, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                index = pending.pop(future)
+                results[index] = future.result()
+                on_done(results[index])
+            check()
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise RuntimeError(
+            "処理用のプロセスが異常終了しました。もう一度実行してください"
+        )
+    except BaseException:
+        for future in pending:
+            future.cancel()
+        raise
+
+
+def export_sheets(
+    jobs: list[dict],
+    workers: int,
+    on_done: Callable[[dict], None],
+    check: Callable[[], None],
+) -> list[dict]:
+    """export_sheet の引数の一覧を最大 workers 個ずつ並列に実行し、結果を jobs の順に返す"""
+    return run_jobs(export_sheet, jobs, workers, on_done, check)
+
+
+def write_manifest(outputDir: str, manifest: dict) -> str:
+    """マニフェストを書き出してパスを返す"""
+    path = os.path.join(outputDir, MANIFEST_NAME)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as output:
+        json.dump(manifest, output, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+    return path
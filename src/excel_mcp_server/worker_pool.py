@@ -0,0 +1,97 @@
+"""
+ファイルパス固定（スティッキー）のワーカープロセスプール
+
+openpyxl の解析・保存は CPU バウンドで GIL を保持するため、ツール呼び出しを
+ファイルパスのハッシュで選んだワーカープロセスに振り分けて複数コアを使います。
+同じファイルは常に同じワーカーで処理されるため、ワークブックキャッシュや
+ジャーナルはワーカーごとに独立しており、プロセス間のロックは不要です。
+"""
+
+import multiprocessing
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from .workbook_cache import normalize_path
+
+
+def init_worker(options: dict) -> None:
+    """ワーカープロセスの初期化（設定の反映）"""
+    from . import main
+
+    # ワーカー内ではさらに振り分けず、その場で実行する（メモリ予算はワーカー間で等分）
+    workers = max(options.get("workers", 1), 1)
+    main.apply_server_config(
+        **{
+            **options,
+            "workers": 0,
+            "memory_budget": options.get("memory_budget", 0) // workers,
+        }
+    )
+    main.start_background_services()
+
+
+def run_in_worker(name: str, arguments: dict) -> Any:
+    """ワーカープロセス内で登録済みの関数を実行"""
+    from . import main
+
+    return main.TOOL_FUNCTIONS[name](**arguments)
+
+
+class StickyWorkerPool:
+    """ファイルパスごとに担当ワーカーを固定するプロセスプール"""
+
+    def __init__(self, workers: int, options: dict):
+        if workers < 1:
+            raise ValueError("ワーカー数は1以上である必要があります")
+        self.options = options
+        # Windows と同じ挙動にそろえ、親プロセスの状態を引き継がない spawn を使う
+        self._context = multiprocessing.get_context("spawn")
+        self._executors = [self._create_executor() for _ in range(workers)]
+
+    @property
+    def size(self) -> int:
+        """ワーカー数"""
+        return len(self._executors)
+
+    def worker_index(self, filePath: str | None) -> int:
+        """ファイルパスから担当ワーカーの番号を決定（プロセス間で一定）"""
+        if not filePath:
+            return 0
+        return zlib.crc32(normalize_path(filePath).encode("utf-8")) % self.size
+
+    def call(self, filePath: str | None, name: str, arguments: dict) -> Any:
+        """担当ワーカーで関数を実行して結果を返す"""
+        index = self.worker_index(filePath)
+        try:
+            return (
+                self._executors[index].submit(run_in_worker, name, arguments).result()
+            )
+        except BrokenProcessPool:
+            # 異常終了したワーカーは作り直し、次の呼び出しから使えるようにする
+            self._executors[index] = self._create_executor()
+            raise RuntimeError(
+                "ワーカープロセスが異常終了しました。もう一度実行してください"
+            )
+
+    def broadcast(self, name: str, arguments: dict) -> list[Any]:
+        """すべてのワーカーで関数を実行"""
+        futures = [
+            executor.submit(run_in_worker, name, arguments)
+            for executor in self._executors
+        ]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """すべてのワーカーを停止"""
+        for executor in self._executors:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=self._context,
+            initializer=init_worker,
+            initargs=(self.options,),
+        )
@@ -0,0 +1,34 @@
+"""
+テスト共通のヘルパーとフィクスチャ
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from excel_mcp_server import main  # noqa: E402
+
+
+def call_tool(tool, **kwargs):
+    """FastMCPのバージョンに関わらずツール本体の関数を呼び出す"""
+    return getattr(tool, "fn", tool)(**kwargs)
+
+
+def clear_caches() -> None:
+    """サーバーが保持するすべてのキャッシュを空にする"""
+    main.workbook_cache.clear()
+    main.response_cache.clear()
+    main.header_index.clear()
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    """テストごとにキャッシュを空にする"""
+    clear_caches()
+    yield
+    clear_caches()
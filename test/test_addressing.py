@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+範囲アドレスの解析と使用範囲への切り詰めのテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.addressing import (  # noqa: E402
+    MAX_COLUMN,
+    MAX_ROW,
+    CellRange,
+    parse_cell,
+    parse_column,
+    parse_range,
+)
+
+
+def test_parse_range_forms():
+    """列全体・行全体・終端省略の範囲が解析できること"""
+    assert parse_range("A1:C3") == CellRange(1, 1, 3, 3)
+    assert parse_range("B:B") == CellRange(2, 1, 2, MAX_ROW)
+    assert parse_range("A:D") == CellRange(1, 1, 4, MAX_ROW)
+    assert parse_range("2:10") == CellRange(1, 2, MAX_COLUMN, 10)
+    assert parse_range("A2:D") == CellRange(1, 2, 4, MAX_ROW)
+    assert parse_cell("AA10") == (10, 27)
+
+    for invalid in ["A1", "C3:A1", "a1:b2", "A0:B2", "A1:XFE1", "1:0"]:
+        with pytest.raises(ValueError):
+            parse_range(invalid)
+
+    assert (parse_column("B"), parse_column("XFD")) == (2, MAX_COLUMN)
+    for invalid in ["b", "B1", "XFE", "ABCD", "", None]:
+        with pytest.raises(ValueError):
+            parse_column(invalid)
+
+
+def test_whole_column_read_is_clipped_without_creating_cells(tmp_path):
+    """列全体の取得が使用範囲に切り詰められ、空白セルを作成しないこと"""
+    path = str(tmp_path / "columns.xlsx")
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    for row in range(1, 4):
+        worksheet.cell(row=row, column=1, value=row)
+        worksheet.cell(row=row, column=2, value=row * 10)
+    workbook.save(path)
+
+    result = call_tool(
+        main.get_range_values, filePath=path, sheetName="Data", rangeAddr="B:B"
+    )
+    assert result.content[0].text == "範囲 B:B（B1:B3） の値: 3行 x 1列"
+    assert result.structured_content["usedRange"] == "B1:B3"
+    assert result.structured_content["values"] == [[10], [20], [30]]
+
+    result = call_tool(
+        main.get_range_values, filePath=path, sheetName="Data", rangeAddr="A2:D"
+    )
+    assert result.structured_content["values"] == [[2, 20], [3, 30]]
+
+    with main.open_workbook(path) as cached:
+        assert cached["Data"].max_row == 3
+        assert cached["Data"].max_column == 2
+
+
+def test_sort_range_accepts_whole_columns(tmp_path):
+    """列全体を指定した並べ替えが使用範囲だけを対象にすること"""
+    path = str(tmp_path / "sort.xlsx")
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    for row in [["名前", "点数"], ["A", 3], ["B", 1], ["C", 2]]:
+        worksheet.append(row)
+    workbook.save(path)
+
+    call_tool(
+        main.sort_range,
+        filePath=path,
+        sheetName="Data",
+        rangeAddr="A:C",
+        sortKeys=[{"column": "B"}],
+        hasHeader=True,
+    )
+
+    worksheet = openpyxl.load_workbook(path)["Data"]
+    assert [cell.value for cell in worksheet["A"]] == ["名前", "B", "C", "A"]
+    assert worksheet.max_row == 4
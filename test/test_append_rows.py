@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+最終行への行の追加（append_rows）のテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """見出し行と2行のログを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "ログ"
+    worksheet.append(["日時", "イベント", "件数"])
+    worksheet.append(["2024-04-01", "開始", 1])
+    worksheet.append(["2024-04-02", "更新", 2])
+    workbook.save(path)
+    return str(path)
+
+
+def test_appends_after_last_row(tmp_path):
+    """最終行の次の行から追加し、続けて追加した行はその下に入ること"""
+    path = create_sample(tmp_path / "append.xlsx")
+
+    first = call_tool(
+        main.append_rows,
+        filePath=path,
+        sheetName="ログ",
+        values=[["2024-04-03", "終了", 3], ["2024-04-04", None, 4]],
+    )
+    second = call_tool(
+        main.append_rows,
+        filePath=path,
+        sheetName="ログ",
+        values=[["備考"]],
+        startColumn="B",
+    )
+
+    assert first.structured_content == {
+        "sheetName": "ログ",
+        "startCell": "A4",
+        "rows": 2,
+        "columns": 3,
+    }
+    assert second.structured_content["startCell"] == "B6"
+    worksheet = openpyxl.load_workbook(path)["ログ"]
+    assert [[cell.value for cell in row] for row in worksheet["A4:C6"]] == [
+        ["2024-04-03", "終了", 3],
+        ["2024-04-04", None, 4],
+        [None, "備考", None],
+    ]
+
+
+@pytest.mark.parametrize("evict", [False, True])
+def test_append_after_filter_follows_compacted_rows(tmp_path, evict):
+    """絞り込みで詰めた後の追加は、キャッシュの有無によらず残った行の次に入ること"""
+    path = tmp_path / "filtered.xlsx"
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "ログ"
+    worksheet.append(["番号", "区分"])
+    for index in range(1, 11):
+        worksheet.append([index, "残す" if index % 2 else "消す"])
+    workbook.save(path)
+    path = str(path)
+
+    call_tool(
+        main.filter_range,
+        filePath=path,
+        sheetName="ログ",
+        rangeAddr="A1:B11",
+        conditions=[{"column": "B", "operator": "==", "value": "残す"}],
+        hasHeader=True,
+    )
+    if evict:
+        main.workbook_cache.clear()
+    result = call_tool(main.append_rows, filePath=path, sheetName="ログ", values=[[11]])
+
+    assert result.structured_content["startCell"] == "A7"
+    worksheet = openpyxl.load_workbook(path)["ログ"]
+    assert worksheet.max_row == 7
+    assert [cell.value for cell in worksheet["A"]] == ["番号", 1, 3, 5, 7, 9, 11]
+
+
+def test_journaled_appends_are_replayed(tmp_path):
+    """ジャーナルモードで追加した行が、キャッシュを捨てた後も同じ位置に再現されること"""
+    path = create_sample(tmp_path / "journal.xlsx")
+    previous = (SERVER_CONFIG.durability, SERVER_CONFIG.journal_dir)
+    configure(durability="journal", journal_dir=str(tmp_path / "journal"))
+    main.mutation_journal.configure(SERVER_CONFIG.journal_dir)
+    try:
+        for day in range(3, 6):
+            call_tool(
+                main.append_rows,
+                filePath=path,
+                sheetName="ログ",
+                values=[[f"2024-04-0{day}", "追記", day]],
+            )
+        main.workbook_cache.clear()
+        result = call_tool(
+            main.append_rows, filePath=path, sheetName="ログ", values=[["最後"]]
+        )
+        call_tool(main.save_workbook, filePath=path)
+    finally:
+        main.mutation_journal.configure(previous[1])
+        configure(durability=previous[0], journal_dir=previous[1])
+
+    assert result.structured_content["startCell"] == "A7"
+    worksheet = openpyxl.load_workbook(path)["ログ"]
+    assert [cell.value for cell in worksheet["A"]] == [
+        "日時",
+        "2024-04-01",
+        "2024-04-02",
+        "2024-04-03",
+        "2024-04-04",
+        "2024-04-05",
+        "最後",
+    ]
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+複数セル・複数範囲をまとめて扱うツールのテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """2シートのテスト用ワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "Data"
+    workbook.create_sheet("Summary")
+    workbook.save(path)
+    return str(path)
+
+
+def test_set_cells_writes_map_and_triples_in_one_save(tmp_path):
+    """セル位置の対応表と複数シートへの書き込みが1回で反映されること"""
+    path = create_sample(tmp_path / "cells.xlsx")
+
+    result = call_tool(
+        main.set_cells,
+        filePath=path,
+        sheetName="Data",
+        cells={"A1": "名前", "C300": 3},
+        updates=[{"sheet": "Summary", "cell": "B2", "value": "=SUM(Data!C:C)"}],
+    )
+
+    assert result.content[0].text == "2シートの 3セル に値を設定しました。"
+    assert result.structured_content == {"sheetCount": 2, "cellCount": 3}
+    workbook = openpyxl.load_workbook(path)
+    assert workbook["Data"]["A1"].value == "名前"
+    assert workbook["Data"]["C300"].value == 3
+    assert workbook["Data"]["B1"].value is None
+    assert workbook["Summary"]["B2"].value == "=SUM(Data!C:C)"
+
+
+def test_set_cells_validates_before_writing(tmp_path):
+    """不正な指定が1つでもあれば何も書き込まないこと"""
+    path = create_sample(tmp_path / "invalid.xlsx")
+
+    with pytest.raises(Exception, match="Missing"):
+        call_tool(
+            main.set_cells,
+            filePath=path,
+            updates=[
+                {"sheet": "Data", "cell": "A1", "value": 1},
+                {"sheet": "Missing", "cell": "A1", "value": 2},
+            ],
+        )
+    with pytest.raises(Exception, match="無効なセル位置"):
+        call_tool(
+            main.set_cells, filePath=path, sheetName="Data", cells={"A1": 1, "1A": 2}
+        )
+
+    assert openpyxl.load_workbook(path)["Data"]["A1"].value is None
+
+
+def test_get_ranges_reads_multiple_sheets_in_one_load(tmp_path, monkeypatch):
+    """複数シート・複数範囲を1回の読み込みで要求ごとに返すこと"""
+    path = create_sample(tmp_path / "ranges.xlsx")
+    workbook = openpyxl.load_workbook(path)
+    for row in range(1, 11):
+        workbook["Data"].append([row, row * 10, row * 100])
+    workbook["Summary"]["A1"] = "合計"
+    workbook.save(path)
+
+    loads = []
+    original = main.load_workbook
+    monkeypatch.setattr(
+        main,
+        "load_workbook",
+        lambda filePath: loads.append(filePath) or original(filePath),
+    )
+
+    result = call_tool(
+        main.get_ranges,
+        filePath=path,
+        ranges=[
+            {"sheet": "Data", "range": "A8:B9"},
+            {"sheet": "Data", "range": "B2:C3", "key": "middle"},
+            {"sheet": "Data", "range": "C:C", "key": "column"},
+            {"sheet": "Summary", "range": "A1:B1"},
+            {"sheet": "Summary", "range": "A5:B6", "key": "empty"},
+        ],
+    )
+
+    values = result.structured_content["ranges"]
+    assert len(loads) == 1
+    assert list(values) == ["Data!A8:B9", "middle", "column", "Summary!A1:B1", "empty"]
+    assert values["Data!A8:B9"] == [[8, 80], [9, 90]]
+    assert values["middle"] == [[20, 200], [30, 300]]
+    assert values["column"] == [[row * 100] for row in range(1, 11)]
+    assert values["Summary!A1:B1"] == [["合計"]]
+    assert values["empty"] == []
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+見出し名による列の指定（get_column_values / set_column_values）と見出し行のキャッシュのテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.header_index import HeaderIndex  # noqa: E402
+from excel_mcp_server.workbook_cache import file_fingerprint  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """商品名・価格・在庫の見出しを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "在庫"
+    worksheet.append(["商品名", "価格", "在庫", "在庫"])
+    worksheet.append(["りんご", 120, 30, 1])
+    worksheet.append(["みかん", 80, 0, 2])
+    worksheet.append(["ぶどう", 450, 12, 3])
+    workbook.save(path)
+    return str(path)
+
+
+def test_get_and_set_by_header_name(tmp_path):
+    """見出し名で列を指定して値を読み書きし、重複・存在しない見出しはエラーになること"""
+    path = create_sample(tmp_path / "columns.xlsx")
+
+    result = call_tool(
+        main.get_column_values,
+        filePath=path,
+        sheetName="在庫",
+        columns=["価格", "商品名"],
+    )
+    written = call_tool(
+        main.set_column_values,
+        filePath=path,
+        sheetName="在庫",
+        column="価格",
+        values=[130, None],
+        startRow=3,
+    )
+
+    assert result.structured_content == {
+        "sheetName": "在庫",
+        "headerRow": 1,
+        "columns": [{"name": "価格", "column": "B"}, {"name": "商品名", "column": "A"}],
+        "rows": "2:4",
+        "values": [[120, "りんご"], [80, "みかん"], [450, "ぶどう"]],
+    }
+    assert written.structured_content["startCell"] == "B3"
+    worksheet = openpyxl.load_workbook(path)["在庫"]
+    assert [cell.value for cell in worksheet["B"]] == ["価格", 120, 130, 450]
+
+    window = call_tool(
+        main.get_column_values,
+        filePath=path,
+        sheetName="在庫",
+        columns=["価格"],
+        rowRange="3:3",
+    ).structured_content
+    assert (window["rows"], window["values"]) == ("3:3", [[130]])
+    with pytest.raises(Exception, match="複数の列"):
+        call_tool(
+            main.get_column_values, filePath=path, sheetName="在庫", columns=["在庫"]
+        )
+    with pytest.raises(Exception, match="見出し '原価' が見つかりません"):
+        call_tool(
+            main.set_column_values,
+            filePath=path,
+            sheetName="在庫",
+            column="原価",
+            values=[1],
+        )
+
+
+def test_header_index_follows_header_edits(tmp_path):
+    """ジャーナルモードで見出し行を書き換えると、キャッシュ済みの対応表も更新されること"""
+    path = create_sample(tmp_path / "journal.xlsx")
+    previous = (SERVER_CONFIG.durability, SERVER_CONFIG.journal_dir)
+    configure(durability="journal", journal_dir=str(tmp_path / "journal"))
+    main.mutation_journal.configure(SERVER_CONFIG.journal_dir)
+    try:
+        call_tool(
+            main.get_column_values, filePath=path, sheetName="在庫", columns=["価格"]
+        )
+        cached = main.header_index.get(path, "在庫", 1)
+        call_tool(
+            main.set_range_values,
+            filePath=path,
+            sheetName="在庫",
+            startCell="D1",
+            values=[["入荷予定", "仕入先"]],
+        )
+        entry = main.header_index.get(path, "在庫", 1)
+        result = call_tool(
+            main.get_column_values,
+            filePath=path,
+            sheetName="在庫",
+            columns=["在庫", "仕入先"],
+        ).structured_content
+    finally:
+        main.mutation_journal.configure(previous[1])
+        configure(durability=previous[0], journal_dir=previous[1])
+
+    # 作り直さずに更新された対応表を使う
+    assert entry is cached and entry.columns["仕入先"] == 5
+    assert [column["column"] for column in result["columns"]] == ["C", "E"]
+    assert result["values"] == [[30, None], [0, None], [12, None]]
+
+
+def test_header_index_is_rebuilt_after_external_change(tmp_path):
+    """ファイルが外部で変更された場合は見出し行を読み直すこと"""
+    path = create_sample(tmp_path / "external.xlsx")
+    call_tool(main.get_column_values, filePath=path, sheetName="在庫", columns=["価格"])
+
+    workbook = openpyxl.load_workbook(path)
+    workbook["在庫"].insert_cols(1)
+    workbook["在庫"]["A1"] = "コード"
+    workbook.save(path)
+
+    result = call_tool(
+        main.get_column_values, filePath=path, sheetName="在庫", columns=["価格"]
+    ).structured_content
+    assert result["columns"] == [{"name": "価格", "column": "C"}]
+    assert result["values"] == [[120], [80], [450]]
+
+
+def test_header_index_is_bounded_and_releasable(tmp_path):
+    """対応表の数が上限を超えると古いものから削除し、メモリ予算からも解放できること"""
+    path = create_sample(tmp_path / "bounded.xlsx")
+    fingerprint = file_fingerprint(path)
+    index = HeaderIndex(max_entries=2)
+    for row in (1, 2, 3):
+        index.put(path, "在庫", row, ["商品名", "価格"], fingerprint)
+    index.get(path, "在庫", 2)
+    index.put(path, "在庫", 4, ["商品名"], fingerprint)
+
+    assert index.get(path, "在庫", 1) is None
+    assert index.get(path, "在庫", 3) is None
+    assert index.get(path, "在庫", 2) is not None
+    assert index.memory_usage() > 0
+
+    call_tool(main.get_column_values, filePath=path, sheetName="在庫", columns=["価格"])
+    usage = main.memory_governor.stats()["usageBytes"]["headerIndex"]
+    assert usage == main.header_index.memory_usage() > 0
+    assert main.header_index.evict_oldest()
+    assert not main.header_index.evict_oldest()
+    assert main.header_index.memory_usage() == 0
+
+
+def test_set_column_values_reads_header_up_to_last_name(tmp_path):
+    """書式だけのセルが右端にあっても、見出し行は最後の空でない見出しまで読むこと"""
+    path = str(tmp_path / "wide.xlsx")
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "在庫"
+    worksheet.append(["商品名", None, "価格", "  "])
+    worksheet.cell(row=1, column=16000).number_format = "0.00"
+    workbook.save(path)
+
+    call_tool(
+        main.set_column_values,
+        filePath=path,
+        sheetName="在庫",
+        column="価格",
+        values=[100, 200],
+    )
+
+    entry = main.header_index.get(path, "在庫", 1)
+    assert entry.width == 3
+    assert entry.columns == {"商品名": 1, "価格": 3}
+    assert [cell.value for cell in openpyxl.load_workbook(path)["在庫"]["C"]] == [
+        "価格",
+        100,
+        200,
+    ]
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+範囲のコピー・移動（copy_range / move_range）のテスト
+"""
+
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+import openpyxl
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils.indexed_list import IndexedList
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """書式・数式・結合セルを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "元"
+    worksheet["A1"] = "見出し"
+    worksheet["A1"].font = Font(bold=True)
+    worksheet["B1"] = 0.25
+    worksheet["B1"].number_format = "0.000%"
+    worksheet["A2"] = 4
+    worksheet["B2"] = "=A2*B1"
+    worksheet["A3"] = "合計"
+    worksheet["A3"].fill = PatternFill("solid", fgColor="FFFF00")
+    worksheet.merge_cells("A3:B3")
+    workbook.create_sheet("先")
+    workbook.save(path)
+    return str(path)
+
+
+def test_copy_to_other_sheet_translates_formulas(tmp_path):
+    """値・書式・結合セルをコピーし、数式の相対参照を貼り付け先に合わせること"""
+    path = create_sample(tmp_path / "copy.xlsx")
+
+    result = call_tool(
+        main.copy_range,
+        filePath=path,
+        sheetName="元",
+        rangeAddr="A:B",
+        targetCell="C5",
+        targetSheetName="先",
+    )
+
+    assert result.structured_content == {
+        "sheetName": "元",
+        "range": "A:B",
+        "targetFilePath": path,
+        "targetSheetName": "先",
+        "targetRange": "C5:D7",
+        "rows": 3,
+        "columns": 2,
+    }
+    workbook = openpyxl.load_workbook(path)
+    target = workbook["先"]
+    assert [[cell.value for cell in row] for row in target["C5:D7"]] == [
+        ["見出し", 0.25],
+        [4, "=C6*D5"],
+        ["合計", None],
+    ]
+    assert target["C5"].font.b
+    assert target["D5"].number_format == "0.000%"
+    assert [str(merged) for merged in target.merged_cells.ranges] == ["C7:D7"]
+    # コピー元は変更されない
+    assert workbook["元"]["B2"].value == "=A2*B1"
+
+
+def test_copy_to_other_workbook_registers_styles(tmp_path):
+    """別のワークブックへ書式を登録し直してコピーし、値だけのコピーもできること"""
+    path = create_sample(tmp_path / "source.xlsx")
+    target_path = tmp_path / "target.xlsx"
+    target_book = openpyxl.Workbook()
+    target_book.active.title = "受け取り"
+    target_book.active["B2"] = "上書きされる"
+    target_book.save(target_path)
+
+    call_tool(
+        main.copy_range,
+        filePath=path,
+        sheetName="元",
+        rangeAddr="A1:B3",
+        targetCell="B2",
+        targetSheetName="受け取り",
+        targetFilePath=str(target_path),
+    )
+    call_tool(
+        main.copy_range,
+        filePath=path,
+        sheetName="元",
+        rangeAddr="A1:B1",
+        targetCell="E1",
+        targetSheetName="受け取り",
+        targetFilePath=str(target_path),
+        includeFormats=False,
+    )
+
+    target = openpyxl.load_workbook(target_path)["受け取り"]
+    assert target["B2"].value == "見出し"
+    assert target["B2"].font.b
+    assert target["C3"].value == "=B3*C2"
+    assert target["C2"].number_format == "0.000%"
+    assert target["B4"].fill.fgColor.rgb == "00FFFF00"
+    assert [str(merged) for merged in target.merged_cells.ranges] == ["B4:C4"]
+    assert target["E1"].value == "見出し"
+    assert not target["E1"].font.b
+    assert target["F1"].number_format == "General"
+
+
+def test_cross_file_copy_does_not_touch_source_after_unlock(tmp_path, monkeypatch):
+    """元のワークブックのロックを解放した後に書式が変わっても、コピーした書式は変わらないこと"""
+    path = create_sample(tmp_path / "source.xlsx")
+    target_path = tmp_path / "target.xlsx"
+    openpyxl.Workbook().save(target_path)
+    open_workbook = main.open_workbook
+
+    @contextmanager
+    def open_then_change(filePath):
+        with open_workbook(filePath) as workbook:
+            yield workbook
+        # ロックの解放後に別の呼び出しが書式を書き換えた状態を模擬する
+        workbook._fonts = IndexedList([Font(italic=True)])
+        workbook._fills = IndexedList([PatternFill()])
+
+    monkeypatch.setattr(main, "open_workbook", open_then_change)
+    call_tool(
+        main.copy_range,
+        filePath=path,
+        sheetName="元",
+        rangeAddr="A1:B3",
+        targetCell="A1",
+        targetSheetName="Sheet",
+        targetFilePath=str(target_path),
+    )
+
+    target = openpyxl.load_workbook(target_path)["Sheet"]
+    assert target["A1"].font.b and not target["A1"].font.i
+    assert target["A3"].fill.fgColor.rgb == "00FFFF00"
+
+
+def test_move_overlapping_range_clears_source(tmp_path):
+    """同じシート内で重なる位置へ移動し、移動先に含まれない元のセルをクリアすること"""
+    path = create_sample(tmp_path / "move.xlsx")
+
+    call_tool(
+        main.move_range,
+        filePath=path,
+        sheetName="元",
+        rangeAddr="A1:B3",
+        targetCell="B2",
+    )
+
+    worksheet = openpyxl.load_workbook(path)["元"]
+    assert [[cell.value for cell in row] for row in worksheet["A1:C4"]] == [
+        [None, None, None],
+        [None, "見出し", 0.25],
+        [None, 4, "=B3*C2"],
+        [None, "合計", None],
+    ]
+    assert not worksheet["A1"].font.b
+    assert worksheet["B2"].font.b
+    assert [str(merged) for merged in worksheet.merged_cells.ranges] == ["B4:C4"]
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+数式の一括入力（fill_formula）と相対参照の変換のテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+from openpyxl.formula.translate import Translator
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.formulas import FormulaTemplate  # noqa: E402
+
+
+def create_sample(path: Path, rows: int = 5) -> str:
+    """数量と単価の列を持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "明細"
+    worksheet.append(["商品", "数量", "単価", "金額"])
+    for row in range(1, rows + 1):
+        worksheet.append([f"商品{row}", row, row * 100])
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "formula",
+    [
+        "=B2*C2",
+        "=SUM($A$1:A2)+'別 シート'!B$3",
+        '=COUNTIF(3:4,A:$C)&"A1"',
+        "=VLOOKUP(A2,$F:$G,2,FALSE)*税率",
+    ],
+)
+def test_template_matches_translator(formula):
+    """1回だけ字句解析した数式の変換結果が Translator と一致すること"""
+    template = FormulaTemplate(formula)
+    translator = Translator(formula, origin="D2")
+
+    for row_delta, col_delta in [(0, 0), (1, 0), (4999, 2)]:
+        assert template.translate(row_delta, col_delta) == (
+            translator.translate_formula(row_delta=row_delta, col_delta=col_delta)
+        )
+    with pytest.raises(ValueError, match="範囲外"):
+        template.translate(-5, 0)
+
+
+def test_fill_column_to_used_range(tmp_path):
+    """終端を省略した列に、使用範囲の最終行まで数式を1回の保存で入力すること"""
+    path = create_sample(tmp_path / "fill.xlsx")
+
+    result = call_tool(
+        main.fill_formula,
+        filePath=path,
+        sheetName="明細",
+        rangeAddr="D2:D",
+        formula="=B2*C2/$B$2",
+    )
+
+    assert result.structured_content == {
+        "sheetName": "明細",
+        "range": "D2:D6",
+        "anchorCell": "D2",
+        "formula": "=B2*C2/$B$2",
+        "cells": 5,
+    }
+    worksheet = openpyxl.load_workbook(path)["明細"]
+    assert [cell.value for cell in worksheet["D"]] == [
+        "金額",
+        "=B2*C2/$B$2",
+        "=B3*C3/$B$2",
+        "=B4*C4/$B$2",
+        "=B5*C5/$B$2",
+        "=B6*C6/$B$2",
+    ]
+
+
+def test_fill_with_anchor_is_journaled(tmp_path):
+    """アンカーが範囲外でも位置の差だけ参照を移し、ジャーナルから同じ結果を再現できること"""
+    path = create_sample(tmp_path / "journal.xlsx", rows=2)
+    previous = (SERVER_CONFIG.durability, SERVER_CONFIG.journal_dir)
+    configure(durability="journal", journal_dir=str(tmp_path / "journal"))
+    main.mutation_journal.configure(SERVER_CONFIG.journal_dir)
+    try:
+        call_tool(
+            main.fill_formula,
+            filePath=path,
+            sheetName="明細",
+            rangeAddr="E2:F3",
+            formula="=B1+$C1",
+            anchorCell="E1",
+        )
+        # キャッシュを捨てて、ジャーナルからの再適用で読み取る
+        main.workbook_cache.clear()
+        values = call_tool(
+            main.get_range_values, filePath=path, sheetName="明細", rangeAddr="E2:F3"
+        ).structured_content["values"]
+        call_tool(main.save_workbook, filePath=path)
+    finally:
+        main.mutation_journal.configure(previous[1])
+        configure(durability=previous[0], journal_dir=previous[1])
+
+    expected = [["=B2+$C2", "=C2+$C2"], ["=B3+$C3", "=C3+$C3"]]
+    assert values == expected
+    worksheet = openpyxl.load_workbook(path)["明細"]
+    assert [[cell.value for cell in row] for row in worksheet["E2:F3"]] == expected
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+HTTPトランスポート（常駐サーバー）関連のテスト
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from excel_mcp_server import main  # noqa: E402
+
+
+def test_parse_args_http_options():
+    """HTTPモードのオプションが解釈されること"""
+    args = main.parse_args(
+        ["--transport", "http", "--port", "9000", "--max-concurrency", "8"]
+    )
+
+    assert args.transport == "http"
+    assert args.host == "127.0.0.1"
+    assert args.port == 9000
+    assert args.max_concurrency == 8
+
+
+def test_health_check_reports_status():
+    """ヘルスチェックがサーバーの状態を返すこと"""
+    response = asyncio.run(main.health_check(None))
+    body = json.loads(response.body)
+
+    assert response.status_code == 200
+    assert body["status"] == "ok"
+    assert body["workers"] == 0
+
+
+def test_concurrency_limit_middleware():
+    """同時実行数が上限を超えないこと"""
+    middleware = main.ConcurrencyLimitMiddleware(2)
+    active = 0
+    peak = 0
+
+    async def call_next(context):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return context
+
+    async def run_calls():
+        return await asyncio.gather(
+            *(middleware.on_call_tool(index, call_next) for index in range(6))
+        )
+
+    assert asyncio.run(run_calls()) == list(range(6))
+    assert peak == 2
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+変更されたシートだけを書き直す部分保存のテスト
+"""
+
+import sys
+import zipfile
+from pathlib import Path
+
+import openpyxl
+import pytest
+from openpyxl.styles import Font
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+
+
+def create_sample(path: Path, sheets: int = 3) -> str:
+    """複数のシートに値・数式・書式を持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    for index in range(sheets):
+        worksheet = workbook.active if index == 0 else workbook.create_sheet()
+        worksheet.title = f"Sheet{index + 1}"
+        for row in range(1, 21):
+            worksheet.append([row, f"文字列{row}", f"=A{row}*2"])
+        worksheet["A1"].font = Font(bold=True)
+    workbook.save(path)
+    return str(path)
+
+
+def read_members(path: str) -> dict[str, bytes]:
+    """ZIPのメンバー名と内容"""
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def add_calc_chain(path: str) -> None:
+    """Excelで保存したファイルと同様に計算チェーンを追加"""
+    members = read_members(path)
+    members["xl/calcChain.xml"] = (
+        b'<calcChain xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        b'<c r="C1" i="1"/></calcChain>'
+    )
+    members["[Content_Types].xml"] = members["[Content_Types].xml"].replace(
+        b"</Types>",
+        b'<Override PartName="/xl/calcChain.xml" ContentType="application/'
+        b'vnd.openxmlformats-officedocument.spreadsheetml.calcChain+xml"/></Types>',
+    )
+    members["xl/_rels/workbook.xml.rels"] = members[
+        "xl/_rels/workbook.xml.rels"
+    ].replace(
+        b"</Relationships>",
+        b'<Relationship Id="rIdCalc" Target="calcChain.xml" Type="http://schemas.'
+        b'openxmlformats.org/officeDocument/2006/relationships/calcChain"/>'
+        b"</Relationships>",
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+
+
+@pytest.fixture(autouse=True)
+def incremental_save():
+    """部分保存を有効にし、テスト後に元へ戻す"""
+    previous = SERVER_CONFIG.incremental_save
+    configure(incremental_save=True)
+    yield
+    configure(incremental_save=previous)
+
+
+def test_only_modified_sheet_is_rewritten(tmp_path):
+    """変更したシート以外のパーツはバイト単位で同一のまま保存されること"""
+    path = create_sample(tmp_path / "partial.xlsx")
+    call_tool(main.get_workbook_info, filePath=path)
+    before = read_members(path)
+
+    call_tool(
+        main.set_cell_value,
+        filePath=path,
+        sheetName="Sheet2",
+        cell="B2",
+        value="変更",
+    )
+
+    after = read_members(path)
+    assert after.keys() == before.keys()
+    assert [name for name in after if after[name] != before[name]] == [
+        "xl/worksheets/sheet2.xml"
+    ]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook["Sheet2"]["B2"].value == "変更"
+    assert workbook["Sheet1"]["C5"].value == "=A5*2"
+    assert workbook["Sheet3"]["B20"].value == "文字列20"
+    assert workbook["Sheet3"]["A1"].font.b
+
+
+def test_new_style_rewrites_style_table(tmp_path):
+    """新しい書式を追加した場合は書式テーブルも書き直し、他のシートの書式を保つこと"""
+    path = create_sample(tmp_path / "styles.xlsx")
+    call_tool(
+        main.format_cell,
+        filePath=path,
+        sheetName="Sheet3",
+        cell="C2",
+        formatSpec={"font": {"italic": True, "color": "FF0000"}},
+    )
+    call_tool(
+        main.sort_range,
+        filePath=path,
+        sheetName="Sheet1",
+        rangeAddr="A2:C20",
+        sortKeys=[{"column": "A", "order": "desc"}],
+    )
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook["Sheet3"]["C2"].font.i
+    assert workbook["Sheet3"]["C2"].font.color.rgb == "00FF0000"
+    assert workbook["Sheet2"]["A1"].font.b
+    assert not workbook["Sheet2"]["C2"].font.i
+    assert workbook["Sheet1"]["A2"].value == 20
+
+
+def test_calc_chain_is_dropped_and_recalculated_on_load(tmp_path):
+    """計算チェーンを削除し、開いたときに再計算するよう設定すること"""
+    path = create_sample(tmp_path / "calc.xlsx", sheets=2)
+    add_calc_chain(path)
+
+    call_tool(
+        main.add_formula, filePath=path, sheetName="Sheet1", cell="D1", formula="=C1+1"
+    )
+
+    members = read_members(path)
+    assert "xl/calcChain.xml" not in members
+    assert b"calcChain" not in members["[Content_Types].xml"]
+    assert b"calcChain" not in members["xl/_rels/workbook.xml.rels"]
+    assert b'fullCalcOnLoad="1"' in members["xl/workbook.xml"]
+    assert openpyxl.load_workbook(path)["Sheet1"]["D1"].value == "=C1+1"
+
+
+def test_structural_change_falls_back_to_full_save(tmp_path):
+    """シートの追加や外部での変更の後は、xlsx全体を保存すること"""
+    path = create_sample(tmp_path / "structure.xlsx", sheets=2)
+    call_tool(main.add_worksheet, filePath=path, sheetName="追加")
+    call_tool(main.set_cell_value, filePath=path, sheetName="追加", cell="A1", value=1)
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Sheet1", "Sheet2", "追加"]
+    assert workbook["追加"]["A1"].value == 1
+
+    # キャッシュ済みのワークブックと異なる内容でファイルが置き換えられた場合
+    cached = main.load_workbook(path)
+    create_sample(tmp_path / "structure.xlsx", sheets=1)
+    assert main.workbook_cache.loaded_fingerprint(path, cached) is not None
+    main.save_workbook_file(cached, path, {"Sheet1"})
+    assert openpyxl.load_workbook(path).sheetnames == ["Sheet1", "Sheet2", "追加"]
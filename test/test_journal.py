@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+変更ジャーナル（ジャーナルモード）のテスト
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+
+
+@pytest.fixture
+def journal_mode(tmp_path):
+    """ジャーナルモードに切り替え、テスト後に元の設定へ戻す"""
+    previous = (SERVER_CONFIG.durability, SERVER_CONFIG.journal_dir)
+    configure(durability="journal", journal_dir=str(tmp_path / "journal"))
+    main.mutation_journal.configure(SERVER_CONFIG.journal_dir)
+    yield
+    main.mutation_journal.configure(previous[1])
+    configure(durability=previous[0], journal_dir=previous[1])
+
+
+def create_sample(path: Path) -> str:
+    """テスト用のワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "Data"
+    workbook.save(path)
+    return str(path)
+
+
+def test_journaled_edits_are_visible_without_saving(tmp_path, journal_mode):
+    """ジャーナルモードの変更がxlsxを書き換えずに読み取りへ反映されること"""
+    path = create_sample(tmp_path / "journal.xlsx")
+    before = os.stat(path).st_mtime_ns
+
+    call_tool(main.set_cell_value, filePath=path, sheetName="Data", cell="A1", value=1)
+    call_tool(
+        main.set_range_values,
+        filePath=path,
+        sheetName="Data",
+        startCell="B1",
+        values=[[2, 3]],
+    )
+
+    assert os.stat(path).st_mtime_ns == before
+    result = call_tool(
+        main.get_range_values, filePath=path, sheetName="Data", rangeAddr="A1:C1"
+    )
+    assert result.structured_content["values"] == [[1, 2, 3]]
+
+    call_tool(main.save_workbook, filePath=path)
+
+    worksheet = openpyxl.load_workbook(path)["Data"]
+    assert [cell.value for cell in worksheet[1]] == [1, 2, 3]
+    assert not os.path.exists(main.mutation_journal.journal_path(path))
+
+
+def test_journal_is_replayed_on_recovery(tmp_path, journal_mode):
+    """プロセスが終了してもジャーナルから変更が復旧されること"""
+    path = create_sample(tmp_path / "recover.xlsx")
+
+    call_tool(
+        main.add_formula, filePath=path, sheetName="Data", cell="A2", formula="=1+1"
+    )
+    call_tool(
+        main.format_cell,
+        filePath=path,
+        sheetName="Data",
+        cell="A2",
+        formatSpec={"font": {"bold": True}},
+    )
+
+    # クラッシュを模擬してメモリ上の状態を破棄する
+    main.workbook_cache.clear()
+    main.mutation_journal.configure(SERVER_CONFIG.journal_dir)
+
+    main.recover_journals()
+
+    worksheet = openpyxl.load_workbook(path)["Data"]
+    assert worksheet["A2"].value == "=1+1"
+    assert worksheet["A2"].font.bold
+    assert not os.path.exists(main.mutation_journal.journal_path(path))
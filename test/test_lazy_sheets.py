@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+ワークシートの遅延読み込みのテスト
+"""
+
+import sys
+import zipfile
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.lazy_workbook import load_workbook_lazily  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """印刷タイトルや非表示シートを含む複数シートのワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    for index, name in enumerate(["入力", "参照1", "参照2"]):
+        worksheet = workbook.active if index == 0 else workbook.create_sheet()
+        worksheet.title = name
+        for row in range(1, 11):
+            worksheet.append([f"{name}-{row}", row])
+    workbook["参照1"].print_title_rows = "1:1"
+    workbook["参照2"].sheet_state = "hidden"
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def lazy_sheets():
+    """遅延読み込みを有効にし、テスト後に元へ戻す"""
+    previous = SERVER_CONFIG.lazy_sheets
+    configure(lazy_sheets=True)
+    yield
+    configure(lazy_sheets=previous)
+
+
+def test_edit_loads_only_the_edited_sheet(tmp_path):
+    """編集したシートだけが読み込まれ、他のシートはXMLのまま保存されること"""
+    path = create_sample(tmp_path / "lazy.xlsx")
+    with zipfile.ZipFile(path) as archive:
+        reference = archive.read("xl/worksheets/sheet2.xml")
+
+    call_tool(
+        main.set_cell_value, filePath=path, sheetName="入力", cell="B1", value=100
+    )
+    result = call_tool(main.get_cell_value, filePath=path, sheetName="入力", cell="B1")
+    assert result.structured_content["value"] == 100
+
+    workbook = main.workbook_cache.get(path)
+    assert workbook.unloaded_sheets() == ["参照1", "参照2"]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.read("xl/worksheets/sheet2.xml") == reference
+
+    saved = openpyxl.load_workbook(path)
+    assert saved["入力"]["B1"].value == 100
+    assert saved["参照1"]["A10"].value == "参照1-10"
+    assert saved["参照2"].sheet_state == "hidden"
+
+
+def test_sheets_are_materialized_on_access_and_full_save(tmp_path):
+    """アクセスしたシートは元の位置・設定のまま読み込まれ、全体保存でも失われないこと"""
+    path = create_sample(tmp_path / "materialize.xlsx")
+    workbook = load_workbook_lazily(path)
+
+    reference = workbook["参照1"]
+    assert workbook.sheetnames == ["入力", "参照1", "参照2"]
+    assert reference["A2"].value == "参照1-2"
+    assert reference.print_title_rows == "$1:$1"
+    assert workbook.unloaded_sheets() == ["入力", "参照2"]
+
+    call_tool(main.add_worksheet, filePath=path, sheetName="追加")
+    saved = openpyxl.load_workbook(path)
+    assert saved.sheetnames == ["入力", "参照1", "参照2", "追加"]
+    assert saved["参照2"]["B10"].value == 10
+    assert saved["参照1"].print_title_rows == "$1:$1"
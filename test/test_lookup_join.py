@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+ハッシュ結合による照合（lookup_join）のテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """注文と顧客のシートを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    orders = workbook.active
+    orders.title = "注文"
+    orders.append(["注文番号", "顧客ID", "金額"])
+    orders.append([1, "C2", 100])
+    orders.append([2, "c1", 200])
+    orders.append([3, "C9", 300])
+    orders.append([4, None, 400])
+    orders.append([5, "C1", "=C6*2"])
+
+    customers = workbook.create_sheet("顧客")
+    customers.append(["ID", "名前", "地域"])
+    customers.append(["C1", "山田", "東"])
+    customers.append(["C2", "佐藤", None])
+    customers.append(["C1", "重複", "西"])
+    workbook.save(path)
+    return str(path)
+
+
+def test_left_join_writes_matched_columns(tmp_path):
+    """すべての行を残し、一致した値と見出し、一致しない行の値を書き込むこと"""
+    path = create_sample(tmp_path / "left.xlsx")
+
+    result = call_tool(
+        main.lookup_join,
+        filePath=path,
+        sheetName="注文",
+        rangeAddr="A:C",
+        keyColumn="B",
+        lookupSheetName="顧客",
+        lookupRange="A:C",
+        lookupKeyColumn="A",
+        returnColumns=["C", "B"],
+        noMatchValue="#N/A",
+        hasHeader=True,
+    )
+
+    assert result.structured_content == {
+        "sheetName": "注文",
+        "range": "A:C",
+        "outputColumns": ["D", "E"],
+        "matchedRows": 3,
+        "unmatchedRows": 2,
+        "removedRows": 0,
+    }
+    worksheet = openpyxl.load_workbook(path)["注文"]
+    assert [[cell.value for cell in row] for row in worksheet.iter_rows(min_col=4)] == [
+        ["地域", "名前"],
+        [None, "佐藤"],
+        ["東", "山田"],
+        ["#N/A", "#N/A"],
+        ["#N/A", "#N/A"],
+        ["東", "山田"],
+    ]
+
+
+def test_inner_join_removes_unmatched_rows(tmp_path):
+    """一致しない行を削除して上に詰め、数式の参照も移動すること"""
+    path = create_sample(tmp_path / "inner.xlsx")
+
+    result = call_tool(
+        main.lookup_join,
+        filePath=path,
+        sheetName="注文",
+        rangeAddr="A2:C6",
+        keyColumn="B",
+        lookupSheetName="顧客",
+        lookupRange="A2:B4",
+        lookupKeyColumn="A",
+        returnColumns=["B"],
+        outputColumn="F",
+        how="inner",
+        matchCase=True,
+    )
+
+    assert result.structured_content["removedRows"] == 3
+    worksheet = openpyxl.load_workbook(path)["注文"]
+    assert [[cell.value for cell in row] for row in worksheet["A2:F4"]] == [
+        [1, "C2", 100, None, None, "佐藤"],
+        [5, "C1", "=C3*2", None, None, "山田"],
+        [None, None, None, None, None, None],
+    ]
+
+
+def test_lookup_from_other_workbook(tmp_path):
+    """別のワークブックの範囲を照合先にできること"""
+    path = create_sample(tmp_path / "orders.xlsx")
+    master = openpyxl.Workbook()
+    master.active.title = "マスタ"
+    master.active.append(["C9", "鈴木"])
+    master.save(tmp_path / "master.xlsx")
+
+    call_tool(
+        main.lookup_join,
+        filePath=path,
+        sheetName="注文",
+        rangeAddr="A2:C6",
+        keyColumn="B",
+        lookupFilePath=str(tmp_path / "master.xlsx"),
+        lookupSheetName="マスタ",
+        lookupRange="A:B",
+        lookupKeyColumn="A",
+        returnColumns=["B"],
+    )
+
+    worksheet = openpyxl.load_workbook(path)["注文"]
+    assert [cell.value for cell in worksheet["D"]] == [
+        None,
+        None,
+        None,
+        "鈴木",
+        None,
+        None,
+    ]
+
+
+def test_boolean_keys_do_not_match_numbers(tmp_path):
+    """TRUE / FALSE のキーは 1 / 0 と一致せず、1 と 1.0 は一致すること"""
+    path = str(tmp_path / "boolean.xlsx")
+    workbook = openpyxl.Workbook()
+    flags = workbook.active
+    flags.title = "対象"
+    for key in [True, 1, 1.0, False, 0]:
+        flags.append([key])
+    codes = workbook.create_sheet("区分")
+    codes.append([1, "数値の1"])
+    codes.append([True, "真"])
+    codes.append([0, "数値の0"])
+    workbook.save(path)
+
+    call_tool(
+        main.lookup_join,
+        filePath=path,
+        sheetName="対象",
+        rangeAddr="A1:A5",
+        keyColumn="A",
+        lookupSheetName="区分",
+        lookupRange="A1:B3",
+        lookupKeyColumn="A",
+        returnColumns=["B"],
+        noMatchValue="#N/A",
+    )
+
+    worksheet = openpyxl.load_workbook(path)["対象"]
+    assert [cell.value for cell in worksheet["B"]] == [
+        "真",
+        "数値の1",
+        "数値の1",
+        "#N/A",
+        "数値の0",
+    ]
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+メモリ予算の管理のテスト
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.memory_governor import (  # noqa: E402
+    MemoryBudgetError,
+    MemoryGovernor,
+    estimate_workbook_bytes,
+    workbook_memory,
+)
+
+
+def create_sample(path: Path, rows: int) -> str:
+    """指定行数のデータを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    for row in range(rows):
+        worksheet.append([row, f"値{row}", row * 0.5, None])
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def memory_budget():
+    """メモリ予算を設定し、テスト後に元へ戻す"""
+    governor = main.memory_governor
+    previous = (governor.budget_bytes, governor.wait_seconds)
+
+    def configure(budget_bytes: int) -> None:
+        governor.configure(budget_bytes, 0.1)
+
+    yield configure
+    governor.configure(*previous)
+
+
+def test_estimate_is_close_to_loaded_size(tmp_path):
+    """読み込み前の見積もりが読み込み後の使用量と大きく違わないこと"""
+    path = create_sample(tmp_path / "estimate.xlsx", 5000)
+
+    estimate = estimate_workbook_bytes(path)
+    actual = workbook_memory(openpyxl.load_workbook(path))
+
+    assert actual / 2 <= estimate <= actual * 2
+    assert estimate_workbook_bytes(path, include_sheets=False) < estimate / 4
+
+
+def test_cached_workbooks_are_evicted_under_pressure(tmp_path, memory_budget):
+    """予算を超える場合は古いキャッシュを解放し、収まらない読み込みは拒否すること"""
+    first = create_sample(tmp_path / "first.xlsx", 3000)
+    second = create_sample(tmp_path / "second.xlsx", 3000)
+    memory_budget(int(estimate_workbook_bytes(first) * 1.5))
+
+    call_tool(main.get_cell_value, filePath=first, sheetName="Data", cell="A1")
+    call_tool(main.get_cell_value, filePath=second, sheetName="Data", cell="A1")
+
+    stats = main.server_stats()["memory"]
+    assert main.workbook_cache.get(first) is None
+    assert main.workbook_cache.get(second) is not None
+    assert stats["evictions"] >= 1
+    assert stats["usedBytes"] == sum(stats["usageBytes"].values())
+
+    large = create_sample(tmp_path / "large.xlsx", 10000)
+    with pytest.raises(Exception, match="予算"):
+        call_tool(main.get_cell_value, filePath=large, sheetName="Data", cell="A1")
+    assert main.server_stats()["memory"]["rejections"] == 1
+
+
+def test_loads_wait_for_inflight_reservations():
+    """他の読み込みが予約中の場合は、空くまで待ってから読み込むこと"""
+    governor = MemoryGovernor(budget_bytes=100, wait_seconds=5)
+    governor.register("cache", lambda: 0, lambda: False)
+    admitted = threading.Event()
+
+    def second_load():
+        with governor.reserve("second.xlsx", 60):
+            admitted.set()
+
+    with governor.reserve("first.xlsx", 60):
+        thread = threading.Thread(target=second_load)
+        thread.start()
+        time.sleep(0.2)
+        assert not admitted.is_set()
+    thread.join(5)
+
+    assert admitted.is_set()
+    assert governor.stats()["waits"] == 1
+
+    governor.configure(budget_bytes=100, wait_seconds=0)
+    with governor.reserve("first.xlsx", 60):
+        with pytest.raises(MemoryBudgetError, match="読み込み中"):
+            with governor.reserve("second.xlsx", 60):
+                pass
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+シートの列のプロファイル（profile_sheet）のテスト
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.readers import calamine_available  # noqa: E402
+from excel_mcp_server.sheet_profile import profile_rows  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """表題・見出し行・途中の空白行を持つ売上の表を作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "売上"
+    worksheet["A1"] = "2024年度 売上一覧"
+    worksheet.append([])
+    worksheet.append([None, "伝票番号", "担当", "金額", "日付"])
+    for index in range(12):
+        if index == 6:
+            worksheet.append([])
+        worksheet.append(
+            [
+                None,
+                1000 + index,
+                ["山田", "佐藤", "鈴木"][index % 3],
+                None if index % 4 == 0 else index * 1.5,
+                datetime(2024, 4, 1) + timedelta(days=index),
+            ]
+        )
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "calamine"])
+def test_profiles_columns_and_table(tmp_path, engine):
+    """見出し行と表の範囲を検出し、列ごとの型・空白の割合・値の範囲を返すこと"""
+    if engine == "calamine" and not calamine_available():
+        pytest.skip("python-calamine がインストールされていません")
+    path = create_sample(tmp_path / "profile.xlsx")
+    previous = SERVER_CONFIG.reader_engine
+    configure(reader_engine=engine)
+    try:
+        result = call_tool(main.profile_sheet, filePath=path, sheetName="売上")
+    finally:
+        configure(reader_engine=previous)
+
+    data = result.structured_content
+    assert data["engine"] == engine
+    assert (data["tableRange"], data["headerRow"]) == ("B3:E16", 3)
+    assert (data["firstDataRow"], data["lastDataRow"]) == (4, 16)
+    assert (data["dataRows"], data["blankRows"]) == (13, 1)
+
+    number, staff, amount, day = data["columns"]
+    assert (number["name"], number["type"], number["min"], number["max"]) == (
+        "伝票番号",
+        "integer",
+        1000,
+        1011,
+    )
+    assert (staff["column"], staff["type"], staff["distinctCount"]) == (
+        "C",
+        "string",
+        3,
+    )
+    assert not staff["distinctIsEstimate"]
+    assert set(staff["samples"]) <= {"山田", "佐藤", "鈴木"}
+    assert amount["type"] == "number"
+    assert amount["nonBlank"] == 9
+    assert amount["nullRatio"] == pytest.approx(1 - 9 / 13, abs=1e-4)
+    assert (day["type"], day["min"]) == ("datetime", "2024-04-01T00:00:00")
+
+
+def test_header_row_override(tmp_path):
+    """headerRow=0 では見出し行なしとして、値のある最初の行から表とすること"""
+    path = create_sample(tmp_path / "override.xlsx")
+
+    data = call_tool(
+        main.profile_sheet, filePath=path, sheetName="売上", headerRow=0
+    ).structured_content
+
+    assert (data["tableRange"], data["headerRow"]) == ("A1:E16", None)
+    assert data["dataRows"] == 16
+    assert data["columns"][0]["name"] == "A"
+    assert data["columns"][1]["type"] == "mixed"
+    assert data["columns"][1]["typeCounts"] == {"integer": 12, "string": 1}
+
+
+def test_distinct_count_is_estimated_for_many_values():
+    """異なる値が多い列は HyperLogLog で推定し、誤差が数%以内であること"""
+    rows = (
+        ["ID", "区分"] if index == 0 else [index, f"区分{index % 7}"]
+        for index in range(50001)
+    )
+
+    data = profile_rows(rows)
+
+    identifier, category = data["columns"]
+    assert data["headerRow"] == 1
+    assert identifier["distinctIsEstimate"]
+    assert identifier["distinctCount"] == pytest.approx(50000, rel=0.05)
+    assert (category["distinctCount"], category["distinctIsEstimate"]) == (7, False)
+    assert len(identifier["samples"]) == 5
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+ツール呼び出し単位のプロファイリングのテスト
+"""
+
+import asyncio
+import inspect
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import mcp.types as types
+import openpyxl
+import pytest
+from fastmcp import Client
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.profiling import _cprofile_lock, profile_call  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """検索対象のデータを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    for row in range(2000):
+        worksheet.append([row, f"値{row}"])
+    workbook.save(path)
+    return str(path)
+
+
+def call_with_meta(name: str, arguments: dict, meta: dict | None) -> None:
+    """MCPクライアントから _meta 付きでツールを呼び出す"""
+
+    async def call():
+        async with Client(main.mcp) as client:
+            if "meta" in inspect.signature(client.call_tool).parameters:
+                await client.call_tool(name, arguments, meta=meta)
+                return
+            # fastmcp 2.11 の Client は _meta を渡せないため、要求を直接送る
+            params = types.CallToolRequestParams(
+                name=name, arguments=arguments, _meta=meta
+            )
+            request = types.CallToolRequest(method="tools/call", params=params)
+            result = await client.session.send_request(
+                types.ClientRequest(request), types.CallToolResult
+            )
+            assert not result.isError, result.content
+
+    asyncio.run(call())
+
+
+@pytest.fixture
+def profiling():
+    """プロファイリングの設定を変更し、テスト後に元へ戻す"""
+    previous = {
+        "profile_dir": SERVER_CONFIG.profile_dir,
+        "profile_mode": SERVER_CONFIG.profile_mode,
+    }
+    yield configure
+    configure(**previous)
+
+
+def test_per_call_flag_writes_profile(tmp_path, profiling):
+    """_meta の profile を指定した呼び出しだけが計測されること"""
+    path = create_sample(tmp_path / "profile.xlsx")
+    profile_dir = tmp_path / "profiles"
+    profiling(profile_dir=str(profile_dir), profile_mode="")
+    arguments = {"filePath": path, "sheetName": "Data", "searchValue": "値1999"}
+
+    call_with_meta("find_data", arguments, None)
+    assert not profile_dir.exists()
+
+    main.response_cache.clear()
+    call_with_meta("find_data", arguments, {"profile": "cprofile"})
+
+    [pstats_file] = profile_dir.glob("find_data-*.pstats")
+    [allocations] = profile_dir.glob("find_data-*.tracemalloc.txt")
+    functions = {name for _, _, name in pstats.Stats(str(pstats_file)).stats}
+    assert "find_data" in functions
+    assert allocations.read_text(encoding="utf-8").startswith("確保中のメモリ合計")
+
+
+def test_server_option_samples_every_call(tmp_path, profiling):
+    """サーバーオプションで、すべての呼び出しがサンプリングで計測されること"""
+    path = create_sample(tmp_path / "sample.xlsx")
+    profile_dir = tmp_path / "profiles"
+    profiling(profile_dir=str(profile_dir), profile_mode="sample")
+
+    call_tool(
+        main.set_range_values,
+        filePath=path,
+        sheetName="Data",
+        startCell="C1",
+        values=[[row, row * 2, f"行{row}"] for row in range(3000)],
+    )
+
+    [collapsed] = profile_dir.glob("set_range_values-*.collapsed")
+    stacks = collapsed.read_text(encoding="utf-8").splitlines()
+    assert stacks
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert any("set_range_values" in line for line in stacks)
+
+
+def test_profiling_disabled_without_directory(tmp_path, profiling, monkeypatch):
+    """プロファイル用のディレクトリがなければ、_meta を確認せずに実行すること"""
+    path = create_sample(tmp_path / "disabled.xlsx")
+    profiling(profile_dir="", profile_mode="")
+
+    def fail(*args, **kwargs):
+        raise AssertionError("プロファイリングが無効な場合は呼ばれない")
+
+    monkeypatch.setattr(main, "requested_profile_mode", fail)
+    call_with_meta(
+        "get_cell_value",
+        {"filePath": path, "sheetName": "Data", "cell": "A1"},
+        {"profile": "cprofile"},
+    )
+
+
+def test_overlapping_calls_keep_their_results(tmp_path):
+    """先に始まった呼び出しが先に終わっても、後の呼び出しの結果がエラーに置き換わらないこと"""
+    second_started = threading.Event()
+    first_done = threading.Event()
+
+    def first() -> str:
+        # 後の呼び出しが計測を始めてから終わる
+        second_started.wait(5)
+        return "first"
+
+    def second() -> str:
+        second_started.set()
+        first_done.wait(5)
+        return "second"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        a = executor.submit(profile_call, "a", "cprofile", str(tmp_path), first)
+        b = executor.submit(profile_call, "b", "sample", str(tmp_path), second)
+        assert a.result(5) == "first"
+        first_done.set()
+        assert b.result(5) == "second"
+
+    assert len(list(tmp_path.glob("*.tracemalloc.txt"))) == 2
+    assert not tracemalloc.is_tracing()
+
+
+def test_overlapping_cprofile_calls_fall_back_to_sampling(tmp_path):
+    """cProfile で計測中に重なった呼び出しは、サンプリングで計測して結果を返すこと"""
+    second_done = threading.Event()
+
+    def first() -> str:
+        second_done.wait(5)
+        return "first"
+
+    def second() -> str:
+        second_done.set()
+        return "second"
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        a = executor.submit(profile_call, "a", "cprofile", str(tmp_path), first)
+        # 先の呼び出しが cProfile を使い始めるまで待つ
+        while not _cprofile_lock.locked():
+            time.sleep(0.001)
+        assert profile_call("b", "cprofile", str(tmp_path), second) == "second"
+        assert a.result(5) == "first"
+
+    assert len(list(tmp_path.glob("a-*.pstats"))) == 1
+    assert len(list(tmp_path.glob("b-*.collapsed"))) == 1
+    [warning] = tmp_path.glob("b-*.warning.txt")
+    assert "サンプリング" in warning.read_text(encoding="utf-8")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+進捗通知・キャンセル・制限時間のテスト
+"""
+
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+import anyio
+import openpyxl
+import pytest
+from fastmcp import Client
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main, progress  # noqa: E402
+from excel_mcp_server.progress import ProgressReporter  # noqa: E402
+
+
+def create_sample(path: Path, rows: int) -> str:
+    """指定行数のデータを持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    for row in range(rows):
+        worksheet.append([row, f"値{row}"])
+    workbook.save(path)
+    return str(path)
+
+
+def test_export_reports_progress(tmp_path, monkeypatch):
+    """CSV出力で処理済み行数の進捗通知が届くこと"""
+    monkeypatch.setattr(progress, "PROGRESS_INTERVAL", 0)
+    path = create_sample(tmp_path / "progress.xlsx", 2500)
+    events = []
+
+    async def on_progress(done, total, message):
+        events.append((done, total, message))
+
+    async def export():
+        async with Client(main.mcp, progress_handler=on_progress) as client:
+            await client.call_tool(
+                "export_to_csv",
+                {
+                    "filePath": path,
+                    "sheetName": "Data",
+                    "csvPath": str(tmp_path / "progress.csv"),
+                },
+            )
+
+    asyncio.run(export())
+
+    assert [done for done, _, _ in events] == [
+        1000,
+        2000,
+        2500,
+        3500,
+        4500,
+        5000,
+    ]
+    assert {total for _, total, _ in events} == {5000}
+    assert events[0][2] == "読み取り" and events[-1][2] == "書き込み"
+
+
+def test_deadline_aborts_without_partial_results(tmp_path):
+    """制限時間を過ぎた場合、CSVファイルも変更も残さずに中断すること"""
+    path = create_sample(tmp_path / "deadline.xlsx", 10)
+    csv_path = tmp_path / "deadline.csv"
+
+    with pytest.raises(Exception, match="制限時間"):
+        call_tool(
+            main.export_to_csv,
+            filePath=path,
+            sheetName="Data",
+            csvPath=str(csv_path),
+            timeoutSeconds=0,
+        )
+    assert os.listdir(tmp_path) == ["deadline.xlsx"]
+
+    with pytest.raises(Exception, match="制限時間"):
+        call_tool(
+            main.set_range_values,
+            filePath=path,
+            sheetName="Data",
+            startCell="A1",
+            values=[["変更"]] * 10,
+            timeoutSeconds=0,
+        )
+    result = call_tool(main.get_cell_value, filePath=path, sheetName="Data", cell="A1")
+    assert result.structured_content["value"] == 0
+
+
+def test_cancelled_call_stops_between_chunks():
+    """呼び出し元がキャンセルされたら、ワーカースレッドの処理が中断されること"""
+    processed = []
+
+    def work():
+        reporter = ProgressReporter(total=1000)
+        for index in range(1000):
+            time.sleep(0.01)
+            processed.append(index)
+            reporter.advance(1)
+
+    async def cancel_soon():
+        with anyio.move_on_after(0.2):
+            await anyio.to_thread.run_sync(work)
+
+    asyncio.run(cancel_soon())
+    assert 0 < len(processed) < 1000
+
+
+def test_reporter_outside_worker_thread():
+    """イベントループのないスレッドでは、キャンセルの確認を省いて処理を続けること"""
+    reporter = ProgressReporter(total=3)
+
+    for _ in range(3):
+        reporter.advance(1)
+
+    assert reporter.done == 3
+    assert not reporter._in_worker_thread
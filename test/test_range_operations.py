@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+範囲操作ツール（並べ替え・絞り込み）のテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+from openpyxl.styles import Font
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """テスト用のワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    rows = [
+        ["商品名", "価格", "在庫"],
+        ["商品A", 1000, 50],
+        ["商品B", None, 30],
+        ["商品C", 800, 75],
+        ["商品D", 1500, 10],
+        ["商品E", 800, 5],
+    ]
+    for row in rows:
+        worksheet.append(row)
+    worksheet["A4"].font = Font(bold=True)
+    worksheet["D2"] = "=B2*C2"
+    workbook.save(path)
+    return str(path)
+
+
+def read_values(path: str, rangeAddr: str) -> list[list]:
+    """保存されたワークブックから範囲の値を取得"""
+    worksheet = openpyxl.load_workbook(path)["Data"]
+    return [[cell.value for cell in row] for row in worksheet[rangeAddr]]
+
+
+def test_sort_range_is_stable_and_moves_formats(tmp_path):
+    """昇順ソートが安定で、空白は末尾、書式と数式が行と一緒に移動すること"""
+    path = create_sample(tmp_path / "sort.xlsx")
+
+    call_tool(
+        main.sort_range,
+        filePath=path,
+        sheetName="Data",
+        rangeAddr="A1:D6",
+        sortKeys=[{"column": "B"}],
+        hasHeader=True,
+    )
+
+    assert [row[0] for row in read_values(path, "A2:A6")] == [
+        "商品C",
+        "商品E",
+        "商品A",
+        "商品D",
+        "商品B",
+    ]
+    worksheet = openpyxl.load_workbook(path)["Data"]
+    assert worksheet["A2"].font.bold
+    assert worksheet["D4"].value == "=B4*C4"
+
+
+def test_sort_range_descending_multiple_keys(tmp_path):
+    """複数キーと降順指定で並べ替えられること"""
+    path = create_sample(tmp_path / "sort_desc.xlsx")
+
+    call_tool(
+        main.sort_range,
+        filePath=path,
+        sheetName="Data",
+        rangeAddr="A2:C6",
+        sortKeys=[{"column": "B", "order": "desc"}, {"column": "C"}],
+    )
+
+    assert [row[0] for row in read_values(path, "A2:A6")] == [
+        "商品D",
+        "商品A",
+        "商品E",
+        "商品C",
+        "商品B",
+    ]
+
+
+def test_filter_range_compacts_kept_rows(tmp_path):
+    """条件を満たす行だけが上に詰められ、残りがクリアされること"""
+    path = create_sample(tmp_path / "filter.xlsx")
+
+    call_tool(
+        main.filter_range,
+        filePath=path,
+        sheetName="Data",
+        rangeAddr="A1:C6",
+        conditions=[{"column": "C", "operator": ">=", "value": 30}],
+        hasHeader=True,
+    )
+
+    assert read_values(path, "A1:C6") == [
+        ["商品名", "価格", "在庫"],
+        ["商品A", 1000, 50],
+        ["商品B", None, 30],
+        ["商品C", 800, 75],
+        [None, None, None],
+        [None, None, None],
+    ]
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+読み取りエンジン（リーダーバックエンド）の適合性テスト
+
+calamine エンジンの結果が openpyxl エンジンと一致することを確認します。
+"""
+
+import sys
+from datetime import date, datetime, time
+from pathlib import Path
+
+import openpyxl
+import pytest
+from openpyxl.styles import Font, PatternFill
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.addressing import parse_range  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.readers import CalamineReader, OpenpyxlReader  # noqa: E402
+
+pytest.importorskip("python_calamine")
+
+
+def create_sample(path: Path) -> str:
+    """さまざまな型・配置の値を含むワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    worksheet.append(["名前", "数量", "単価", "有効", "登録日"])
+    worksheet.append(["商品A", 3, 1.25, True, datetime(2024, 1, 2, 3, 4, 5)])
+    worksheet.append(["商品B", -7, 1e20, False, date(2024, 2, 29)])
+    worksheet.append([None, 0, 0.1, None, time(10, 30)])
+    worksheet["G9"] = "離れたセル"
+    # 値のない書式だけのセルは使用範囲に含まれない
+    worksheet["J12"].font = Font(bold=True)
+    worksheet["B15"].fill = PatternFill("solid", fgColor="FFFF00")
+
+    offset = workbook.create_sheet("Offset")
+    offset["C3"] = 5
+    offset["D5"] = "末尾"
+
+    workbook.create_sheet("Empty")
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture
+def reader_engine():
+    """読み取りエンジンを切り替え、テスト後に元へ戻す"""
+    previous = SERVER_CONFIG.reader_engine
+
+    def switch(engine: str) -> None:
+        configure(reader_engine=engine)
+        main.workbook_cache.clear()
+        main.response_cache.clear()
+
+    yield switch
+    switch(previous)
+
+
+def test_readers_return_identical_values(tmp_path):
+    """openpyxl と calamine のリーダーが同じ値・使用範囲を返すこと"""
+    path = create_sample(tmp_path / "conformance.xlsx")
+    expected = OpenpyxlReader(openpyxl.load_workbook(path))
+
+    with CalamineReader(path) as actual:
+        assert actual.sheet_names == expected.sheet_names
+        for sheetName in expected.sheet_names:
+            assert actual.dimensions(sheetName) == expected.dimensions(sheetName)
+            assert list(actual.iter_rows(sheetName)) == list(
+                expected.iter_rows(sheetName)
+            )
+
+        windows = [parse_range(address) for address in ["B2:C3", "A3:H4", "E1:E9"]]
+        assert actual.read_windows("Data", windows) == expected.read_windows(
+            "Data", windows
+        )
+
+
+def test_tools_match_across_engines(tmp_path, reader_engine):
+    """読み取りツールの結果がエンジンによらず一致すること"""
+    path = create_sample(tmp_path / "tools.xlsx")
+    calls = [
+        (main.get_workbook_info, {"filePath": path}),
+        (main.get_range_values, {"sheetName": "Data", "rangeAddr": "A:E"}),
+        (main.get_range_values, {"sheetName": "Offset", "rangeAddr": "B2:F"}),
+        (main.find_data, {"sheetName": "Data", "searchValue": 0}),
+        (
+            main.get_ranges,
+            {
+                "ranges": [
+                    {"sheet": "Data", "range": "B:B"},
+                    {"sheet": "Empty", "range": "A1:B2"},
+                ]
+            },
+        ),
+    ]
+
+    results = {}
+    for engine in ["openpyxl", "calamine"]:
+        reader_engine(engine)
+        results[engine] = [
+            call_tool(tool, **{"filePath": path, **arguments})
+            for tool, arguments in calls
+        ]
+        call_tool(
+            main.export_to_csv,
+            filePath=path,
+            sheetName="Data",
+            csvPath=str(tmp_path / f"{engine}.csv"),
+        )
+
+    assert results["calamine"] == results["openpyxl"]
+    assert (tmp_path / "calamine.csv").read_bytes() == (
+        tmp_path / "openpyxl.csv"
+    ).read_bytes()
+
+
+def test_formula_workbooks_are_read_with_openpyxl(tmp_path, reader_engine):
+    """calamine では読み取れない数式を含むファイルは、エンジンによらず数式を返すこと"""
+    path = tmp_path / "formulas.xlsx"
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    worksheet.append(["数量", "単価", "金額"])
+    worksheet.append([1, 100, "=A2*B2"])
+    worksheet.append([2, 250, "=A3*B3"])
+    worksheet["A4"] = "=SUM(A2:A3)"
+    workbook.save(path)
+    path = str(path)
+
+    results = {}
+    for engine in ["openpyxl", "calamine"]:
+        reader_engine(engine)
+        assert not main.use_fast_reader(path)
+        results[engine] = [
+            call_tool(
+                main.get_range_values, filePath=path, sheetName="Data", rangeAddr="A:C"
+            ),
+            call_tool(main.profile_sheet, filePath=path, sheetName="Data"),
+        ]
+
+    assert results["calamine"] == results["openpyxl"]
+    values, profile = results["calamine"]
+    assert values.structured_content["usedRange"] == "A1:C4"
+    assert values.structured_content["values"][3] == ["=SUM(A2:A3)", None, None]
+    assert profile.structured_content["tableRange"] == "A1:C4"
+    assert profile.structured_content["columns"][2]["type"] == "formula"
+
+
+def test_auto_engine_uses_calamine_only_for_large_uncached_files(
+    tmp_path, reader_engine
+):
+    """auto ではしきい値以上かつメモリ上に状態がないファイルだけ calamine を使うこと"""
+    path = create_sample(tmp_path / "auto.xlsx")
+    reader_engine("auto")
+    previous = SERVER_CONFIG.reader_auto_bytes
+
+    try:
+        configure(reader_auto_bytes=1)
+        assert main.use_fast_reader(path)
+
+        call_tool(
+            main.set_cell_value, filePath=path, sheetName="Data", cell="A1", value=1
+        )
+        assert not main.use_fast_reader(path)
+
+        main.workbook_cache.clear()
+        configure(reader_auto_bytes=1 << 40)
+        assert not main.use_fast_reader(path)
+    finally:
+        configure(reader_auto_bytes=previous)
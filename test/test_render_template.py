@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+テンプレートからのワークブックの一括作成（render_template）のテスト
+"""
+
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import openpyxl
+import pytest
+from openpyxl.comments import Comment
+from openpyxl.styles import Font
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main, template_render, workbook_export  # noqa: E402
+
+
+def create_template(path: Path, comment: bool = False) -> str:
+    """書式・数式・2つ目のシートを持つ請求書のテンプレートを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "請求書"
+    worksheet["A1"] = "請求書"
+    worksheet["A1"].font = Font(bold=True, size=18)
+    worksheet["A3"] = "顧客名"
+    worksheet["B3"] = "（顧客名）"
+    worksheet["B3"].font = Font(italic=True)
+    worksheet["A5"] = "金額"
+    worksheet["C5"] = "=B5*1.1"
+    if comment:
+        worksheet["A1"].comment = Comment("テンプレートのコメント", "作成者")
+    workbook.create_sheet("控え")["A1"] = "控え"
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def stop_pool():
+    """テスト後に並列処理用のプロセスを停止する"""
+    yield
+    workbook_export.shutdown_pool()
+
+
+def test_renders_csv_records_and_reports_failures(tmp_path):
+    """レコードごとにファイルを作成し、作成できなかったレコードを報告すること"""
+    template = create_template(tmp_path / "template.xlsx")
+    records = tmp_path / "records.csv"
+    records.write_text(
+        "顧客ID,顧客名,金額\n"
+        "00123,山田商店,1200\n"
+        "00456,佐藤工業,3500.5\n"
+        "00123,重複商店,10\n",
+        encoding="utf-8-sig",
+    )
+    output = tmp_path / "output"
+
+    result = call_tool(
+        main.render_template,
+        templatePath=template,
+        recordsPath=str(records),
+        mapping={"顧客名": "B3", "金額": "請求書!B5"},
+        outputDir=str(output),
+        fileName="請求書_{顧客ID}",
+    )
+
+    data = result.structured_content
+    assert (data["records"], data["rendered"], data["failedCount"]) == (3, 2, 1)
+    assert data["failedRecords"][0]["record"] == 3
+    assert sorted(path.name for path in output.iterdir()) == [
+        "請求書_00123.xlsx",
+        "請求書_00456.xlsx",
+    ]
+
+    workbook = openpyxl.load_workbook(output / "請求書_00456.xlsx")
+    worksheet = workbook["請求書"]
+    assert worksheet["B3"].value == "佐藤工業"
+    assert worksheet["B3"].font.i
+    assert worksheet["B5"].value == 3500.5
+    assert worksheet["C5"].value == "=B5*1.1"
+    assert worksheet["A1"].font.b
+    assert workbook["控え"]["A1"].value == "控え"
+    # テンプレートは変更されない
+    assert openpyxl.load_workbook(template)["請求書"]["B3"].value == "（顧客名）"
+
+
+def test_parallel_render_with_full_save_fallback(tmp_path):
+    """プロセスプールで並列に作成し、部分保存できないテンプレートでも正しく保存すること"""
+    template = create_template(tmp_path / "comment.xlsx", comment=True)
+    records = tmp_path / "records.jsonl"
+    lines = [{"name": f"顧客{index}", "amount": index * 100} for index in range(6)]
+    lines.append({"name": "金額なし"})
+    records.write_text(
+        "\n".join(json.dumps(line, ensure_ascii=False) for line in lines),
+        encoding="utf-8",
+    )
+
+    result = call_tool(
+        main.render_template,
+        templatePath=template,
+        recordsPath=str(records),
+        mapping={"name": "'請求書'!B3", "amount": "B5"},
+        outputDir=str(tmp_path / "parallel"),
+        maxWorkers=2,
+    )
+
+    data = result.structured_content
+    assert (data["rendered"], data["failedCount"]) == (6, 1)
+    assert "amount" in data["failedRecords"][0]["error"]
+    for index in range(6):
+        worksheet = openpyxl.load_workbook(tmp_path / "parallel" / f"{index + 1}.xlsx")[
+            "請求書"
+        ]
+        assert worksheet["B3"].value == f"顧客{index}"
+        assert worksheet["B5"].value == index * 100
+        assert worksheet["A1"].comment.text == "テンプレートのコメント"
+
+
+def test_concurrent_renders_do_not_mix_values(tmp_path):
+    """同じテンプレートを複数のスレッドから作成しても、他のレコードの値が混ざらないこと"""
+    template = create_template(tmp_path / "shared.xlsx")
+    placements = [("name", "請求書", "B3"), ("amount", "請求書", "B5")]
+    output = tmp_path / "threads"
+    output.mkdir()
+    # すべてのスレッドが同じ解析済みのテンプレートを使うように先に解析しておく
+    template_render.load_plan(template, placements)
+
+    def render(thread: int) -> list[dict]:
+        batch = [
+            (
+                index,
+                {"name": f"顧客{thread}-{index}", "amount": thread * 1000 + index},
+                str(output / f"{thread}-{index}.xlsx"),
+            )
+            for index in range(40)
+        ]
+        return template_render.render_batch(template, placements, batch)
+
+    # スレッドの切り替えを頻繁にして、書き込みと保存の間に割り込みが起きやすくする
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(render, range(4)))
+    finally:
+        sys.setswitchinterval(interval)
+
+    assert all(item["error"] is None for result in results for item in result)
+    for thread in range(4):
+        for index in range(40):
+            worksheet = openpyxl.load_workbook(output / f"{thread}-{index}.xlsx")[
+                "請求書"
+            ]
+            assert worksheet["B3"].value == f"顧客{thread}-{index}"
+            assert worksheet["B5"].value == thread * 1000 + index
+
+
+def test_rejects_invalid_mapping(tmp_path):
+    """存在しないシートや重複したセルの対応表はファイルを作成せずにエラーになること"""
+    template = create_template(tmp_path / "invalid.xlsx")
+    records = tmp_path / "records.jsonl"
+    records.write_text('{"a": 1, "b": 2}\n', encoding="utf-8")
+
+    with pytest.raises(Exception, match="シート '集計' が見つかりません"):
+        call_tool(
+            main.render_template,
+            templatePath=template,
+            recordsPath=str(records),
+            mapping={"a": "集計!A1"},
+            outputDir=str(tmp_path / "invalid"),
+        )
+    with pytest.raises(Exception, match="複数の項目"):
+        call_tool(
+            main.render_template,
+            templatePath=template,
+            recordsPath=str(records),
+            mapping={"a": "B3", "b": "請求書!B3"},
+            outputDir=str(tmp_path / "invalid"),
+        )
+    assert not (tmp_path / "invalid").exists()
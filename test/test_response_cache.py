@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+読み取りツールの応答キャッシュのテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.response_cache import ResponseCache, response_size  # noqa: E402
+from excel_mcp_server.results import tool_result  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """テスト用のワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "Data"
+    workbook.active["A1"] = "before"
+    workbook.save(path)
+    return str(path)
+
+
+def test_repeated_reads_hit_cache(tmp_path, monkeypatch):
+    """同じ引数での読み取りはワークブックを開かずに応答すること"""
+    path = create_sample(tmp_path / "cache.xlsx")
+    first = call_tool(main.get_cell_value, filePath=path, sheetName="Data", cell="A1")
+
+    def fail(filePath):
+        raise AssertionError("ワークブックが再度読み込まれました")
+
+    monkeypatch.setattr(main, "load_workbook", fail)
+    hits = main.response_cache.hits
+
+    second = call_tool(main.get_cell_value, filePath=path, sheetName="Data", cell="A1")
+
+    assert second == first
+    assert main.response_cache.hits == hits + 1
+
+
+def test_timeout_is_not_part_of_the_key(tmp_path):
+    """制限時間だけが異なる読み取りは同じ応答を共有すること"""
+    path = create_sample(tmp_path / "timeout.xlsx")
+    search = {"filePath": path, "sheetName": "Data", "searchValue": "before"}
+
+    first = call_tool(main.find_data, **search, timeoutSeconds=30)
+    hits = main.response_cache.hits
+    second = call_tool(main.find_data, **search, timeoutSeconds=60)
+
+    assert second == first
+    assert main.response_cache.hits == hits + 1
+    assert main.response_cache.stats()["entries"] == 1
+
+
+def test_cache_is_invalidated_by_mutation_and_external_change(tmp_path):
+    """変更ツールの実行や外部での変更後は新しい値が返ること"""
+    path = create_sample(tmp_path / "invalidate.xlsx")
+    read = {"filePath": path, "sheetName": "Data", "cell": "A1"}
+
+    assert (
+        call_tool(main.get_cell_value, **read).content[0].text == "セル A1 の値: before"
+    )
+
+    call_tool(main.set_cell_value, filePath=path, sheetName="Data", cell="A1", value=1)
+    assert call_tool(main.get_cell_value, **read).structured_content["value"] == 1
+
+    workbook = openpyxl.load_workbook(path)
+    workbook["Data"]["A1"] = "external change"
+    workbook.save(path)
+    assert (
+        call_tool(main.get_cell_value, **read).structured_content["value"]
+        == "external change"
+    )
+
+
+def test_eviction_by_entries_and_bytes(tmp_path):
+    """件数とバイト数の上限を超えると古い応答から削除されること"""
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    path = str(tmp_path / "evict.xlsx")
+    keys = [cache.make_key("tool", path, {"n": n}) for n in range(3)]
+
+    for key in keys:
+        cache.put(key, "abcd", None)
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[2]) == "abcd"
+
+    cache.put(keys[0], "0123456789", None)
+    assert cache.stats()["bytes"] <= 10
+    assert cache.get(keys[2]) is None
+
+    cache.put(keys[1], "x" * 11, None)
+    assert cache.get(keys[1]) is None
+
+
+def test_tool_result_size_counts_content_and_data():
+    """ツールの戻り値の大きさは要約と構造化データの両方を含むこと"""
+    small = response_size(tool_result("要約", {"values": [[1]]}))
+    large = response_size(tool_result("要約", {"values": [["あ" * 100]]}))
+
+    assert 0 < small < large
+    assert large - small >= 300
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+シート比較（diff_sheets / diff_workbooks）のテスト
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import openpyxl
+from fastmcp import Client
+from pydantic import TypeAdapter
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from excel_mcp_server import main, sheet_diff  # noqa: E402
+from excel_mcp_server.results import WorkbookDiffResult  # noqa: E402
+
+
+def create_workbook(path: Path, rows: list[list], sheetName: str = "Data") -> str:
+    """指定された行を持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = sheetName
+    for row in rows:
+        worksheet.append(row)
+    workbook.save(path)
+    return str(path)
+
+
+BASE_ROWS = [
+    ["ID", "商品名", "価格"],
+    [1, "商品A", 1000],
+    [2, "商品B", 1500],
+    [3, "商品C", 800],
+    [4, "商品D", 1200],
+]
+
+
+def test_diff_by_hash_reports_changed_inserted_and_deleted_rows(tmp_path):
+    """ハッシュによる対応付けで変更・挿入・削除が検出されること"""
+    old = create_workbook(tmp_path / "old.xlsx", BASE_ROWS)
+    new = create_workbook(
+        tmp_path / "new.xlsx",
+        [
+            ["ID", "商品名", "価格"],
+            [1, "商品A", 1000],
+            [2, "商品B", 1600],
+            [4, "商品D", 1200],
+            [5, "商品E", 500],
+        ],
+    )
+
+    result = sheet_diff.diff_sheets(old, "Data", new, "Data")
+
+    assert result["changedRowCount"] == 1
+    assert result["changedRows"][0]["cells"] == [
+        {"cell": "C3", "oldValue": 1500, "newValue": 1600}
+    ]
+    assert [row["row"] for row in result["deletedRows"]] == [4]
+    assert result["insertedRows"] == [{"row": 5, "values": [5, "商品E", 500]}]
+
+
+def test_diff_by_key_column(tmp_path):
+    """キー列による対応付けで行の並び替えを変更として扱わないこと"""
+    old = create_workbook(tmp_path / "old.xlsx", BASE_ROWS)
+    new = create_workbook(
+        tmp_path / "new.xlsx",
+        [
+            ["ID", "商品名", "価格"],
+            [4, "商品D", 1200],
+            [2, "商品B", 1600],
+            [1, "商品A", 1000],
+            [5, "商品E", 500],
+        ],
+    )
+
+    result = sheet_diff.diff_sheets(old, "Data", new, "Data", keyColumn=1)
+
+    assert result["changedRowCount"] == 1
+    assert result["changedRows"][0]["oldRow"] == 3
+    assert result["changedRows"][0]["newRow"] == 3
+    assert [row["row"] for row in result["deletedRows"]] == [4]
+    assert [row["row"] for row in result["insertedRows"]] == [5]
+
+
+def test_diff_columns(tmp_path):
+    """列ハッシュで挿入された列が検出されること"""
+    old = create_workbook(tmp_path / "old.xlsx", [row[:2] for row in BASE_ROWS])
+    new = create_workbook(tmp_path / "new.xlsx", BASE_ROWS)
+
+    result = sheet_diff.diff_sheets(old, "Data", new, "Data", compareColumns=True)
+
+    assert result["columnDiff"] == {
+        "changedColumns": [],
+        "deletedColumns": [],
+        "insertedColumns": ["C"],
+    }
+
+
+def test_diff_by_key_reports_blank_and_duplicate_keys(tmp_path):
+    """キーが空白の行・重複したキーの行も省略せずに削除・挿入として報告すること"""
+    old = create_workbook(
+        tmp_path / "old.xlsx",
+        BASE_ROWS + [[None, "メモ", 0], [2, "商品B（旧）", 1500], [None, "共通", 1]],
+    )
+    new = create_workbook(
+        tmp_path / "new.xlsx",
+        BASE_ROWS + [[None, "共通", 1], [None, "追記", 9], [3, "商品C（再）", 800]],
+    )
+
+    result = sheet_diff.diff_sheets(old, "Data", new, "Data", keyColumn=1)
+
+    assert result["changedRowCount"] == 0
+    assert result["deletedRows"] == [
+        {"row": 6, "values": [None, "メモ", 0]},
+        {"row": 7, "values": [2, "商品B（旧）", 1500]},
+    ]
+    assert result["insertedRows"] == [
+        {"row": 7, "values": [None, "追記", 9]},
+        {"row": 8, "values": [3, "商品C（再）", 800]},
+    ]
+    assert result["duplicateKeyCount"] == {"source": 1, "target": 1}
+    assert result["blankKeyCount"] == {"source": 2, "target": 2}
+
+
+def test_workbook_diff_matches_output_schema(tmp_path):
+    """diff_workbooks の結果が出力スキーマどおりの camelCase の構造化データであること"""
+    old = create_workbook(tmp_path / "old.xlsx", BASE_ROWS)
+    new = create_workbook(tmp_path / "new.xlsx", BASE_ROWS[:-1] + [[4, "商品D", 0]])
+
+    async def compare():
+        async with Client(main.mcp) as client:
+            return await client.call_tool(
+                "diff_workbooks",
+                {"filePath": old, "otherFilePath": new, "keyColumn": "A"},
+            )
+
+    result = asyncio.run(compare())
+
+    TypeAdapter(WorkbookDiffResult).validate_python(result.structured_content)
+    diff = result.structured_content["changedSheets"]["Data"]
+    assert diff["source"] == {"filePath": old, "sheetName": "Data", "rowCount": 5}
+    assert diff["changedRows"] == [
+        {
+            "oldRow": 5,
+            "newRow": 5,
+            "cells": [{"cell": "C5", "oldValue": 1200, "newValue": 0}],
+        }
+    ]
+    assert (diff["duplicateKeyCount"], diff["columnDiff"]) == (
+        {"source": 0, "target": 0},
+        None,
+    )
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+ツールの構造化された戻り値（structuredContent と出力スキーマ）のテスト
+"""
+
+import asyncio
+import datetime
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+from fastmcp import Client
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """値と日付を持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    worksheet = workbook.active
+    worksheet.title = "Data"
+    worksheet.append(["商品", "価格", "登録日"])
+    worksheet.append(["商品A", 1000, datetime.datetime(2024, 4, 1)])
+    worksheet.append(["商品B", 2500.5, None])
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def result_summary():
+    """テスト後に要約の設定を戻す"""
+    previous = SERVER_CONFIG.result_summary
+    yield
+    configure(result_summary=previous)
+
+
+def test_range_values_are_returned_as_structured_content(tmp_path):
+    """範囲の値が出力スキーマどおりの構造化データとして返り、要約に値を含まないこと"""
+    path = create_sample(tmp_path / "structured.xlsx")
+
+    async def read():
+        async with Client(main.mcp) as client:
+            tools = {tool.name: tool for tool in await client.list_tools()}
+            result = await client.call_tool(
+                "get_range_values",
+                {"filePath": path, "sheetName": "Data", "rangeAddr": "A1:D"},
+            )
+            return tools, result
+
+    tools, result = asyncio.run(read())
+
+    schema = tools["get_range_values"].output_schema
+    assert schema["type"] == "object"
+    assert set(schema["required"]) == {"sheetName", "range", "usedRange", "values"}
+    assert all(tool.output_schema is not None for tool in tools.values())
+
+    assert result.structured_content == {
+        "sheetName": "Data",
+        "range": "A1:D",
+        "usedRange": "A1:C3",
+        "values": [
+            ["商品", "価格", "登録日"],
+            ["商品A", 1000, "2024-04-01T00:00:00"],
+            ["商品B", 2500.5, None],
+        ],
+    }
+    assert [block.text for block in result.content] == [
+        "範囲 A1:D（A1:C3） の値: 3行 x 3列"
+    ]
+
+
+def test_summary_can_be_omitted(tmp_path):
+    """--no-summary の場合は構造化データだけを返すこと"""
+    path = create_sample(tmp_path / "no_summary.xlsx")
+    assert main.parse_args(["--no-summary"]).no_summary
+    configure(result_summary=False)
+
+    result = getattr(main.find_data, "fn", main.find_data)(
+        filePath=path, sheetName="Data", searchValue="商品B"
+    )
+
+    assert result.content == []
+    assert result.structured_content == {
+        "sheetName": "Data",
+        "searchValue": "商品B",
+        "cells": ["A3"],
+    }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+ファイル監視によるキャッシュ無効化のテスト
+"""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.config import SERVER_CONFIG, configure  # noqa: E402
+from excel_mcp_server.watcher import (  # noqa: E402
+    WorkbookWatcher,
+    native_watch_available,
+)
+from excel_mcp_server.workbook_cache import normalize_path  # noqa: E402
+
+
+def create_sample(path: Path, value) -> str:
+    """A1に値を持つワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "Data"
+    workbook.active["A1"] = value
+    workbook.save(path)
+    return str(path)
+
+
+def wait_for(predicate, timeout: float = 10.0) -> bool:
+    """条件が満たされるまで待機"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+@pytest.mark.parametrize(
+    "polling",
+    [
+        True,
+        pytest.param(
+            False,
+            marks=pytest.mark.skipif(
+                not native_watch_available(), reason="watchfilesが必要です"
+            ),
+        ),
+    ],
+)
+def test_watcher_reports_changed_files(tmp_path, polling):
+    """監視中のファイルが書き換えられたら通知されること"""
+    path = create_sample(tmp_path / "watched.xlsx", 1)
+    create_sample(tmp_path / "other.xlsx", 1)
+    changed = []
+    notified = threading.Event()
+
+    def on_change(filePath):
+        changed.append(filePath)
+        notified.set()
+
+    watcher = WorkbookWatcher(on_change, interval=0.05, polling=polling)
+    watcher.start()
+    try:
+        watcher.watch(path)
+        time.sleep(0.3)
+        create_sample(tmp_path / "other.xlsx", 2)
+        create_sample(tmp_path / "watched.xlsx", 2)
+
+        assert notified.wait(10)
+        assert set(changed) == {normalize_path(path)}
+    finally:
+        watcher.stop()
+        watcher.join(5)
+
+
+@pytest.fixture
+def watch_mode():
+    """ポーリング監視と再読み込みを有効にし、テスト後に元へ戻す"""
+    previous = {
+        name: getattr(SERVER_CONFIG, name)
+        for name in ["watch", "watch_interval", "watch_polling", "prewarm"]
+    }
+    configure(watch=True, watch_interval=0.05, watch_polling=True, prewarm=True)
+    main.start_background_services()
+    yield
+    main.stop_watcher()
+    configure(**previous)
+
+
+def test_external_change_invalidates_and_prewarms(tmp_path, watch_mode):
+    """外部での変更でキャッシュが更新され、次の読み取りに反映されること"""
+    path = create_sample(tmp_path / "prewarm.xlsx", "before")
+    read = {"filePath": path, "sheetName": "Data", "cell": "A1"}
+
+    assert (
+        call_tool(main.get_cell_value, **read).structured_content["value"] == "before"
+    )
+
+    create_sample(tmp_path / "prewarm.xlsx", "after")
+
+    def reloaded():
+        workbook = main.workbook_cache.get(path)
+        return workbook is not None and workbook["Data"]["A1"].value == "after"
+
+    assert wait_for(reloaded)
+    assert call_tool(main.get_cell_value, **read).structured_content["value"] == "after"
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+ワークブック全体のエクスポート（export_workbook）のテスト
+"""
+
+import datetime
+import json
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+from openpyxl.chart import BarChart, Reference
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main, workbook_export  # noqa: E402
+
+
+def create_sample(path: Path) -> str:
+    """見出し行と型の混在する列を持つ複数シートのワークブックを作成"""
+    workbook = openpyxl.Workbook()
+    for index, title in enumerate(["売上", "在庫", "集計|2024"]):
+        worksheet = workbook.active if index == 0 else workbook.create_sheet()
+        worksheet.title = title
+        worksheet.append(["商品", "数量", "登録日", "備考"])
+        for row in range(1, 6):
+            worksheet.append(
+                [f"商品{row}", row * index, datetime.date(2024, 4, row), row % 2 or "-"]
+            )
+    chart = BarChart()
+    chart.add_data(Reference(worksheet, min_col=2, min_row=1, max_row=6), titles_from_data=True)
+    workbook.create_chartsheet("グラフ").add_chart(chart)
+    workbook.save(path)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def stop_pool():
+    """テスト後にエクスポート用のプロセスを停止する"""
+    yield
+    workbook_export.shutdown_pool()
+
+
+def test_exports_all_sheets_with_manifest(tmp_path):
+    """すべてのワークシートを書き出し、CSVは export_to_csv と同じ内容になること"""
+    path = create_sample(tmp_path / "book.xlsx")
+    output = tmp_path / "csv"
+
+    result = call_tool(
+        main.export_workbook, filePath=path, outputDir=str(output), maxWorkers=1
+    )
+
+    manifest = json.loads((output / "manifest.json").read_text(encoding="utf-8"))
+    assert result.structured_content["manifestPath"] == str(output / "manifest.json")
+    assert [sheet["sheetName"] for sheet in manifest["sheets"]] == [
+        "売上",
+        "在庫",
+        "集計|2024",
+    ]
+    assert [sheet["file"] for sheet in manifest["sheets"]] == [
+        "売上.csv",
+        "在庫.csv",
+        "集計_2024.csv",
+    ]
+    assert manifest["totalRows"] == 18
+    for sheet in manifest["sheets"]:
+        assert sheet["bytes"] == (output / sheet["file"]).stat().st_size
+
+    call_tool(
+        main.export_to_csv,
+        filePath=path,
+        sheetName="在庫",
+        csvPath=str(tmp_path / "single.csv"),
+    )
+    assert (output / "在庫.csv").read_bytes() == (tmp_path / "single.csv").read_bytes()
+
+
+def test_parallel_jsonl_and_parquet_with_header(tmp_path):
+    """プロセスプールで並列に書き出し、見出し行を列名として使うこと"""
+    path = create_sample(tmp_path / "parallel.xlsx")
+
+    call_tool(
+        main.export_workbook,
+        filePath=path,
+        outputDir=str(tmp_path / "jsonl"),
+        format="jsonl",
+        sheetNames=["在庫", "売上"],
+        headerRow=True,
+        maxWorkers=2,
+    )
+    lines = (tmp_path / "jsonl" / "在庫.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 5
+    assert json.loads(lines[1]) == {
+        "商品": "商品2",
+        "数量": 2,
+        "登録日": "2024-04-02T00:00:00",
+        "備考": "-",
+    }
+    assert not (tmp_path / "jsonl" / "集計_2024.jsonl").exists()
+
+    pytest.importorskip("pyarrow")
+    import pandas as pd
+
+    result = call_tool(
+        main.export_workbook,
+        filePath=path,
+        outputDir=str(tmp_path / "parquet"),
+        format="parquet",
+        headerRow=True,
+        maxWorkers=2,
+    )
+    assert result.structured_content["totalRows"] == 15
+    frame = pd.read_parquet(tmp_path / "parquet" / "売上.parquet")
+    assert list(frame.columns) == ["商品", "数量", "登録日", "備考"]
+    assert frame["数量"].tolist() == [0, 0, 0, 0, 0]
+    # 数値と文字列が混在する列は文字列として保存される
+    assert frame["備考"].tolist() == ["1", "-", "1", "-", "1"]
+
+
+def test_rejects_unknown_sheet_and_format(tmp_path):
+    """存在しないシートや未対応の形式はファイルを作成せずにエラーになること"""
+    path = create_sample(tmp_path / "invalid.xlsx")
+    output = tmp_path / "invalid"
+
+    with pytest.raises(Exception, match="グラフ"):
+        call_tool(
+            main.export_workbook,
+            filePath=path,
+            outputDir=str(output),
+            sheetNames=["グラフ"],
+        )
+    with pytest.raises(Exception, match="無効な出力形式"):
+        call_tool(
+            main.export_workbook, filePath=path, outputDir=str(output), format="xml"
+        )
+    assert not output.exists()
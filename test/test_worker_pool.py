@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+スティッキーワーカープールのテスト
+"""
+
+import sys
+from pathlib import Path
+
+import openpyxl
+import pytest
+
+# プロジェクトのパスを追加
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from conftest import call_tool  # noqa: E402
+
+from excel_mcp_server import main  # noqa: E402
+from excel_mcp_server.worker_pool import StickyWorkerPool  # noqa: E402
+
+
+@pytest.fixture
+def worker_pool(tmp_path):
+    """2ワーカーのプールを有効にし、テスト後に停止する"""
+    main.worker_pool = StickyWorkerPool(
+        2, {"journal_dir": str(tmp_path / "journal"), "workers": 2}
+    )
+    yield main.worker_pool
+    main.shutdown_services()
+
+
+def test_worker_index_is_stable(tmp_path):
+    """同じファイルパスは常に同じワーカーに振り分けられること"""
+    pool = StickyWorkerPool.__new__(StickyWorkerPool)
+    pool._executors = [None] * 4
+
+    paths = [str(tmp_path / f"book{i}.xlsx") for i in range(20)]
+    first = [pool.worker_index(path) for path in paths]
+
+    assert first == [pool.worker_index(path) for path in paths]
+    assert len(set(first)) > 1
+
+
+def test_tools_run_in_workers(tmp_path, worker_pool):
+    """ワーカープール経由でツールの変更と読み取りが行えること"""
+    path = str(tmp_path / "pool.xlsx")
+    workbook = openpyxl.Workbook()
+    workbook.active.title = "Data"
+    workbook.save(path)
+
+    call_tool(main.set_cell_value, filePath=path, sheetName="Data", cell="B2", value=42)
+
+    result = call_tool(main.get_cell_value, filePath=path, sheetName="Data", cell="B2")
+    assert result.content[0].text == "セル B2 の値: 42"
+    assert result.structured_content["value"] == 42
+    assert openpyxl.load_workbook(path)["Data"]["B2"].value == 42
+
+
+class RecordingPool:
+    """振り分け先のファイルパスと関数名を記録するだけのワーカープール"""
+
+    def __init__(self):
+        self.calls = []
+
+    def call(self, filePath, name, arguments):
+        self.calls.append((filePath, name))
+
+
+def test_render_is_routed_by_template_path(tmp_path, monkeypatch):
+    """filePath 引数のないツールは routeBy の引数のファイルで振り分けられること"""
+    pool = RecordingPool()
+    monkeypatch.setattr(main, "worker_pool", pool)
+    template = str(tmp_path / "template.xlsx")
+
+    call_tool(
+        main.render_template,
+        templatePath=template,
+        recordsPath=str(tmp_path / "records.csv"),
+        mapping={"A1": "name"},
+        outputDir=str(tmp_path / "out"),
+    )
+
+    assert pool.calls == [
+        (template, "flush_journal"),
+        (template, "render_template"),
+    ]